@@ -0,0 +1,154 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add the project root to the path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.indicators import Indicators
+from utils.online_indicators import (OnlineIndicatorSet, OnlineSMA, OnlineEMA, OnlineMACD, OnlineRSI,
+                                     OnlineBollinger, OnlineATR)
+
+BATCH = [
+    lambda df: Indicators.add_sma(df, 10),
+    lambda df: Indicators.add_ema(df, 20),
+    Indicators.add_macd,
+    Indicators.add_rsi,
+    Indicators.add_bollinger_bands,
+    Indicators.add_atr,
+]
+
+
+def _indicators():
+    return OnlineIndicatorSet([OnlineSMA(10), OnlineEMA(20), OnlineMACD(), OnlineRSI(), OnlineBollinger(),
+                               OnlineATR()])
+
+
+def _bars(n, price, spread, missing=0.0, seed=0):
+    """Random-walk bars around price; a fraction missing of them NaN"""
+    rng = np.random.default_rng(seed)
+    close = price + np.cumsum(rng.normal(0, spread, n))
+    df = pd.DataFrame({
+        "open": close, "high": close + np.abs(rng.normal(0, spread, n)),
+        "low": close - np.abs(rng.normal(0, spread, n)), "close": close, "volume": 1.0,
+    }, index=pd.date_range("2024-01-02 09:30", periods=n, freq="min"))
+    if missing:
+        df.loc[rng.random(n) < missing, ["open", "high", "low", "close"]] = np.nan
+    return df
+
+
+def _online(df):
+    indicators = _indicators()
+    return pd.DataFrame([indicators.update(bar) for _, bar in df.iterrows()], index=df.index)
+
+
+def _batch(df):
+    for add in BATCH:
+        df = add(df)
+    return df
+
+
+def _exact_width(close, period=20, std_dev=2):
+    """Band width from a two-pass standard deviation of every window, in extended precision"""
+    windows = np.lib.stride_tricks.sliding_window_view(close.astype(np.longdouble), period)
+    std = np.sqrt(((windows - windows.mean(axis=1, keepdims=True)) ** 2).sum(axis=1) / (period - 1))
+    return np.concatenate((np.full(period - 1, np.nan), 2 * std_dev * std.astype(float)))
+
+
+def check_width(price, spread, tolerance=1e-9):
+    df = _bars(5000, price, spread)
+    online = _online(df)
+    width = (online["BB_upper"] - online["BB_lower"]).to_numpy()
+    exact = _exact_width(df["close"].to_numpy())
+    error = np.nanmax(np.abs(width - exact) / exact)
+    return error < tolerance, f"max relative width error {error:.1e}"
+
+
+def check_flat():
+    df = _bars(200, 50000, 5.0)
+    df.iloc[50:100, :4] = 50000.0
+    online = _online(df)
+    width = (online["BB_upper"] - online["BB_lower"]).to_numpy()[69:100]
+    return bool((width == 0).all()), f"width {np.abs(width).max():.1e} over 31 flat windows"
+
+
+def check_missing():
+    df = _bars(3000, 100, 1.0, missing=0.05, seed=1)
+    online, batch = _online(df), _batch(df)
+    worst, mismatched = 0.0, []
+    for column in online.columns:
+        mine, theirs = online[column].to_numpy(dtype=float), batch[column].to_numpy(dtype=float)
+        if (np.isnan(mine) != np.isnan(theirs)).any():
+            mismatched.append(column)
+            continue
+        valid = ~np.isnan(mine)
+        # Absolute, at the price level: pandas' own rolling sums drift by about this much
+        worst = max(worst, np.abs(mine[valid] - theirs[valid]).max() / 100)
+    ok = not mismatched and worst < 1e-9
+    return ok, f"NaN pattern differs for {', '.join(mismatched)}" if mismatched else f"max error {worst:.1e}"
+
+
+def check_ema_gaps():
+    # span 3 is alpha 0.5, which pandas updates across a gap differently from other spans
+    rng = np.random.default_rng(3)
+    prices = rng.normal(100, 5, 500)
+    prices[rng.random(500) < 0.2] = np.nan
+    worst = 0.0
+    for span in (3, 12, 20, 26):
+        ema = OnlineEMA(span)
+        mine = np.array([ema.update(price) for price in prices])
+        theirs = pd.Series(prices).ewm(span=span, adjust=False).mean().to_numpy()
+        worst = max(worst, np.nanmax(np.abs(mine - theirs)) / 100)
+    return worst < 1e-12, f"max error {worst:.1e} for spans 3, 12, 20 and 26"
+
+
+def check_empty_seed():
+    try:
+        values = _indicators().seed(_bars(0, 100, 1.0)).values()
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+    return all(np.isnan(v) for v in values.values()), "all NaN"
+
+
+def check_seed_restore():
+    df = _bars(400, 100, 1.0, missing=0.05, seed=2)
+    head, tail = df.iloc[:300], df.iloc[300:]
+    indicators = OnlineIndicatorSet.restore(_indicators().seed(head).snapshot())
+    online = pd.DataFrame([indicators.update(bar) for _, bar in tail.iterrows()], index=tail.index)
+    batch = _batch(df).iloc[300:]
+    worst = max(np.nanmax(np.abs(online[c].to_numpy(dtype=float) - batch[c].to_numpy(dtype=float)))
+                for c in online.columns)
+    return worst < 1e-9, f"max error {worst:.1e} after seed, snapshot and restore"
+
+
+# (name, check)
+CHECKS = [
+    ("band width, minute ticks at $600", lambda: check_width(600, 0.05)),
+    ("band width, $50,000 tight spread", lambda: check_width(50000, 0.5)),
+    ("band width, flat window", check_flat),
+    ("missing bars match batch", check_missing),
+    ("EMA across missing prices", check_ema_gaps),
+    ("seed from an empty frame", check_empty_seed),
+    ("seed, snapshot and restore", check_seed_restore),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the online indicators against the batch Indicators")
+    parser.add_argument("--filter", type=str, help="Only run checks whose name contains this text")
+    args = parser.parse_args()
+
+    failed = 0
+    for name, check in CHECKS:
+        if args.filter and args.filter not in name:
+            continue
+        ok, detail = check()
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<34} {detail}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+class BenchmarkRunner:
+    """Times benchmark cases and compares them against a saved baseline.
+
+    Each case is timed over several runs (best run kept) and run once more
+    under tracemalloc for its peak allocated memory. Throughput is reported
+    as bars processed per second when the case declares its bar count.
+    """
+
+    def __init__(self, repeat=3, measure_memory=True, filter=None):
+        self.repeat = repeat
+        self.measure_memory = measure_memory
+        self.filter = filter
+        self.results = {}
+
+    def run(self, name, fn, bars=None, repeat=None, setup=None):
+        """Time fn() and record the result under name
+
+        setup() runs before every call, outside the timed region (e.g. to
+        clear the indicator cache so each run starts cold).
+        """
+        if self.filter and self.filter not in name:
+            return None
+
+        times = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        peak_mb = None
+        if self.measure_memory:
+            if setup is not None:
+                setup()
+            gc.collect()
+            tracemalloc.start()
+            try:
+                fn()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peak_mb = peak / (1024 * 1024)
+
+        seconds = min(times)
+        result = {
+            "seconds": seconds,
+            "bars": bars,
+            "bars_per_sec": bars / seconds if bars and seconds > 0 else None,
+            "peak_mb": peak_mb,
+        }
+        self.results[name] = result
+        print(_format_row(name, result))
+        return result
+
+    def save(self, path):
+        """Write the results (and where they were measured) as a baseline file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        report = {
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "results": self.results,
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    def compare(self, baseline_path, tolerance=0.2, min_seconds=0.001, min_mb=0.5):
+        """Print each case against the baseline and return the regressed case names
+
+        A case regresses when it is slower, or peaks at more memory, than the
+        baseline by more than tolerance (a fraction, 0.2 = 20%). Differences
+        below min_seconds or min_mb are timer and allocator noise and ignored.
+        """
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)["results"]
+
+        regressions = []
+        print(f"\n{'case':<58} {'time':>9} {'memory':>9}")
+        for name, result in self.results.items():
+            base = baseline.get(name)
+            if base is None:
+                print(f"{name:<58} {'new':>9} {'new':>9}")
+                continue
+            time_ratio = _ratio(result["seconds"], base["seconds"])
+            memory_ratio = _ratio(result["peak_mb"], base.get("peak_mb"))
+            slower = (time_ratio is not None and time_ratio > 1 + tolerance
+                      and result["seconds"] - base["seconds"] > min_seconds)
+            larger = (memory_ratio is not None and memory_ratio > 1 + tolerance
+                      and result["peak_mb"] - base["peak_mb"] > min_mb)
+            regressed = slower or larger
+            if regressed:
+                regressions.append(name)
+            print(f"{name:<58} {_format_ratio(time_ratio):>9} {_format_ratio(memory_ratio):>9}"
+                  f"{'  REGRESSION' if regressed else ''}")
+        return regressions
+
+
+def _ratio(value, base):
+    if value is None or not base:
+        return None
+    return value / base
+
+
+def _format_ratio(ratio):
+    return "-" if ratio is None else f"{ratio:.2f}x"
+
+
+def _format_row(name, result):
+    throughput = f"{result['bars_per_sec']:>14,.0f} bars/s" if result["bars_per_sec"] else " " * 21
+    memory = f"{result['peak_mb']:>9.1f} MB" if result["peak_mb"] is not None else ""
+    return f"{name:<58} {result['seconds'] * 1000:>10.2f} ms {throughput} {memory}"
@@ -0,0 +1,186 @@
+import os
+import sys
+import argparse
+import contextlib
+import io
+import subprocess
+import tempfile
+import pandas as pd
+
+# Add the project root to the path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.harness import BenchmarkRunner
+from config import SYNTHETIC_DATA_CONFIG, STRATEGY_CONFIG
+from utils.data_sources import SyntheticSource
+from utils.indicators import Indicators
+from utils.strategy_graph import StrategyGraph, Any, Vote
+from utils.json_export import export_portfolio, load_portfolio, EXPORT_FORMATS
+from utils.stats import (compute_returns, compute_sharpe, compute_pnl_spark, compute_total_return,
+                         compute_drawdown, compute_universe_stats)
+from utils.resampling import bootstrap_stats
+from strategies.entries.moving_average_crossover import MovingAverageCrossover
+from strategies.entries.low_volatility_entry import LowVolatilityEntry
+from strategies.entries.value_entry import ValueEntry
+from strategies.exits.exit_trailing_stop import ExitTrailingStop
+from strategies.exits.exit_macd_cross import ExitMACDCross
+from strategies.exits.exit_drawdown_limit import ExitDrawdownLimit
+from strategies.exits.exit_rebalance_date import ExitRebalanceDate
+from main import run_strategy, process_symbols
+
+# (name, symbols, start date, end date, timeframe)
+DATASETS = {
+    "quick": [
+        ("1sym_1y_daily", 1, "2024-01-01", "2024-12-31", "daily"),
+        ("1sym_20y_daily", 1, "2005-01-01", "2024-12-31", "daily"),
+        ("100sym_1y_daily", 100, "2024-01-01", "2024-12-31", "daily"),
+        ("1sym_1m_minute", 1, "2024-12-01", "2024-12-31", "minute"),
+    ],
+    "full": [
+        ("1sym_1y_daily", 1, "2024-01-01", "2024-12-31", "daily"),
+        ("1sym_20y_daily", 1, "2005-01-01", "2024-12-31", "daily"),
+        ("100sym_1y_daily", 100, "2024-01-01", "2024-12-31", "daily"),
+        ("100sym_20y_daily", 100, "2005-01-01", "2024-12-31", "daily"),
+        ("5000sym_1y_daily", 5000, "2024-01-01", "2024-12-31", "daily"),
+        ("1sym_1y_minute", 1, "2024-01-01", "2024-12-31", "minute"),
+    ],
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+INDICATORS = {
+    "add_sma": lambda df: Indicators.add_sma(df, 50),
+    "add_ema": lambda df: Indicators.add_ema(df, 20),
+    "add_macd": lambda df: Indicators.add_macd(df),
+    "add_rsi": lambda df: Indicators.add_rsi(df),
+    "add_bollinger_bands": lambda df: Indicators.add_bollinger_bands(df),
+    "add_atr": lambda df: Indicators.add_atr(df),
+}
+
+def strategy_cases():
+    """(name, generate(df, symbol), latest(df, symbol)) for every entry and exit strategy"""
+    cases = []
+    for strategy in (MovingAverageCrossover(), LowVolatilityEntry(), ExitTrailingStop(), ExitMACDCross(),
+                     ExitDrawdownLimit(), ExitRebalanceDate()):
+        cases.append((type(strategy).__name__,
+                      lambda df, symbol, s=strategy: s.generate_signal(df),
+                      lambda df, symbol, s=strategy: s.get_latest_signal(df)))
+    value = ValueEntry()
+    cases.append(("ValueEntry",
+                  lambda df, symbol: value.generate_signal(df, symbol),
+                  lambda df, symbol: value.get_latest_signal(df, symbol)))
+    # Every strategy in one graph, sharing indicators
+    graph = StrategyGraph(Any(MovingAverageCrossover(), LowVolatilityEntry(), ValueEntry()),
+                          Vote(ExitTrailingStop(), ExitMACDCross(), ExitDrawdownLimit(), ExitRebalanceDate()))
+    cases.append(("StrategyGraph",
+                  lambda df, symbol: graph.evaluate(df, symbol),
+                  lambda df, symbol: graph.latest(graph.evaluate(df, symbol))))
+    return cases
+
+STATS = {
+    "compute_returns": compute_returns,
+    "compute_sharpe": compute_sharpe,
+    "compute_pnl_spark": lambda df: compute_pnl_spark(df, 5000.0),
+    "compute_total_return": compute_total_return,
+    "compute_drawdown": compute_drawdown,
+    "bootstrap_stats": lambda df: bootstrap_stats(df, n_resamples=500, seed=0),
+}
+
+def bench_startup(runner):
+    """Cold start of the CLI, each run in a fresh interpreter"""
+    def run(*args):
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+
+    runner.run("startup/main_help", lambda: run("main.py", "--help"))
+    runner.run("startup/import_main", lambda: run("-c", "import main"))
+    # Resolving a strategy imports it and what it needs (pandas, indicators)
+    runner.run("startup/create_strategy",
+               lambda: run("-c", "import main; main.REGISTRY.create('entry', 'MovingAverageCrossover')"))
+
+def load_dataset(source, n_symbols, start_date, end_date, timeframe):
+    return {f"BM{i:04d}": source.get_bars(f"BM{i:04d}", start_date, end_date, timeframe) for i in range(n_symbols)}
+
+def cold_cache():
+    if Indicators.cache is not None:
+        Indicators.cache.clear()
+
+def bench_dataset(runner, name, data, start_date, end_date, timeframe, workdir):
+    frames = list(data.items())
+    bars = sum(len(df) for _, df in frames)
+
+    for label, add in INDICATORS.items():
+        runner.run(f"{name}/indicators.{label}", lambda add=add: [add(df) for _, df in frames],
+                   bars=bars, setup=cold_cache)
+
+    for label, generate, latest in strategy_cases():
+        runner.run(f"{name}/{label}.generate_signal", lambda g=generate: [g(df, s) for s, df in frames],
+                   bars=bars, setup=cold_cache)
+        runner.run(f"{name}/{label}.get_latest_signal", lambda l=latest: [l(df, s) for s, df in frames],
+                   bars=bars, setup=cold_cache)
+
+    for label, stat in STATS.items():
+        runner.run(f"{name}/stats.{label}", lambda stat=stat: [stat(df) for _, df in frames], bars=bars)
+    runner.run(f"{name}/stats.compute_universe_stats", lambda: compute_universe_stats(data, 5000.0), bars=bars)
+
+    # Portfolio entries as run_strategy produces them
+    position_size = STRATEGY_CONFIG["default_allocation"] * 100000
+    portfolio, _ = process_symbols(frames, MovingAverageCrossover(fast_period=20, slow_period=50),
+                                   ExitTrailingStop(atr_period=14, atr_multiplier=2.0), position_size)
+    first = next(iter(portfolio))
+    for export_format in EXPORT_FORMATS:
+        path = os.path.join(workdir, f"{name}_portfolio" + {"json": ".json", "parquet": ".parquet"}.get(export_format, ""))
+        runner.run(f"{name}/export_portfolio.{export_format}",
+                   lambda f=export_format, p=path: export_portfolio(portfolio, p, format=f))
+        runner.run(f"{name}/load_portfolio.{export_format}", lambda p=path: load_portfolio(p))
+        runner.run(f"{name}/load_portfolio.{export_format}.one_symbol",
+                   lambda p=path: load_portfolio(p, symbol=first, columns=["total_return"]))
+
+    if timeframe == "daily":
+        # End to end from the synthetic source, over a window of the same length ending today
+        days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days
+        symbols = list(data)
+
+        def end_to_end():
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_strategy(symbols=symbols, days=days, data_source="synthetic",
+                             export_path=os.path.join(workdir, f"{name}_run.json"), report_path=None)
+
+        runner.run(f"{name}/run_strategy", end_to_end, repeat=1, setup=cold_cache)
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine benchmarks on synthetic data")
+    parser.add_argument("--scale", type=str, default="quick", choices=sorted(DATASETS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument("--filter", type=str, help="Only run cases whose name contains this text")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory run")
+    parser.add_argument("--save", type=str, nargs="?", const=DEFAULT_BASELINE,
+                        help="Save results as a baseline (default benchmarks/baseline.json)")
+    parser.add_argument("--baseline", type=str, nargs="?", const=DEFAULT_BASELINE,
+                        help="Compare against a saved baseline (default benchmarks/baseline.json)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging, 0.2 = 20%%")
+
+    args = parser.parse_args()
+
+    runner = BenchmarkRunner(repeat=args.repeat, measure_memory=not args.no_memory, filter=args.filter)
+    source = SyntheticSource(**SYNTHETIC_DATA_CONFIG)
+
+    bench_startup(runner)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, n_symbols, start_date, end_date, timeframe in DATASETS[args.scale]:
+            print(f"\n{name}: generating {n_symbols} symbol(s) of {timeframe} bars")
+            data = load_dataset(source, n_symbols, start_date, end_date, timeframe)
+            bench_dataset(runner, name, data, start_date, end_date, timeframe, workdir)
+
+    if args.save:
+        print(f"\nResults saved to {runner.save(args.save)}")
+
+    if args.baseline:
+        regressions = runner.compare(args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
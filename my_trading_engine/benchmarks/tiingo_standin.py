@@ -0,0 +1,170 @@
+import os
+import sys
+import argparse
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Add the project root to the path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.data_loader import DataLoader
+from utils.rate_limiter import TokenBucket
+from utils.metrics import METRICS
+
+# Bars served once a ticker's scripted failures are used up
+BARS = [
+    {"date": f"2024-01-{day:02d}T00:00:00.000Z", "open": 100.0 + day, "high": 101.0 + day, "low": 99.0 + day,
+     "close": 100.5 + day, "volume": 1000 * day, "adjOpen": 100.0 + day, "adjHigh": 101.0 + day,
+     "adjLow": 99.0 + day, "adjClose": 100.5 + day, "adjVolume": 1000 * day}
+    for day in range(2, 12)
+]
+
+
+class StandinServer:
+    """Local stand-in for the Tiingo price endpoint with scripted failures
+
+    script maps a ticker to the (status, headers) responses its first
+    requests get, in order; later requests get BARS. The time of every
+    request is kept per ticker, so checks can see retries and their spacing.
+    Point a DataLoader at it with base_url=server.url.
+    """
+
+    def __init__(self, script=None):
+        self.script = {ticker.upper(): list(responses) for ticker, responses in (script or {}).items()}
+        self.requests = {}
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                standin._respond(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _respond(self, handler):
+        # /tiingo/daily/<ticker>/prices
+        parts = urlparse(handler.path).path.strip("/").split("/")
+        ticker = parts[2].upper() if len(parts) > 2 else ""
+        with self._lock:
+            self.requests.setdefault(ticker, []).append(time.monotonic())
+            responses = self.script.get(ticker)
+            status, headers = responses.pop(0) if responses else (200, {})
+
+        body = json.dumps(BARS if status == 200 else {"detail": f"status {status}"}).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def calls(self, ticker):
+        return len(self.requests.get(ticker.upper(), []))
+
+    def gaps(self, ticker):
+        """Seconds between consecutive requests for a ticker"""
+        times = self.requests.get(ticker.upper(), [])
+        return [b - a for a, b in zip(times, times[1:])]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _loader(url, max_retries=3, retry_backoff=0.05, **kwargs):
+    loader = DataLoader(api_key="standin", data_source="tiingo", use_cache=False, base_url=url, **kwargs)
+    loader.max_retries = max_retries
+    loader.retry_backoff = retry_backoff
+    return loader
+
+
+def check_retry_after(server):
+    loader = _loader(server.url)
+    data = loader.get_multiple_symbols(["RA"], start_date="2024-01-01", end_date="2024-01-31")
+    gaps = server.gaps("RA")
+    ok = len(data.get("RA", [])) == len(BARS) and server.calls("RA") == 2 and gaps[0] >= 0.5
+    return ok, f"{server.calls('RA')} requests, waited {gaps[0] if gaps else 0:.2f}s for Retry-After: 0.5"
+
+
+def check_backoff(server):
+    retries = METRICS.counters.get("fetch_retries", 0)
+    loader = _loader(server.url, retry_backoff=0.1)
+    data = loader.get_multiple_symbols(["BO"], start_date="2024-01-01", end_date="2024-01-31")
+    gaps = server.gaps("BO")
+    retried = METRICS.counters.get("fetch_retries", 0) - retries
+    # Delays of retry_backoff * 2**attempt (plus up to 10% jitter)
+    ok = ("BO" in data and server.calls("BO") == 3 and retried == 2
+          and len(gaps) == 2 and gaps[0] >= 0.1 and gaps[1] >= 0.2)
+    return ok, f"{server.calls('BO')} requests, {retried} retries, gaps {', '.join(f'{g:.2f}s' for g in gaps)}"
+
+
+def check_gives_up(server):
+    loader = _loader(server.url, max_retries=2, retry_backoff=0.01)
+    data = loader.get_multiple_symbols(["GU"], start_date="2024-01-01", end_date="2024-01-31")
+    ok = "GU" not in data and "GU" in loader.errors and server.calls("GU") == 3
+    return ok, f"{server.calls('GU')} requests, error: {loader.errors.get('GU', 'none')[:60]}"
+
+
+def check_no_retry(server):
+    loader = _loader(server.url)
+    loader.get_multiple_symbols(["NF"], start_date="2024-01-01", end_date="2024-01-31")
+    ok = "NF" in loader.errors and server.calls("NF") == 1
+    return ok, f"{server.calls('NF')} request for a 404"
+
+
+def check_rate_limit(server):
+    # 20 requests/s with no burst: 8 symbols on 4 threads take at least 7 / 20 s
+    symbols = [f"RL{i}" for i in range(8)]
+    loader = _loader(server.url, max_workers=4, rate_limiter=TokenBucket(rate=20, capacity=1))
+    data = loader.get_multiple_symbols(symbols, start_date="2024-01-01", end_date="2024-01-31")
+    times = sorted(t for symbol in symbols for t in server.requests.get(symbol, []))
+    span = times[-1] - times[0] if times else 0.0
+    ok = len(data) == len(symbols) and span >= 7 / 20 * 0.9
+    return ok, f"{len(times)} requests over {span:.2f}s (quota 20/s)"
+
+
+# (name, scripted failures by ticker, check)
+CHECKS = [
+    ("429 with Retry-After", {"RA": [(429, {"Retry-After": "0.5"})]}, check_retry_after),
+    ("5xx exponential backoff", {"BO": [(503, {}), (502, {})]}, check_backoff),
+    ("5xx beyond max_retries", {"GU": [(500, {})] * 5}, check_gives_up),
+    ("404 not retried", {"NF": [(404, {})] * 5}, check_no_retry),
+    ("token bucket rate limit", {}, check_rate_limit),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the Tiingo retry, backoff and rate-limit paths offline")
+    parser.add_argument("--filter", type=str, help="Only run checks whose name contains this text")
+    args = parser.parse_args()
+
+    # The Tiingo client logs the body of every failed response; these failures are scripted
+    logging.disable(logging.ERROR)
+
+    failed = 0
+    for name, script, check in CHECKS:
+        if args.filter and args.filter not in name:
+            continue
+        with StandinServer(script) as server:
+            ok, detail = check(server)
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<28} {detail}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
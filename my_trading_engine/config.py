@@ -3,8 +3,71 @@
 # API Keys and settings
 API_CONFIG = {
     "tiingo_api_key": "YOUR_TIINGO_API_KEY_HERE",  # Replace with your actual Tiingo API key
-    "data_source": "tiingo",  # Options: "tiingo", "quantconnect"
-    "default_timeframe": "daily",  # Options: "daily", "hourly", "minute"
+    "data_source": "tiingo",  # Options: "tiingo", "local", "synthetic" ("quantconnect" is not implemented yet)
+    "default_timeframe": "daily",  # Options: "daily", "hourly", "minute", "5min", "15min", "30min"
+    "tiingo_base_url": None,  # Override to point at a mirror or local stand-in server
+    "max_concurrency": 8,  # Symbols fetched in parallel by get_multiple_symbols
+    "requests_per_hour": 10000,  # Vendor quota enforced by a token bucket
+    "rate_limit_burst": 20,  # Requests allowed back to back before throttling
+    "max_retries": 3,  # Retries for timeouts, connection errors, 429 and 5xx responses
+    "retry_backoff": 1.0,  # Base delay in seconds, doubled on each retry
+    "local_data_dir": "../data/bars",  # Parquet/CSV/Arrow files per symbol for the "local" source
+}
+
+# Deterministic generator used by the "synthetic" data source
+SYNTHETIC_DATA_CONFIG = {
+    "seed": 42,
+    "start_date": "2000-01-01",  # First bar of every synthetic series
+    "years": 30,
+}
+
+# Local bar cache settings
+CACHE_CONFIG = {
+    "enabled": True,
+    "cache_dir": "../cache/bars",  # One Parquet file per symbol, keyed by source/timeframe
+    "max_size_mb": 2048,  # Evict least recently used symbols above this size
+    "max_age_days": 30,  # Evict symbols not requested for this many days
+    "indicator_cache_mb": 256,  # In-memory bound for computed indicator series shared across strategies
+}
+
+# Bar sizes a run can use
+TIMEFRAMES = ["daily", "hourly", "minute", "5min", "15min", "30min"]
+
+# Intraday ("hourly", "minute") bars; "5min", "15min" and "30min" are resampled from minute bars
+INTRADAY_CONFIG = {
+    "compact": True,  # float32 prices and int32 volume, without the duplicate unadjusted adj_* columns
+    "request_days": {"hourly": 120, "minute": 7},  # Calendar days per vendor request
+    "days_per_row_group": 20,  # Trading days per Parquet row group in the bar cache
+}
+
+# Bars handed to the strategies by the data loader
+BAR_DATA_CONFIG = {
+    "adjusted": False,  # Use the dividend/split adjusted prices as open/high/low/close/volume
+    "compact": False,  # Keep only the columns the strategies read, as float32 sharing one date index
+                       # per calendar (see FLOAT32_TOLERANCE in utils/bars.py for indicator accuracy)
+}
+
+# Point-in-time fundamentals for ValueEntry
+FUNDAMENTALS_CONFIG = {
+    "source": "mock",  # "local" reads dated reports from data_dir; "mock" serves fixed placeholder ratios
+    "data_dir": "../data/fundamentals",  # fundamentals.parquet/.csv with a symbol column, or SYMBOL.parquet/.csv
+    "ttl_seconds": 86400,  # Reload a symbol's reports after this long (shared by every strategy instance)
+}
+
+# Streaming run_strategy pipeline; peak memory is about
+# (fetch_window + 2 * workers * batch_size) symbols' bars
+PIPELINE_CONFIG = {
+    "fetch_window": 64,  # Symbols fetched ahead of the compute stage
+    "batch_size": 50,  # Symbols per signals/statistics batch (one worker task)
+}
+
+# Portfolio export formats: one JSON file, per-symbol JSON shards with a manifest, or a Parquet table
+EXPORT_FORMATS = ("json", "sharded", "parquet")
+
+# Run instrumentation written at the end of run_strategy (None disables an output)
+METRICS_CONFIG = {
+    "report_path": "../outputs/run_report.json",  # JSON report: stage timers, counters, histograms, memory
+    "prometheus_textfile": None,  # e.g. /var/lib/node_exporter/textfile/trading_engine.prom
 }
 
 # Strategy configurations
@@ -14,6 +77,8 @@ STRATEGY_CONFIG = {
     "risk_free_rate": 0.03,  # For Sharpe ratio calculations
     "default_stop_loss": 0.05,  # 5% stop loss by default
     "default_take_profit": 0.15,  # 15% take profit by default
+    "default_entry": "MovingAverageCrossover:fast_period=20,slow_period=50",  # Registry name:params
+    "default_exit": "ExitTrailingStop:atr_period=14,atr_multiplier=2.0",
 }
 
 # Symbols to track
@@ -24,6 +89,11 @@ SYMBOLS = [
     # Add more symbols as needed
 ]
 
+# Symbol universe for runs without --symbols (see utils/universe.py)
+UNIVERSE_CONFIG = {
+    "path": None,  # CSV/Parquet with symbol and tags (";"-separated) columns; None uses SYMBOLS above
+}
+
 # Strategy tags for categorization
 STRATEGY_TAGS = [
     "momentum", "value", "growth", "income", "retirement", "swing_trade", 
@@ -6,6 +6,7 @@ from strategies.entries.value_entry import ValueEntry
 from strategies.exits.exit_macd_cross import ExitMACDCross
 from strategies.exits.exit_drawdown_limit import ExitDrawdownLimit
 from strategies.exits.exit_rebalance_date import ExitRebalanceDate
+from utils.strategy_graph import StrategyGraph, Rule, All, Any, Vote
 
 # Initialize the strategies
 low_vol_entry = LowVolatilityEntry(volatility_threshold=0.015)
@@ -27,4 +28,17 @@ exit_signal_rebalance = rebalance_exit.get_latest_signal(data)
 
 if exit_signal_macd['exit_signal'] or exit_signal_drawdown['exit_signal'] or exit_signal_rebalance['exit_signal']:
     # Exit the position
-    pass
\ No newline at end of file
+    pass
+
+# Or combine them in a strategy graph, which computes shared indicators and
+# runs each strategy once (All = AND, Any = OR, Vote = at least min_votes)
+graph = StrategyGraph(
+    entry=All(low_vol_entry, value_entry),
+    exit=Any(macd_exit, Rule(drawdown_exit, entry_price=entry_price), rebalance_exit),
+)
+latest = graph.latest(graph.evaluate(data, symbol))
+if latest['exit_signal']:
+    # latest['rules'] says which rules fired
+    pass
+
+# graph.evaluate_panel(panel) gives the same signals for a whole Panel as dates x symbols arrays
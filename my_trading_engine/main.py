@@ -1,93 +1,269 @@
 import os
 import sys
 import argparse
-import pandas as pd
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import project modules
-from utils.data_loader import DataLoader
-from utils.json_export import export_portfolio, load_portfolio
-from strategies.entries.moving_average_crossover import MovingAverageCrossover
-from strategies.exits.exit_trailing_stop import ExitTrailingStop
-from utils.stats import compute_returns, compute_sharpe, compute_pnl_spark, compute_total_return
-from config import SYMBOLS, STRATEGY_CONFIG
+# Import project modules; pandas and the data and strategy modules are imported
+# where they are first used, so --help and argument errors return immediately
+from strategies.registry import REGISTRY
+from utils.metrics import METRICS, RunMetrics
+from utils.universe import Universe, default_universe
+from config import (API_CONFIG, STRATEGY_CONFIG, PIPELINE_CONFIG, METRICS_CONFIG, BAR_DATA_CONFIG,
+                    TIMEFRAMES, EXPORT_FORMATS)
 
-def run_strategy(symbols=None, days=365, api_key=None):
-    """Run the trading strategy and generate signals"""
-    # Initialize data loader
-    data_loader = DataLoader(api_key=api_key)
+# Bar columns the strategies and statistics read
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def process_symbols(items, entry_strategy, exit_strategy, position_size, timeframe="daily", universe=None):
+    """Signals and statistics for a list of (symbol, df) pairs
     
-    # Get symbols to analyze
-    if symbols is None:
-        symbols = [s["symbol"] if isinstance(s, dict) else s for s in SYMBOLS]
-    elif isinstance(symbols, str):
-        symbols = [symbols]
+    Runs in the calling process or in a worker; returns the portfolio entries,
+    which hold only scalars and short lists, and the timing and metrics of
+    the chunk. Signals use the bars as loaded; statistics are always on daily
+    bars, so horizons and annualization mean the same for every timeframe.
+    Symbol tags come from universe (default: the configured universe).
+    """
+    from utils.indicators import Indicators
+    from utils.stats import compute_universe_stats
+    from utils.bars import resample_bars
+    from utils.strategy_graph import StrategyGraph
     
-    # Set date range
-    end_date = datetime.now().strftime("%Y-%m-%d")
-    start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    start = time.perf_counter()
+    cache = Indicators.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    metrics = RunMetrics()
+    universe = universe if universe is not None else default_universe()
     
-    # Get historical data
-    data = data_loader.get_multiple_symbols(symbols, start_date=start_date, end_date=end_date)
+    # Entry and exit rules share their indicators and run each strategy once per symbol
+    graph = StrategyGraph(entry_strategy, exit_strategy)
     
-    # Initialize strategies
-    entry_strategy = MovingAverageCrossover(fast_period=20, slow_period=50)
-    exit_strategy = ExitTrailingStop(atr_period=14, atr_multiplier=2.0)
+    # Per-symbol strategy data (fundamentals) for the whole chunk in one read
+    with metrics.timer("prefetch"):
+        graph.prefetch([symbol for symbol, _ in items])
+    
+    # Calculate statistics for the whole chunk in one batch
+    with metrics.timer("stats"):
+        if timeframe != "daily":
+            universe_stats = compute_universe_stats({s: resample_bars(df, "daily") for s, df in items}, position_size)
+        else:
+            universe_stats = compute_universe_stats(dict(items), position_size)
     
     # Process each symbol
-    portfolio = {}
-    for symbol, df in data.items():
-        # Skip if data is empty
-        if df.empty:
-            continue
+    results = {}
+    for symbol, df in items:
+        signals_start = time.perf_counter()
         
-        # Get entry signals
-        entry_df = entry_strategy.generate_signal(df)
-        entry_signal = entry_strategy.get_latest_signal(df)
-        
-        # Get exit signals
-        exit_df = exit_strategy.generate_signal(df)
-        exit_signal = exit_strategy.get_latest_signal(df)
+        # Get entry and exit signals; each strategy is timed under generate_signal.<class>,
+        # strategy_graph is the total including the shared indicators
+        with metrics.timer("strategy_graph"):
+            evaluation = graph.evaluate(df, symbol, metrics)
+        latest = graph.latest(evaluation)
+        frame = evaluation["frame"]
         
         # Get symbol metadata
-        symbol_info = next((s for s in SYMBOLS if isinstance(s, dict) and s["symbol"] == symbol), {"symbol": symbol, "tags": []})
-        
-        # Calculate position size
-        position_size = STRATEGY_CONFIG["default_allocation"] * 100000  # Assuming $100k portfolio
+        symbol_info = universe.info(symbol)
         
-        # Calculate statistics
-        returns = compute_returns(df)
-        sharpe_ratios = compute_sharpe(df)
-        pnl_spark = compute_pnl_spark(df, position_size)
-        total_return = compute_total_return(df)
+        stats = universe_stats[symbol]
+        total_return = stats["total_return"]
         
         # Store results
-        portfolio[symbol] = {
+        results[symbol] = {
             "symbol": symbol,
             "tags": symbol_info.get("tags", []),
             "allocation": STRATEGY_CONFIG["default_allocation"],
-            "exit_signal": exit_signal["exit_signal"],
-            "entry_signal": entry_signal["entry_long"],
+            "exit_signal": latest["exit_signal"],
+            "entry_signal": latest["entry_signal"],
             "latest_indicators": {
-                "close": df["close"].iloc[-1],
-                "SMA_20": entry_df["SMA_20"].iloc[-1],
-                "SMA_50": entry_df["SMA_50"].iloc[-1],
-                "ATR": exit_df["ATR"].iloc[-1]
+                "close": float(df["close"].iloc[-1]),
+                **{column: frame[column].iloc[-1] for column in evaluation["indicators"]}
             },
             "position_size_dollars": position_size,
-            "pnl_spark_chart": pnl_spark,
-            "returns": returns,
-            "sharpe_ratios": sharpe_ratios,
+            "pnl_spark_chart": stats["pnl_spark_chart"],
+            "returns": stats["returns"],
+            "sharpe_ratios": stats["sharpe_ratios"],
+            "sortino_ratios": stats["sortino_ratios"],
+            "volatility": stats["volatility"],
+            "max_drawdown": stats["max_drawdown"],
             "total_return": total_return,
             "total_pnl_dollars": position_size * total_return
         }
+        
+        metrics.add_time("signals", time.perf_counter() - signals_start)
+        metrics.count("bars_processed", len(df))
+        metrics.count("symbols_processed")
+    
+    metrics.sample_memory()
+    timing = {
+        "pid": os.getpid(),
+        "symbols": len(items),
+        "seconds": time.perf_counter() - start,
+        "cache_hits": (cache.hits - hits) if cache is not None else 0,
+        "cache_misses": (cache.misses - misses) if cache is not None else 0,
+        "metrics": metrics.to_dict(),
+    }
+    return results, timing
+
+def iter_batches(stream, batch_size, prune=False):
+    """Group a stream of (symbol, df) pairs into lists of batch_size
+    
+    With prune, only the bar columns the strategies read are kept, as the
+    batches are sent to worker processes.
+    """
+    batch = []
+    for symbol, df in stream:
+        batch.append((symbol, df[[c for c in BAR_COLUMNS if c in df.columns]] if prune else df))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def run_batches(batches, entry_strategy, exit_strategy, position_size, workers=1, timeframe="daily", universe=None):
+    """Yield process_symbols results for each batch, in batch order
+    
+    With several workers, at most two batches per worker are queued at a time
+    so batches are not pulled from the stream faster than they are processed.
+    Each worker task carries only its batch's part of the universe.
+    """
+    universe = universe if universe is not None else default_universe()
+    if workers <= 1:
+        for batch in batches:
+            yield process_symbols(batch, entry_strategy, exit_strategy, position_size, timeframe, universe)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(process_symbols, batch, entry_strategy, exit_strategy, position_size,
+                                           timeframe, universe.subset([symbol for symbol, _ in batch])))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def report_worker_timing(timings):
+    """Print symbols processed and busy time per worker process"""
+    workers = {}
+    for timing in timings:
+        worker = workers.setdefault(timing["pid"], {"chunks": 0, "symbols": 0, "seconds": 0.0})
+        worker["chunks"] += 1
+        worker["symbols"] += timing["symbols"]
+        worker["seconds"] += timing["seconds"]
+    for pid, worker in sorted(workers.items()):
+        print(f"Worker {pid}: {worker['symbols']} symbols in {worker['chunks']} chunks, {worker['seconds']:.2f}s")
+
+def report_metrics(report_path=None, prometheus_path=None):
+    """Print where the run's time went and write the run report / Prometheus textfile"""
+    METRICS.sample_memory()
+    timers = METRICS.timers
+    stages = " | ".join(f"{stage} {timers[stage]['seconds']:.2f}s"
+                        for stage in ("fetch", "stats", "signals", "export") if stage in timers)
+    # Fetch and worker times are summed over threads and processes, so can exceed the run time
+    print(f"Run {timers['run']['seconds']:.2f}s: {stages}; peak memory {METRICS.peak_rss_mb or 0:.0f} MB")
+    if report_path:
+        print(f"Run report written to {METRICS.write_report(report_path)}")
+    if prometheus_path:
+        print(f"Prometheus metrics written to {METRICS.write_prometheus(prometheus_path)}")
+
+def run_strategy(symbols=None, days=365, tags=None, universe=None, entry=STRATEGY_CONFIG["default_entry"],
+                 exit=STRATEGY_CONFIG["default_exit"], api_key=None, use_cache=None, refresh_cache=False,
+                 fetch_workers=None, data_source=None, workers=1,
+                 export_format="json", export_path=None, export_partial=False,
+                 timeframe=API_CONFIG.get("default_timeframe", "daily"), adjusted=BAR_DATA_CONFIG["adjusted"],
+                 compact=BAR_DATA_CONFIG["compact"], report_path=METRICS_CONFIG["report_path"],
+                 prometheus_path=METRICS_CONFIG["prometheus_textfile"]):
+    """Run the trading strategy and generate signals
+    
+    entry and exit are strategy instances or registry specs such as
+    "MovingAverageCrossover:fast_period=20,slow_period=50". Without symbols,
+    the whole universe (a Universe, a universe file path, or by default the
+    configured one) is run; tags narrows the symbols with a Universe.query
+    expression such as "retirement_core,large_cap".
+    """
+    from utils.data_loader import DataLoader
+    from utils.json_export import portfolio_writer
+    from utils.indicators import Indicators
+    from utils.strategy_graph import StrategyGraph
     
-    # Export results
-    export_path = export_portfolio(portfolio)
-    print(f"Portfolio exported to {export_path}")
+    # Metrics cover this run only
+    METRICS.reset()
+    run_start = time.perf_counter()
+    
+    # Initialize strategies
+    entry_strategy = REGISTRY.create("entry", entry) if isinstance(entry, str) else entry
+    exit_strategy = REGISTRY.create("exit", exit) if isinstance(exit, str) else exit
+    
+    # Initialize data loader; compact bars hold only what the strategies and statistics read
+    columns = None
+    if compact:
+        needed = set(StrategyGraph(entry_strategy, exit_strategy).required_columns()) | {'close'}
+        columns = [c for c in BAR_COLUMNS if c in needed]
+    data_loader = DataLoader(api_key=api_key, data_source=data_source, use_cache=use_cache,
+                             force_refresh=refresh_cache, max_workers=fetch_workers,
+                             columns=columns, adjusted=adjusted, compact=compact)
+    
+    # Get symbols to analyze
+    if universe is None:
+        universe = default_universe()
+    elif isinstance(universe, str):
+        universe = Universe.load(universe)
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    symbols = universe.select(symbols, tags)
+    
+    # Set date range
+    end_date = datetime.now().strftime("%Y-%m-%d")
+    start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    
+    # Calculate position size
+    position_size = STRATEGY_CONFIG["default_allocation"] * 100000  # Assuming $100k portfolio
+    
+    # Stream bars through signals, statistics and export: each batch is
+    # processed as soon as its bars arrive and released once exported
+    stream = data_loader.iter_symbols(symbols, start_date=start_date, end_date=end_date, timeframe=timeframe,
+                                      window=PIPELINE_CONFIG["fetch_window"])
+    batches = iter_batches(stream, PIPELINE_CONFIG["batch_size"], prune=workers > 1)
+    
+    portfolio = {}
+    timings = []
+    writer = portfolio_writer(export_path, export_format, partial=export_partial)
+    try:
+        for results, timing in run_batches(batches, entry_strategy, exit_strategy, position_size, workers, timeframe,
+                                              universe):
+            METRICS.merge(timing["metrics"])
+            with METRICS.timer("export"):
+                for symbol, result in results.items():
+                    writer.write(symbol, result)
+            portfolio.update(results)
+            timings.append(timing)
+    except BaseException:
+        writer.abort()
+        raise
+    with METRICS.timer("export"):
+        writer.close()
+    print(f"Portfolio exported to {writer.output_path}")
+    
+    for symbol, error in data_loader.errors.items():
+        print(f"Error fetching data for {symbol}: {error}")
+    
+    if workers > 1:
+        report_worker_timing(timings)
+    
+    if Indicators.cache is not None:
+        hits = sum(timing["cache_hits"] for timing in timings)
+        misses = sum(timing["cache_misses"] for timing in timings)
+        METRICS.count("indicator_cache_hits", hits)
+        METRICS.count("indicator_cache_misses", misses)
+        print(f"Indicator cache: {hits} hits, {misses} misses")
+    
+    METRICS.add_time("run", time.perf_counter() - run_start)
+    report_metrics(report_path, prometheus_path)
     
     return portfolio
 
@@ -95,13 +271,84 @@ def main():
     parser = argparse.ArgumentParser(description="Trading Strategy Runner")
     parser.add_argument("--symbols", type=str, help="Comma-separated list of symbols to analyze")
     parser.add_argument("--days", type=int, default=365, help="Number of days of historical data to analyze")
+    parser.add_argument("--tags", type=str,
+                        help="Only symbols matching tags: a,b (both), a|b (either), -a (without a)")
+    parser.add_argument("--universe-file", type=str, help="CSV/Parquet universe with symbol and tags columns")
+    parser.add_argument("--entry", type=str, default=STRATEGY_CONFIG["default_entry"],
+                        help="Entry strategy as Name or Name:param=value,... (see --list-strategies)")
+    parser.add_argument("--exit", type=str, default=STRATEGY_CONFIG["default_exit"],
+                        help="Exit strategy as Name or Name:param=value,...")
+    parser.add_argument("--list-strategies", action="store_true", help="List the entry and exit strategies and exit")
     parser.add_argument("--api-key", type=str, help="Tiingo API key (overrides config)")
+    parser.add_argument("--data-source", type=str, choices=["tiingo", "local", "synthetic"],
+                        help="Where to load bars from (overrides config)")
+    parser.add_argument("--timeframe", type=str, default=API_CONFIG.get("default_timeframe", "daily"),
+                        choices=TIMEFRAMES, help="Bar size for signals; 5min/15min/30min are resampled from minute bars")
+    parser.add_argument("--adjusted", action="store_true", default=BAR_DATA_CONFIG["adjusted"],
+                        help="Use dividend/split adjusted prices")
+    parser.add_argument("--compact-bars", action="store_true", default=BAR_DATA_CONFIG["compact"],
+                        help="Load only the columns the strategies read, as float32")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local bar cache")
+    parser.add_argument("--refresh-cache", action="store_true", help="Re-download all bars and rebuild the local cache")
+    parser.add_argument("--fetch-workers", type=int, help="Number of symbols to fetch concurrently (overrides config)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for signals and statistics")
+    parser.add_argument("--export-format", type=str, default="json", choices=EXPORT_FORMATS,
+                        help="Single JSON file, per-symbol JSON shards with a manifest, or a Parquet table")
+    parser.add_argument("--export-path", type=str, help="Output file or directory (defaults per format)")
+    parser.add_argument("--export-partial", action="store_true",
+                        help="Update only the analyzed symbols in an existing sharded/parquet export")
+    parser.add_argument("--metrics-report", type=str, default=METRICS_CONFIG["report_path"],
+                        help="JSON run report path (overrides config)")
+    parser.add_argument("--prometheus-textfile", type=str, default=METRICS_CONFIG["prometheus_textfile"],
+                        help="Write run metrics in Prometheus text format for the node exporter")
+    parser.add_argument("--profile", type=str, nargs="?", const="../outputs/run.prof",
+                        help="Profile the run with cProfile and save the stats (worker processes are not profiled)")
     
     args = parser.parse_args()
     
+    if args.list_strategies:
+        for kind in ("entry", "exit"):
+            print(f"{kind}: {', '.join(REGISTRY.names(kind))}")
+        return
+    
+    # Resolve the strategies before loading anything, so a bad name fails fast
+    try:
+        entry_strategy = REGISTRY.create("entry", args.entry)
+        exit_strategy = REGISTRY.create("exit", args.exit)
+    except (ValueError, TypeError) as error:
+        parser.error(str(error))
+    
     symbols = args.symbols.split(",") if args.symbols else None
     
-    portfolio = run_strategy(symbols=symbols, days=args.days, api_key=args.api_key)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    portfolio = run_strategy(symbols=symbols, days=args.days, tags=args.tags, universe=args.universe_file,
+                             entry=entry_strategy, exit=exit_strategy, api_key=args.api_key,
+                             use_cache=False if args.no_cache else None,
+                             refresh_cache=args.refresh_cache,
+                             fetch_workers=args.fetch_workers,
+                             data_source=args.data_source,
+                             workers=args.workers,
+                             export_format=args.export_format,
+                             export_path=args.export_path,
+                             export_partial=args.export_partial,
+                             timeframe=args.timeframe,
+                             adjusted=args.adjusted,
+                             compact=args.compact_bars,
+                             report_path=args.metrics_report,
+                             prometheus_path=args.prometheus_textfile)
+    
+    if profiler is not None:
+        import pstats
+        profiler.disable()
+        os.makedirs(os.path.dirname(args.profile) or ".", exist_ok=True)
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile saved to {args.profile}; top functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
     
     # Print summary
     print("\nPortfolio Summary:")
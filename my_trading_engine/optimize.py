@@ -0,0 +1,115 @@
+import os
+import sys
+import argparse
+import json
+from datetime import datetime, timedelta
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import project modules; pandas and the data and sweep modules are imported
+# in main() after the arguments are parsed, so --help and argument errors return immediately
+from strategies.registry import REGISTRY, parse_spec
+from utils.universe import default_universe
+
+
+def parse_param(text):
+    """Parse "entry.fast_period=10,20,30" (choices) or "exit.atr_multiplier=1.0:3.0" (range)"""
+    name, _, values = text.partition("=")
+    if ":" in values:
+        low, high = (json.loads(v) for v in values.split(":", 1))
+        return name, (low, high)
+    return name, [json.loads(v) for v in values.split(",")]
+
+
+def resolve_strategy(kind, spec):
+    """Registry class of a "Name" or "Name:param=value,..." spec, and its params as fixed space entries"""
+    name, params = parse_spec(spec)
+    return REGISTRY.get(kind, name), {f"{kind}.{key}": [value] for key, value in params.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strategy Parameter Sweep")
+    parser.add_argument("--entry", type=str, default="MovingAverageCrossover",
+                        help=f"Entry strategy as Name or Name:param=value,... ({', '.join(REGISTRY.names('entry'))})")
+    parser.add_argument("--exit", type=str, default="ExitTrailingStop",
+                        help=f"Exit strategy as Name or Name:param=value,... ({', '.join(REGISTRY.names('exit'))})")
+    parser.add_argument("--param", action="append", default=[],
+                        help="Parameter values, e.g. entry.fast_period=10,20,30 or exit.atr_multiplier=1.0:3.0")
+    parser.add_argument("--method", type=str, default="grid", choices=["grid", "random", "lhs"])
+    parser.add_argument("--samples", type=int, default=100, help="Number of points for random/lhs sampling")
+    parser.add_argument("--seed", type=int, help="Seed for random/lhs sampling")
+    parser.add_argument("--metric", type=str, default="sharpe", help="Metric to rank combinations by")
+    parser.add_argument("--symbols", type=str, help="Comma-separated list of symbols to evaluate")
+    parser.add_argument("--days", type=int, default=3650, help="Number of days of historical data")
+    parser.add_argument("--data-source", type=str, choices=["tiingo", "local", "synthetic"],
+                        help="Where to load bars from (overrides config)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--output", type=str, default="../outputs/sweep_results.csv", help="Ranked results CSV")
+    parser.add_argument("--folds", type=int, help="Walk-forward: optimize on rolling train windows and test on the next")
+    parser.add_argument("--train-bars", type=int, default=756, help="Walk-forward train window length in bars")
+    parser.add_argument("--test-bars", type=int, help="Walk-forward test window length (default: split the rest evenly)")
+    parser.add_argument("--anchored", action="store_true", help="Walk-forward train windows all start at the first bar")
+    parser.add_argument("--equity-output", type=str, default="../outputs/walk_forward_equity.csv",
+                        help="Walk-forward out-of-sample equity CSV")
+    
+    args = parser.parse_args()
+    
+    # Parameters given in a spec are held fixed; --param values of the same name win
+    try:
+        entry_cls, entry_fixed = resolve_strategy("entry", args.entry)
+        exit_cls, exit_fixed = resolve_strategy("exit", args.exit)
+    except ValueError as error:
+        parser.error(str(error))
+    params = dict(parse_param(p) for p in args.param)
+    if not params:
+        parser.error("at least one --param is required")
+    space = {**entry_fixed, **exit_fixed, **params}
+
+    from utils.data_loader import DataLoader
+    from utils.optimizer import run_sweep
+    from utils.walk_forward import run_walk_forward
+    
+    symbols = args.symbols.split(",") if args.symbols else default_universe().symbols()
+    end_date = datetime.now().strftime("%Y-%m-%d")
+    start_date = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+    
+    data_loader = DataLoader(data_source=args.data_source)
+    data = data_loader.get_multiple_symbols(symbols, start_date=start_date, end_date=end_date)
+    for symbol, error in data_loader.errors.items():
+        print(f"Error fetching data for {symbol}: {error}")
+    
+    # Moving average crossovers only make sense with the fast window below the slow one
+    constraint = None
+    if entry_cls.__name__ == "MovingAverageCrossover":
+        constraint = lambda entry, exit_: entry.get("fast_period", 20) < entry.get("slow_period", 50)
+    
+    if args.folds or args.test_bars:
+        output = args.output if args.output != parser.get_default("output") else "../outputs/walk_forward_folds.csv"
+        result = run_walk_forward(
+            entry_cls, exit_cls, data, space,
+            train_bars=args.train_bars, test_bars=args.test_bars, n_folds=args.folds, anchored=args.anchored,
+            method=args.method, n_samples=args.samples, seed=args.seed, constraint=constraint,
+            metric=args.metric, workers=args.workers, output_path=output
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(args.equity_output)), exist_ok=True)
+        result["equity"].to_csv(args.equity_output)
+
+        print(f"Walk-forward over {len(result['folds'])} folds on {len(data)} symbols; folds written to {output}")
+        print(result["folds"].to_string(index=False))
+        for name, value in result["metrics"].items():
+            if value is not None:
+                print(f"out-of-sample {name}: {value:.4f}")
+        return
+
+    results = run_sweep(
+        entry_cls, exit_cls, data, space,
+        method=args.method, n_samples=args.samples, seed=args.seed, constraint=constraint,
+        metric=args.metric, workers=args.workers, output_path=args.output
+    )
+    
+    print(f"Evaluated {len(results)} combinations on {len(data)} symbols; results written to {args.output}")
+    print(results.head(10).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import project modules; pandas and the data and portfolio modules are imported
+# in main() after the arguments are parsed, so --help and argument errors return immediately
+from strategies.registry import REGISTRY
+from utils.universe import default_universe
+from config import STRATEGY_CONFIG
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio Simulation")
+    parser.add_argument("--entry", type=str, default="MovingAverageCrossover",
+                        help=f"Entry strategy as Name or Name:param=value,... ({', '.join(REGISTRY.names('entry'))})")
+    parser.add_argument("--exit", type=str, default="ExitTrailingStop",
+                        help=f"Exit strategy as Name or Name:param=value,... ({', '.join(REGISTRY.names('exit'))})")
+    parser.add_argument("--symbols", type=str, help="Comma-separated list of symbols to trade")
+    parser.add_argument("--days", type=int, default=3650, help="Number of days of historical data")
+    parser.add_argument("--data-source", type=str, choices=["tiingo", "local", "synthetic"],
+                        help="Where to load bars from (overrides config)")
+    parser.add_argument("--capital", type=float, default=100000.0, help="Starting capital")
+    parser.add_argument("--max-positions", type=int, default=STRATEGY_CONFIG["max_positions"])
+    parser.add_argument("--allocation", type=float, default=STRATEGY_CONFIG["default_allocation"],
+                        help="Fraction of equity per new position")
+    parser.add_argument("--stop-loss", type=float, default=STRATEGY_CONFIG["default_stop_loss"], help="0 to disable")
+    parser.add_argument("--take-profit", type=float, default=STRATEGY_CONFIG["default_take_profit"], help="0 to disable")
+    parser.add_argument("--rank", type=str, default="momentum", choices=["momentum", "none"],
+                        help="How to choose between more entry candidates than free slots")
+    parser.add_argument("--output", type=str, default="../outputs/portfolio_equity.csv", help="Equity and exposure CSV")
+
+    args = parser.parse_args()
+
+    # Resolve the strategies before loading anything, so a bad name fails fast
+    try:
+        entry_strategy = REGISTRY.create("entry", args.entry)
+        exit_strategy = REGISTRY.create("exit", args.exit)
+    except (ValueError, TypeError) as error:
+        parser.error(str(error))
+
+    from utils.data_loader import DataLoader
+    from utils.panel import Panel
+    from utils.strategy_graph import StrategyGraph
+    from utils.portfolio import simulate_portfolio, momentum_score
+
+    symbols = args.symbols.split(",") if args.symbols else default_universe().symbols()
+    end_date = datetime.now().strftime("%Y-%m-%d")
+    start_date = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+
+    data_loader = DataLoader(data_source=args.data_source)
+    data = data_loader.get_multiple_symbols(symbols, start_date=start_date, end_date=end_date)
+    for symbol, error in data_loader.errors.items():
+        print(f"Error fetching data for {symbol}: {error}")
+
+    panel = Panel.from_frames(data)
+    graph = StrategyGraph(entry_strategy, exit_strategy)
+    signals = graph.evaluate_panel(panel)
+
+    result = simulate_portfolio(
+        panel, signals["entry"], signals["exit"],
+        score=momentum_score(panel) if args.rank == "momentum" else None,
+        initial_capital=args.capital, max_positions=args.max_positions, allocation=args.allocation,
+        stop_loss=args.stop_loss, take_profit=args.take_profit
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    result["equity"].to_frame().join([result["cash"], result["exposure"], result["positions"]]).to_csv(args.output)
+
+    trades = result["trades"]
+    print(f"Simulated {len(panel.symbols)} symbols over {len(panel.dates)} dates: {len(trades)} trades")
+    print(trades["exit_reason"].value_counts().to_string())
+    for name, value in result["metrics"].items():
+        print(f"{name}: {value:.4f}")
+    print(f"Equity and exposure written to {args.output}")
+
+if __name__ == "__main__":
+    main()
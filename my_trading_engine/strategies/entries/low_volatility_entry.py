@@ -1,10 +1,7 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils.indicators import Indicators
+from utils.panel import PanelIndicators, diff
 
 class LowVolatilityEntry:
     def __init__(self, atr_period=14, volatility_threshold=0.02, lookback_period=20):
@@ -13,34 +10,60 @@ class LowVolatilityEntry:
         self.volatility_threshold = volatility_threshold
         self.lookback_period = lookback_period
         self.tags = ["mean_reversion", "volatility"]
+        self.required_columns = ['high', 'low', 'close']
+    
+    def indicators(self):
+        """The ATR volatility is measured from"""
+        return [('atr', {'period': self.atr_period})]
     
     def generate_signal(self, df):
         """Generate entry signals when volatility is low"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
         # Add ATR indicator for volatility measurement
-        df = Indicators.add_atr(df, period=self.atr_period)
+        Indicators.compute_atr(df, period=self.atr_period, out=df)
         
         # Calculate normalized ATR (ATR as percentage of price)
         df['ATR_pct'] = df['ATR'] / df['close']
         
-        # Calculate rolling volatility
-        df['rolling_vol'] = df['ATR_pct'].rolling(window=self.lookback_period).mean()
+        # Calculate rolling volatility (shared with any strategy using the same ATR settings)
+        df['rolling_vol'] = Indicators.cached(
+            df, ['high', 'low', 'close'], 'ATR_pct_mean', (self.atr_period, self.lookback_period),
+            lambda: df['ATR_pct'].rolling(window=self.lookback_period).mean().to_numpy()
+        )
         
         # Generate entry signals when volatility is below threshold
         df['low_vol'] = df['rolling_vol'] < self.volatility_threshold
         
         # Only enter when volatility transitions from high to low
-        df['entry_signal'] = df['low_vol'].astype(int).diff().fillna(0)
-        df['entry_long'] = (df['entry_signal'] > 0).astype(int)
+        df['entry_signal'] = df['low_vol'].astype(np.int8).diff().fillna(0)
+        df['entry_long'] = (df['entry_signal'] > 0).astype(np.int8)
         df['entry_short'] = 0  # This strategy only generates long entries
         
         return df
     
-    def get_latest_signal(self, df):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df)
+    def generate_panel_signal(self, panel):
+        """Generate entry signals for every symbol of a Panel in one pass"""
+        atr = PanelIndicators.atr(panel, period=self.atr_period)
+        atr_pct = atr / panel['close']
+        rolling_vol = PanelIndicators.sma(atr_pct, self.lookback_period)
+        
+        # Enter when volatility transitions from high to low
+        low_vol = rolling_vol < self.volatility_threshold
+        entry_signal = diff(low_vol)
+        return {
+            'ATR': atr,
+            'ATR_pct': atr_pct,
+            'rolling_vol': rolling_vol,
+            'low_vol': low_vol,
+            'entry_long': (entry_signal > 0).astype(np.int8),
+            'entry_short': np.zeros(low_vol.shape, dtype=np.int8)
+        }
+    
+    def get_latest_signal(self, df, signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df)
         latest = df.iloc[-1]
         
         return {
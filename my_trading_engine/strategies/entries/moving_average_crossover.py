@@ -1,10 +1,7 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils.indicators import Indicators
+from utils.panel import PanelIndicators, diff
 
 class MovingAverageCrossover:
     def __init__(self, fast_period=20, slow_period=50):
@@ -12,31 +9,57 @@ class MovingAverageCrossover:
         self.fast_period = fast_period
         self.slow_period = slow_period
         self.tags = ["momentum", "trend_following"]
+        self.required_columns = ['close']
+    
+    def indicators(self):
+        """Moving averages read by this strategy, as (name, parameters) pairs"""
+        return [('sma', {'period': self.fast_period}), ('sma', {'period': self.slow_period})]
     
     def generate_signal(self, df):
         """Generate entry signals based on MA crossover"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
         # Add indicators
-        df = Indicators.add_sma(df, period=self.fast_period)
-        df = Indicators.add_sma(df, period=self.slow_period)
+        Indicators.compute_sma(df, period=self.fast_period, out=df)
+        Indicators.compute_sma(df, period=self.slow_period, out=df)
         
         # Calculate crossover
-        df['signal'] = 0
+        df['signal'] = np.zeros(len(df), dtype=np.int8)
         df.loc[df[f'SMA_{self.fast_period}'] > df[f'SMA_{self.slow_period}'], 'signal'] = 1
         df.loc[df[f'SMA_{self.fast_period}'] < df[f'SMA_{self.slow_period}'], 'signal'] = -1
         
         # Generate entry signals on crossover
         df['entry_signal'] = df['signal'].diff().fillna(0)
-        df['entry_long'] = (df['entry_signal'] > 0).astype(int)
-        df['entry_short'] = (df['entry_signal'] < 0).astype(int)
+        df['entry_long'] = (df['entry_signal'] > 0).astype(np.int8)
+        df['entry_short'] = (df['entry_signal'] < 0).astype(np.int8)
         
         return df
     
-    def get_latest_signal(self, df):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df)
+    def generate_panel_signal(self, panel):
+        """Generate entry signals for every symbol of a Panel in one pass"""
+        close = panel['close']
+        fast = PanelIndicators.sma(close, self.fast_period)
+        slow = PanelIndicators.sma(close, self.slow_period)
+        
+        # Calculate crossover
+        signal = np.zeros(close.shape, dtype=np.int8)
+        signal[fast > slow] = 1
+        signal[fast < slow] = -1
+        
+        # Generate entry signals on crossover
+        entry_signal = diff(signal)
+        return {
+            f'SMA_{self.fast_period}': fast,
+            f'SMA_{self.slow_period}': slow,
+            'signal': signal,
+            'entry_long': (entry_signal > 0).astype(np.int8),
+            'entry_short': (entry_signal < 0).astype(np.int8)
+        }
+    
+    def get_latest_signal(self, df, signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df)
         latest = df.iloc[-1]
         
         return {
@@ -1,90 +1,76 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
-import requests
-from datetime import datetime
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from utils.indicators import Indicators
+from utils.fundamentals import FUNDAMENTALS
+from utils.panel import diff
 
 class ValueEntry:
-    def __init__(self, pe_threshold=20, pb_threshold=3):
+    def __init__(self, pe_threshold=20, pb_threshold=3, store=None):
         self.name = "Value Entry"
         self.pe_threshold = pe_threshold
         self.pb_threshold = pb_threshold
         self.tags = ["value", "fundamental"]
-        self.fundamental_data = {}
+        self.required_columns = []
+        # Dated fundamentals shared process-wide, unless a store is given
+        self.store = store if store is not None else FUNDAMENTALS
+    
+    def indicators(self):
+        """None; the signal comes from fundamentals"""
+        return []
+    
+    def prefetch(self, symbols):
+        """Load the fundamentals of many symbols with one read, ahead of generate_signal"""
+        self.store.load(symbols)
     
     def _get_fundamental_data(self, symbol):
-        """Placeholder for getting fundamental data
-        In a real implementation, this would fetch data from a financial API
-        """
-        # This is a simplified mock implementation
-        # In a real scenario, you would use an API like Tiingo Premium, Alpha Vantage, or IEX Cloud
-        # to fetch actual fundamental data
-        
-        # For demonstration purposes, we'll use mock data
-        # In production, replace this with actual API calls
-        
-        # Check if we already have data for this symbol
-        if symbol in self.fundamental_data and (datetime.now() - self.fundamental_data[symbol]['timestamp']).days < 1:
-            return self.fundamental_data[symbol]
-        
-        # Mock data - in production, replace with API call
-        mock_data = {
-            'AAPL': {'pe_ratio': 28.5, 'pb_ratio': 35.2},
-            'XLF': {'pe_ratio': 15.2, 'pb_ratio': 1.8},
-            'SPY': {'pe_ratio': 22.1, 'pb_ratio': 4.2},
-            # Add more symbols as needed
-        }
-        
-        # Default values if symbol not in mock data
-        result = mock_data.get(symbol, {'pe_ratio': 25.0, 'pb_ratio': 3.0})
-        result['timestamp'] = datetime.now()
-        
-        # Cache the result
-        self.fundamental_data[symbol] = result
-        
-        return result
+        """Latest known fundamentals of a symbol"""
+        return self.store.latest(symbol)
     
     def generate_signal(self, df, symbol):
         """Generate entry signals based on value metrics"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
-        # Get fundamental data
-        fundamentals = self._get_fundamental_data(symbol)
-        
-        # Create columns for fundamental data
+        # Fundamentals as known on each bar's date
+        fundamentals = self.store.join(df.index, symbol)
         df['pe_ratio'] = fundamentals['pe_ratio']
         df['pb_ratio'] = fundamentals['pb_ratio']
         
         # Generate entry signals based on value thresholds
-        df['value_signal'] = 0
-        df.loc[(df['pe_ratio'] < self.pe_threshold) & 
-               (df['pb_ratio'] < self.pb_threshold), 'value_signal'] = 1
+        df['value_signal'] = ((df['pe_ratio'] < self.pe_threshold) &
+                              (df['pb_ratio'] < self.pb_threshold)).astype(np.int8)
         
         # Generate entry signals on value crossover
         df['entry_signal'] = df['value_signal'].diff().fillna(0)
-        df['entry_long'] = (df['entry_signal'] > 0).astype(int)
+        df['entry_long'] = (df['entry_signal'] > 0).astype(np.int8)
         df['entry_short'] = 0  # This strategy only generates long entries
         
         return df
     
-    def get_latest_signal(self, df, symbol):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df, symbol)
+    def generate_panel_signal(self, panel):
+        """Generate entry signals for every symbol of a Panel in one pass"""
+        fundamentals = self.store.join_panel(panel)
+        value_signal = ((fundamentals['pe_ratio'] < self.pe_threshold) &
+                        (fundamentals['pb_ratio'] < self.pb_threshold) & panel.mask).astype(np.int8)
+        entry_signal = diff(value_signal)
+        return {
+            'pe_ratio': fundamentals['pe_ratio'],
+            'pb_ratio': fundamentals['pb_ratio'],
+            'value_signal': value_signal,
+            'entry_long': (entry_signal > 0).astype(np.int8),
+            'entry_short': np.zeros(panel.shape, dtype=np.int8)
+        }
+    
+    def get_latest_signal(self, df, symbol, signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df, symbol)
         latest = df.iloc[-1]
         
-        fundamentals = self._get_fundamental_data(symbol)
-        
         return {
             "entry_long": bool(latest['entry_long']),
             "entry_short": bool(latest['entry_short']),
             "current_position": int(latest['value_signal']),
             "indicators": {
-                "pe_ratio": fundamentals['pe_ratio'],
-                "pb_ratio": fundamentals['pb_ratio']
+                "pe_ratio": latest['pe_ratio'],
+                "pb_ratio": latest['pb_ratio']
             }
-        }
\ No newline at end of file
+        }
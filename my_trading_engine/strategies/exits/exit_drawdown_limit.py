@@ -1,21 +1,24 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils.stats import compute_drawdown
+from utils.indicators import Indicators
+from utils.panel import PanelIndicators
 
 class ExitDrawdownLimit:
     def __init__(self, max_drawdown=-0.05):
         self.name = "Drawdown Limit Exit"
         self.max_drawdown = max_drawdown  # -0.05 means 5% drawdown
         self.tags = ["risk_management", "position_management"]
+        self.required_columns = ['close']
+    
+    def indicators(self):
+        """None; running highs and lows are computed here"""
+        return []
     
     def generate_signal(self, df, entry_price=None):
         """Generate exit signals based on maximum drawdown threshold"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
         if entry_price is not None:
             # Calculate drawdown from entry price
@@ -23,26 +26,49 @@ class ExitDrawdownLimit:
             df['drawdown_from_entry'] = (df['close'] / entry_price) - 1
             
             # Generate exit signals when drawdown exceeds threshold
-            df['exit_long'] = (df['drawdown_from_entry'] <= self.max_drawdown).astype(int)
-            df['exit_short'] = (df['drawdown_from_entry'] >= -self.max_drawdown).astype(int)
+            df['exit_long'] = (df['drawdown_from_entry'] <= self.max_drawdown).astype(np.int8)
+            df['exit_short'] = (df['drawdown_from_entry'] >= -self.max_drawdown).astype(np.int8)
         else:
             # Calculate rolling drawdown if no entry price is provided
-            df['cum_max'] = df['close'].cummax()
-            df['cum_min'] = df['close'].cummin()
+            df['cum_max'] = Indicators.cached(df, ['close'], 'cummax', (), lambda: df['close'].cummax().to_numpy())
+            df['cum_min'] = Indicators.cached(df, ['close'], 'cummin', (), lambda: df['close'].cummin().to_numpy())
             
             # Calculate drawdown for long and short positions
             df['drawdown_long'] = (df['close'] / df['cum_max']) - 1
             df['drawdown_short'] = (df['close'] / df['cum_min']) - 1
             
             # Generate exit signals when drawdown exceeds threshold
-            df['exit_long'] = (df['drawdown_long'] <= self.max_drawdown).astype(int)
-            df['exit_short'] = (df['drawdown_short'] >= -self.max_drawdown).astype(int)
+            df['exit_long'] = (df['drawdown_long'] <= self.max_drawdown).astype(np.int8)
+            df['exit_short'] = (df['drawdown_short'] >= -self.max_drawdown).astype(np.int8)
         
         return df
     
-    def get_latest_signal(self, df, position_type="long", entry_price=None):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df, entry_price)
+    def generate_panel_signal(self, panel, entry_price=None):
+        """Generate exit signals for every symbol of a Panel in one pass
+        
+        entry_price may be a scalar or one price per symbol.
+        """
+        close = panel['close']
+        if entry_price is not None:
+            drawdown = close / np.asarray(entry_price, dtype=float) - 1
+            return {
+                'drawdown_from_entry': drawdown,
+                'exit_long': (drawdown <= self.max_drawdown).astype(np.int8),
+                'exit_short': (drawdown >= -self.max_drawdown).astype(np.int8)
+            }
+        
+        drawdown_long = close / PanelIndicators.cummax(close) - 1
+        drawdown_short = close / PanelIndicators.cummin(close) - 1
+        return {
+            'drawdown_long': drawdown_long,
+            'drawdown_short': drawdown_short,
+            'exit_long': (drawdown_long <= self.max_drawdown).astype(np.int8),
+            'exit_short': (drawdown_short >= -self.max_drawdown).astype(np.int8)
+        }
+    
+    def get_latest_signal(self, df, position_type="long", entry_price=None, signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df, entry_price)
         latest = df.iloc[-1]
         
         if position_type.lower() == "long":
@@ -1,10 +1,7 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils.indicators import Indicators
+from utils.panel import PanelIndicators, shift
 
 class ExitMACDCross:
     def __init__(self, fast=12, slow=26, signal=9):
@@ -13,14 +10,19 @@ class ExitMACDCross:
         self.slow = slow
         self.signal = signal
         self.tags = ["momentum", "trend_following"]
+        self.required_columns = ['close']
+    
+    def indicators(self):
+        """MACD lines read by this exit"""
+        return [('macd', {'fast': self.fast, 'slow': self.slow, 'signal': self.signal})]
     
     def generate_signal(self, df):
         """Generate exit signals based on MACD crossing signal line"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
         # Add MACD indicator
-        df = Indicators.add_macd(df, fast=self.fast, slow=self.slow, signal=self.signal)
+        Indicators.compute_macd(df, fast=self.fast, slow=self.slow, signal=self.signal, out=df)
         
         # Previous values for crossover detection
         df['prev_MACD'] = df['MACD'].shift(1)
@@ -29,17 +31,29 @@ class ExitMACDCross:
         # Generate exit signals
         # For long positions: exit when MACD crosses below signal line
         df['exit_long'] = ((df['prev_MACD'] > df['prev_MACD_signal']) & 
-                          (df['MACD'] < df['MACD_signal'])).astype(int)
+                          (df['MACD'] < df['MACD_signal'])).astype(np.int8)
         
         # For short positions: exit when MACD crosses above signal line
         df['exit_short'] = ((df['prev_MACD'] < df['prev_MACD_signal']) & 
-                           (df['MACD'] > df['MACD_signal'])).astype(int)
+                           (df['MACD'] > df['MACD_signal'])).astype(np.int8)
         
         return df
     
-    def get_latest_signal(self, df, position_type="long"):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df)
+    def generate_panel_signal(self, panel):
+        """Generate exit signals for every symbol of a Panel in one pass"""
+        macd, macd_signal, macd_hist = PanelIndicators.macd(panel['close'], self.fast, self.slow, self.signal)
+        prev_macd, prev_macd_signal = shift(macd), shift(macd_signal)
+        return {
+            'MACD': macd,
+            'MACD_signal': macd_signal,
+            'MACD_hist': macd_hist,
+            'exit_long': ((prev_macd > prev_macd_signal) & (macd < macd_signal)).astype(np.int8),
+            'exit_short': ((prev_macd < prev_macd_signal) & (macd > macd_signal)).astype(np.int8)
+        }
+    
+    def get_latest_signal(self, df, position_type="long", signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df)
         latest = df.iloc[-1]
         
         if position_type.lower() == "long":
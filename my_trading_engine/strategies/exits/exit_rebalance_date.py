@@ -1,67 +1,54 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
 from datetime import datetime
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.indicators import Indicators
+from utils.rebalance_calendar import rebalance_days, parse_dates
 
 class ExitRebalanceDate:
     def __init__(self, rebalance_freq='monthly', specific_dates=None):
         self.name = "Rebalance Date Exit"
-        self.rebalance_freq = rebalance_freq.lower()  # 'monthly', 'quarterly', 'yearly'
+        self.rebalance_freq = rebalance_freq.lower()  # 'weekly', 'monthly', 'quarterly', 'yearly'
         self.specific_dates = specific_dates  # List of specific dates for rebalancing
+        self._specific_days = parse_dates(specific_dates)  # Parsed once, sorted
         self.tags = ["portfolio_management", "systematic"]
+        self.required_columns = []
     
-    def _is_rebalance_date(self, date):
-        """Check if the given date is a rebalance date"""
-        # If specific dates are provided, check against those
-        if self.specific_dates is not None:
-            for rebal_date in self.specific_dates:
-                if isinstance(rebal_date, str):
-                    rebal_date = pd.Timestamp(rebal_date)
-                if date.date() == rebal_date.date():
-                    return True
-            return False
-        
-        # Otherwise, use frequency-based rebalancing
-        if self.rebalance_freq == 'monthly':
-            # Last trading day of the month
-            next_month = date.replace(day=28) + pd.DateOffset(days=4)
-            last_day = next_month - pd.DateOffset(days=next_month.day)
-            return date.date() == last_day.date()
-        
-        elif self.rebalance_freq == 'quarterly':
-            # Last trading day of the quarter
-            if date.month in [3, 6, 9, 12] and date.day >= 28:
-                next_month = date.replace(day=28) + pd.DateOffset(days=4)
-                last_day = next_month - pd.DateOffset(days=next_month.day)
-                return date.date() == last_day.date()
-            return False
-        
-        elif self.rebalance_freq == 'yearly':
-            # Last trading day of the year
-            return date.month == 12 and date.day >= 28 and date.day == date.days_in_month
-        
-        return False
+    def indicators(self):
+        """None; exits depend only on the calendar"""
+        return []
+    
+    def rebalance_days(self, df):
+        """Rebalance flags for the bars of df, computed once per distinct index"""
+        specific = self._specific_days
+        params = (self.rebalance_freq, None if specific is None else tuple(specific.astype(np.int64)))
+        return Indicators.cached(df, [], 'rebalance_days', params,
+                                 lambda: rebalance_days(df.index, self.rebalance_freq, specific))
     
     def generate_signal(self, df):
         """Generate exit signals based on rebalance dates"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
-        # Check each date for rebalancing
-        df['rebalance_day'] = df.index.map(self._is_rebalance_date)
+        # Rebalance calendar for the whole index in one pass
+        df['rebalance_day'] = self.rebalance_days(df)
         
         # Generate exit signals on rebalance days
-        df['exit_long'] = df['rebalance_day'].astype(int)
-        df['exit_short'] = df['rebalance_day'].astype(int)
+        df['exit_long'] = df['rebalance_day'].astype(np.int8)
+        df['exit_short'] = df['rebalance_day'].astype(np.int8)
         
         return df
     
-    def get_latest_signal(self, df, position_type="long"):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df)
+    def generate_panel_signal(self, panel):
+        """Exit signals for every symbol of a Panel from the shared calendar"""
+        rebalance = rebalance_days(panel.dates, self.rebalance_freq, self._specific_days)
+        signal = np.broadcast_to(rebalance[:, None], panel.shape).astype(np.int8)
+        # Symbols without a bar on a date get no signal
+        signal[~panel.mask] = 0
+        return {'rebalance_day': signal.astype(bool), 'exit_long': signal, 'exit_short': signal.copy()}
+    
+    def get_latest_signal(self, df, position_type="long", signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df)
         latest = df.iloc[-1]
         
         exit_signal = bool(latest['rebalance_day'])
@@ -72,10 +59,11 @@ class ExitRebalanceDate:
         
         if self.specific_dates is not None:
             # Find the next specific rebalance date
-            future_dates = [d for d in self.specific_dates if pd.Timestamp(d) > today]
-            if future_dates:
-                next_date = min(future_dates)
-                days_to_rebalance = (pd.Timestamp(next_date) - today).days
+            # Sorted, so the next date is the first one after today
+            today_day = today.to_datetime64().astype('datetime64[D]')
+            future_dates = self._specific_days[self._specific_days > today_day]
+            if len(future_dates):
+                days_to_rebalance = int((future_dates[0] - today_day) / np.timedelta64(1, 'D'))
         else:
             # Estimate based on frequency (simplified)
             if self.rebalance_freq == 'monthly':
@@ -90,6 +78,8 @@ class ExitRebalanceDate:
             elif self.rebalance_freq == 'yearly':
                 year_end = pd.Timestamp(today.year, 12, 31)
                 days_to_rebalance = (year_end - today).days
+            elif self.rebalance_freq == 'weekly':
+                days_to_rebalance = (4 - today.weekday()) % 7
         
         return {
             "exit_signal": exit_signal,
@@ -1,10 +1,7 @@
 import pandas as pd
 import numpy as np
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from utils.indicators import Indicators
+from utils.panel import PanelIndicators
 
 class ExitTrailingStop:
     def __init__(self, atr_period=14, atr_multiplier=2.0):
@@ -12,33 +9,56 @@ class ExitTrailingStop:
         self.atr_period = atr_period
         self.atr_multiplier = atr_multiplier
         self.tags = ["risk_management", "trend_following"]
+        self.required_columns = ['high', 'low', 'close']
+    
+    def indicators(self):
+        """The ATR the stop distance is built from"""
+        return [('atr', {'period': self.atr_period})]
     
     def generate_signal(self, df, entry_price=None):
         """Generate exit signals based on trailing stop"""
-        # Make a copy to avoid modifying the original
-        df = df.copy()
+        # Shallow copy: new columns don't touch the original and the input data isn't duplicated
+        df = df.copy(deep=False)
         
         # Add ATR indicator
-        df = Indicators.add_atr(df, period=self.atr_period)
+        Indicators.compute_atr(df, period=self.atr_period, out=df)
         
         # Calculate trailing stop levels
         df['stop_distance'] = df['ATR'] * self.atr_multiplier
         
         # For long positions
-        df['trailing_stop_long'] = df['close'].rolling(window=len(df), min_periods=1).max() - df['stop_distance']
+        df['trailing_stop_long'] = Indicators.cached(
+            df, ['close'], 'cummax', (), lambda: df['close'].cummax().to_numpy()
+        ) - df['stop_distance']
         
         # For short positions
-        df['trailing_stop_short'] = df['close'].rolling(window=len(df), min_periods=1).min() + df['stop_distance']
+        df['trailing_stop_short'] = Indicators.cached(
+            df, ['close'], 'cummin', (), lambda: df['close'].cummin().to_numpy()
+        ) + df['stop_distance']
         
         # Generate exit signals
-        df['exit_long'] = (df['close'] < df['trailing_stop_long']).astype(int)
-        df['exit_short'] = (df['close'] > df['trailing_stop_short']).astype(int)
+        df['exit_long'] = (df['close'] < df['trailing_stop_long']).astype(np.int8)
+        df['exit_short'] = (df['close'] > df['trailing_stop_short']).astype(np.int8)
         
         return df
     
-    def get_latest_signal(self, df, position_type="long", entry_price=None):
-        """Get the latest signal from the dataframe"""
-        df = self.generate_signal(df, entry_price)
+    def generate_panel_signal(self, panel):
+        """Generate exit signals for every symbol of a Panel in one pass"""
+        close = panel['close']
+        stop_distance = PanelIndicators.atr(panel, period=self.atr_period) * self.atr_multiplier
+        trailing_stop_long = PanelIndicators.cummax(close) - stop_distance
+        trailing_stop_short = PanelIndicators.cummin(close) + stop_distance
+        return {
+            'stop_distance': stop_distance,
+            'trailing_stop_long': trailing_stop_long,
+            'trailing_stop_short': trailing_stop_short,
+            'exit_long': (close < trailing_stop_long).astype(np.int8),
+            'exit_short': (close > trailing_stop_short).astype(np.int8)
+        }
+    
+    def get_latest_signal(self, df, position_type="long", entry_price=None, signals=None):
+        """Get the latest signal from the dataframe, or from signals already generated for it"""
+        df = signals if signals is not None else self.generate_signal(df, entry_price)
         latest = df.iloc[-1]
         
         if position_type.lower() == "long":
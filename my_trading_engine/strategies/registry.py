@@ -0,0 +1,106 @@
+import ast
+import importlib
+import json
+import os
+import re
+
+STRATEGIES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Registry kind -> package (folder) the strategies of that kind live in
+KINDS = {"entry": "entries", "exit": "exits"}
+
+# Commas separating parameters, as opposed to commas inside a JSON list value
+PARAM_SEPARATOR = re.compile(r",(?=\s*[A-Za-z_]\w*\s*=)")
+
+
+class StrategyRegistry:
+    """Entry and exit strategies by name, imported only when one is used
+
+    Discovery reads the source of strategies/entries and strategies/exits
+    for classes with a generate_signal method, without importing them, so
+    listing or resolving names costs no pandas (or other strategy
+    dependency) import. A strategy is known by its class name and by its
+    module name (MovingAverageCrossover or moving_average_crossover).
+    Strategies living elsewhere are added with register().
+    """
+
+    def __init__(self, directory=STRATEGIES_DIR):
+        self.directory = directory
+        self._targets = None  # {kind: {name: (module, class name)}}
+        self._aliases = {kind: {} for kind in KINDS}
+        self._classes = {}
+
+    def _discover(self):
+        if self._targets is not None:
+            return
+        targets = {kind: {} for kind in KINDS}
+        for kind, package in KINDS.items():
+            folder = os.path.join(self.directory, package)
+            for filename in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+                if not filename.endswith('.py') or filename.startswith('_'):
+                    continue
+                stem = filename[:-3]
+                module = f"strategies.{package}.{stem}"
+                with open(os.path.join(folder, filename)) as f:
+                    tree = ast.parse(f.read(), filename)
+                classes = [node.name for node in tree.body if isinstance(node, ast.ClassDef) and any(
+                    isinstance(item, ast.FunctionDef) and item.name == 'generate_signal' for item in node.body)]
+                for name in classes:
+                    targets[kind][name] = (module, name)
+                if len(classes) == 1:
+                    self._aliases[kind][stem] = classes[0]
+        self._targets = targets
+
+    def register(self, kind, name, target):
+        """Add a strategy: a class, or "package.module:ClassName" to import when first used"""
+        self._discover()
+        if isinstance(target, str):
+            module, _, class_name = target.partition(':')
+            self._targets[kind][name] = (module, class_name)
+        else:
+            self._targets[kind][name] = (target.__module__, target.__name__)
+            self._classes[(kind, name)] = target
+
+    def names(self, kind):
+        """Registered names of a kind ("entry" or "exit"), sorted"""
+        self._discover()
+        return sorted(self._targets[kind])
+
+    def get(self, kind, name):
+        """The strategy class registered under name, importing its module on first use"""
+        self._discover()
+        name = self._aliases[kind].get(name, name)
+        if name not in self._targets[kind]:
+            raise ValueError(f"Unknown {kind} strategy {name}; choose from {', '.join(self.names(kind))}")
+        if (kind, name) not in self._classes:
+            module, class_name = self._targets[kind][name]
+            self._classes[(kind, name)] = getattr(importlib.import_module(module), class_name)
+        return self._classes[(kind, name)]
+
+    def create(self, kind, spec):
+        """Instantiate a strategy from a "Name" or "Name:param=value,param=value" spec"""
+        name, params = parse_spec(spec)
+        return self.get(kind, name)(**params)
+
+
+def parse_spec(spec):
+    """Split "Name:fast_period=10,slow_period=30" into (name, {param: value})
+
+    Values are read as JSON where they parse (numbers, true/false, lists) and
+    kept as strings otherwise, so rebalance_freq=quarterly needs no quotes.
+    """
+    name, _, text = spec.partition(':')
+    params = {}
+    for item in PARAM_SEPARATOR.split(text) if text.strip() else []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Expected param=value in {spec!r}, got {item!r}")
+        try:
+            params[key.strip()] = json.loads(value)
+        except ValueError:
+            params[key.strip()] = value.strip()
+    return name.strip(), params
+
+
+# Process-wide registry of the strategies under strategies/
+REGISTRY = StrategyRegistry()
@@ -0,0 +1,181 @@
+import pandas as pd
+import numpy as np
+
+def simulate_trades(entry_long, entry_short, exit_long, exit_short):
+    """Resolve entry/exit signals into trades
+
+    Signals on bar i are filled on bar i + 1. While flat, a long entry takes
+    precedence over a short entry; while in a position, only the exit signal
+    for that side is considered. Rather than walking every bar, this jumps
+    from one fill to the next with binary searches over the signal bars, so
+    the cost scales with the number of trades.
+
+    Returns (entry_bars, exit_bars, sides) as arrays; exit_bars is -1 for a
+    position still open on the last bar.
+    """
+    n = len(entry_long)
+    entry_long = np.asarray(entry_long) == 1
+    entry_short = np.asarray(entry_short) == 1
+
+    # Signal bars that can produce a fill (the last bar has no next bar)
+    entry_bars = np.flatnonzero((entry_long | entry_short)[:n - 1])
+    exit_bars = {
+        1: np.flatnonzero((np.asarray(exit_long) == 1)[:n - 1]),
+        -1: np.flatnonzero((np.asarray(exit_short) == 1)[:n - 1]),
+    }
+
+    entries, exits, sides = [], [], []
+    earliest = 0  # First signal bar allowed to open the next trade
+    while True:
+        j = np.searchsorted(entry_bars, earliest)
+        if j == len(entry_bars):
+            break
+        signal_bar = entry_bars[j]
+        side = 1 if entry_long[signal_bar] else -1
+        fill = signal_bar + 1
+
+        # The exit check starts with the signal on the fill bar itself
+        candidates = exit_bars[side]
+        k = np.searchsorted(candidates, fill)
+        entries.append(fill)
+        sides.append(side)
+        if k == len(candidates):
+            exits.append(-1)
+            break
+        exit_fill = candidates[k] + 1
+        exits.append(exit_fill)
+        earliest = exit_fill
+
+    return (np.array(entries, dtype=np.int64),
+            np.array(exits, dtype=np.int64),
+            np.array(sides, dtype=np.int64))
+
+
+def backtest_signals(df, initial_capital=10000):
+    """Backtest a frame that already holds entry_long/entry_short/exit_long/exit_short columns
+
+    Entries and exits fill at the next bar's open. Adds the position,
+    entry_price, exit_price, trade_return, equity, cum_return, equity_peak and
+    drawdown columns and returns (df, trades).
+    """
+    df = df.copy()
+    n = len(df)
+    open_prices = df['open'].to_numpy(dtype=float)
+
+    entries, exits, sides = simulate_trades(
+        df['entry_long'].to_numpy(), df['entry_short'].to_numpy(),
+        df['exit_long'].to_numpy(), df['exit_short'].to_numpy()
+    )
+    closed = exits >= 0
+
+    # Position is +/-1 from the entry bar up to (not including) the exit bar
+    delta = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(delta, entries, sides)
+    np.add.at(delta, np.where(closed, exits, n), -sides)
+    position = np.cumsum(delta[:n])
+
+    entry_prices = open_prices[entries]
+    exit_prices = np.full(len(entries), np.nan)
+    exit_prices[closed] = open_prices[exits[closed]]
+    trade_returns = np.where(sides == 1, exit_prices / entry_prices - 1, 1 - exit_prices / entry_prices)
+
+    entry_price = np.zeros(n)
+    entry_price[entries] = entry_prices
+    exit_price = np.zeros(n)
+    exit_price[exits[closed]] = exit_prices[closed]
+    trade_return = np.zeros(n)
+    trade_return[exits[closed]] = trade_returns[closed]
+
+    # Compound trade returns in bar order, starting from the initial capital
+    growth = 1 + trade_return
+    growth[0] = initial_capital
+    equity = np.cumprod(growth)
+
+    df['position'] = position
+    df['entry_price'] = entry_price
+    df['exit_price'] = exit_price
+    df['trade_return'] = trade_return
+    df['equity'] = equity
+    df['cum_return'] = df['equity'] / initial_capital - 1
+    df['equity_peak'] = df['equity'].cummax()
+    df['drawdown'] = (df['equity'] / df['equity_peak']) - 1
+
+    exit_index = np.where(closed, exits, 0)
+    trades = pd.DataFrame({
+        'entry_date': df.index[entries],
+        'exit_date': df.index[exit_index].where(closed, pd.NaT),
+        'side': np.where(sides == 1, 'long', 'short'),
+        'entry_price': entry_prices,
+        'exit_price': exit_prices,
+        'return': trade_returns,
+        'bars_held': np.where(closed, exits - entries, n - entries),
+    })
+
+    return df, trades
+
+
+def backtest_strategy(symbol_data, entry_strategy, exit_strategy, initial_capital=10000, return_trades=False):
+    """Backtest an entry/exit strategy pair on a single symbol
+
+    Gives the same columns and values as the bar-by-bar loop the notebook used,
+    computed with array operations. Returns the result frame, or
+    (frame, trades) when return_trades is set.
+    """
+    # Generate entry signals
+    df = entry_strategy.generate_signal(symbol_data)
+
+    # Generate exit signals
+    df = exit_strategy.generate_signal(df)
+
+    df, trades = backtest_signals(df, initial_capital=initial_capital)
+
+    if return_trades:
+        return df, trades
+    return df
+
+
+def trade_bar_returns(open_prices, entry_long, entry_short, exit_long, exit_short):
+    """Per-bar and per-trade returns of a backtest straight from signal arrays
+
+    Same fills and compounding as backtest_signals without building a frame:
+    each closed trade's return is booked on its exit bar. Returns
+    (bar_returns, trade_returns); trades still open on the last bar are left out.
+    """
+    open_prices = np.asarray(open_prices, dtype=float)
+    n = len(open_prices)
+    entries, exits, sides = simulate_trades(entry_long, entry_short, exit_long, exit_short)
+    closed = exits >= 0
+    exits = exits[closed]
+
+    entry_prices = open_prices[entries[closed]]
+    exit_prices = open_prices[exits]
+    trade_returns = np.where(sides[closed] == 1, exit_prices / entry_prices - 1, 1 - exit_prices / entry_prices)
+
+    bar_returns = np.zeros(n)
+    bar_returns[exits] = trade_returns
+    return bar_returns, trade_returns
+
+
+def returns_metrics(bar_returns, trade_returns, periods_per_year=252):
+    """Summary metrics of the bar and trade returns from trade_bar_returns"""
+    n = len(bar_returns)
+    equity = np.cumprod(1 + bar_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if n else np.zeros(0)
+
+    std = bar_returns.std(ddof=1) if n > 1 else 0.0
+    return {
+        "total_return": equity[-1] - 1 if n else 0.0,
+        "max_drawdown": drawdown.min() if n else 0.0,
+        "sharpe": bar_returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan,
+        "trades": len(trade_returns),
+        "win_rate": float((trade_returns > 0).mean()) if len(trade_returns) else np.nan,
+    }
+
+
+def backtest_metrics(open_prices, entry_long, entry_short, exit_long, exit_short, periods_per_year=252):
+    """Summary metrics of a backtest straight from signal arrays
+
+    For sweeps that evaluate thousands of parameter combinations.
+    """
+    bar_returns, trade_returns = trade_bar_returns(open_prices, entry_long, entry_short, exit_long, exit_short)
+    return returns_metrics(bar_returns, trade_returns, periods_per_year)
@@ -0,0 +1,200 @@
+import json
+import os
+import pandas as pd
+from datetime import datetime, timedelta
+from utils.bars import INTRADAY_TIMEFRAMES, write_bars
+from utils.files import write_atomic
+
+class BarCache:
+    """Local on-disk cache of historical bars.
+
+    Bars are stored one Parquet file per symbol under
+    ``<cache_dir>/<source>/<timeframe>/``, with a small JSON sidecar recording
+    the date range the file covers. Requests only fetch the head/tail ranges
+    that are missing and merge them into the stored bars. Intraday files are
+    written in row groups of days_per_row_group whole trading days.
+    """
+
+    def __init__(self, cache_dir="../cache/bars", max_size_mb=None, max_age_days=None, days_per_row_group=20):
+        self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+        self.max_age_days = max_age_days
+        self.days_per_row_group = days_per_row_group
+
+    def _paths(self, source, timeframe, symbol):
+        """Return the (data, metadata) file paths for a cache entry"""
+        base = os.path.join(self.cache_dir, source, timeframe, symbol.upper())
+        return base + ".parquet", base + ".json"
+
+    def _read_meta(self, meta_path):
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, source, timeframe, symbol):
+        """Load the cached bars and metadata for a symbol, or (None, None)"""
+        data_path, meta_path = self._paths(source, timeframe, symbol)
+        meta = self._read_meta(meta_path)
+        if meta is None or not os.path.exists(data_path):
+            return None, None
+        try:
+            df = pd.read_parquet(data_path)
+        except Exception:
+            # Treat unreadable files as a cache miss
+            return None, None
+        return df, meta
+
+    def store(self, source, timeframe, symbol, df, start, end):
+        """Store bars covering the date range [start, end]"""
+        data_path, meta_path = self._paths(source, timeframe, symbol)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+        if timeframe in INTRADAY_TIMEFRAMES:
+            write_atomic(data_path, lambda p: write_bars(df, p, self.days_per_row_group))
+        else:
+            write_atomic(data_path, lambda p: df.to_parquet(p))
+
+        now = datetime.now().isoformat()
+        meta = {
+            "symbol": symbol.upper(),
+            "source": source,
+            "timeframe": timeframe,
+            "start": start,
+            "end": end,
+            "rows": len(df),
+            "bytes": os.path.getsize(data_path),
+            "fetched_at": now,
+            "last_access": now,
+        }
+        write_atomic(meta_path, lambda p: self._dump_json(meta, p))
+        return meta
+
+    def _dump_json(self, data, path):
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def _touch(self, source, timeframe, symbol, meta):
+        """Record an access for LRU eviction"""
+        _, meta_path = self._paths(source, timeframe, symbol)
+        meta["last_access"] = datetime.now().isoformat()
+        write_atomic(meta_path, lambda p: self._dump_json(meta, p))
+
+    def get(self, source, timeframe, symbol, start_date, end_date, fetch, force_refresh=False):
+        """Return bars for [start_date, end_date], fetching only what is missing
+
+        ``fetch(start, end)`` must return a DataFrame indexed by date (empty on
+        failure). Dates are ``YYYY-MM-DD`` strings.
+        """
+        cached, meta = (None, None) if force_refresh else self.load(source, timeframe, symbol)
+
+        if cached is None:
+            df = fetch(start_date, end_date)
+            if not df.empty:
+                self.store(source, timeframe, symbol, df, start_date, _last_date(df, start_date))
+            return df
+
+        covered_start, covered_end = meta["start"], meta["end"]
+        parts = [cached]
+
+        # Missing head of the range
+        if start_date < covered_start:
+            head = fetch(start_date, _shift_date(covered_start, -1))
+            if not head.empty:
+                parts.insert(0, head)
+            covered_start = start_date
+
+        # Missing tail of the range; re-fetch the last cached bar so adjustments can be detected
+        if end_date > covered_end:
+            tail = fetch(covered_end, end_date)
+            if not tail.empty:
+                if _adjustments_changed(cached, tail):
+                    # Dividends or splits rewrote adjusted history: refetch everything
+                    return self.get(source, timeframe, symbol,
+                                    min(start_date, meta["start"]), end_date,
+                                    fetch, force_refresh=True).loc[start_date:end_date]
+                parts.append(tail)
+                covered_end = max(covered_end, _last_date(tail, covered_end))
+
+        if len(parts) > 1:
+            merged = pd.concat(parts)
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            self.store(source, timeframe, symbol, merged, covered_start, covered_end)
+        else:
+            merged = cached
+            self._touch(source, timeframe, symbol, meta)
+
+        return merged.loc[start_date:end_date]
+
+    def entries(self):
+        """List metadata for every cache entry"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    meta = self._read_meta(os.path.join(root, name))
+                    if meta is not None:
+                        entries.append(meta)
+        return entries
+
+    def remove(self, source, timeframe, symbol):
+        """Remove a single cache entry"""
+        for path in self._paths(source, timeframe, symbol):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear(self):
+        """Remove every cache entry"""
+        for meta in self.entries():
+            self.remove(meta["source"], meta["timeframe"], meta["symbol"])
+
+    def evict(self):
+        """Evict entries older than max_age_days, then least recently used ones above max_size_mb"""
+        entries = sorted(self.entries(), key=lambda m: m["last_access"])
+        removed = 0
+
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            while entries and entries[0]["last_access"] < cutoff:
+                meta = entries.pop(0)
+                self.remove(meta["source"], meta["timeframe"], meta["symbol"])
+                removed += 1
+
+        if self.max_size_mb is not None:
+            max_bytes = self.max_size_mb * 1024 * 1024
+            total = sum(m["bytes"] for m in entries)
+            while entries and total > max_bytes:
+                meta = entries.pop(0)
+                self.remove(meta["source"], meta["timeframe"], meta["symbol"])
+                total -= meta["bytes"]
+                removed += 1
+
+        return removed
+
+
+def _shift_date(date, days):
+    return (pd.Timestamp(date) + pd.Timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def _last_date(df, default):
+    """Date of the last bar in df, or default if it has none"""
+    if df.empty:
+        return default
+    return df.index.max().strftime("%Y-%m-%d")
+
+
+def _adjustments_changed(cached, tail, column='adj_close', tolerance=1e-9):
+    """Check whether the bars overlapping the cache disagree on adjusted prices"""
+    if column not in cached.columns or column not in tail.columns:
+        return False
+    overlap = cached.index.intersection(tail.index)
+    if overlap.empty:
+        return False
+    old = cached.loc[overlap, column].astype(float)
+    new = tail.loc[overlap, column].astype(float)
+    return bool(((old - new).abs() > tolerance * old.abs().clip(lower=1)).any())
@@ -0,0 +1,225 @@
+import threading
+import pandas as pd
+import numpy as np
+from utils.indicator_cache import data_fingerprint
+
+# Timeframes stored as bars of their own
+INTRADAY_TIMEFRAMES = ("hourly", "minute")
+
+# Timeframes built on demand from a finer stored timeframe: (base timeframe, bar length)
+RESAMPLED_TIMEFRAMES = {
+    "5min": ("minute", pd.Timedelta(minutes=5)),
+    "15min": ("minute", pd.Timedelta(minutes=15)),
+    "30min": ("minute", pd.Timedelta(minutes=30)),
+}
+
+# Intraday bins start on the half hour, so hourly bars line up with the 9:30 ET open
+# in both EST (14:30 UTC) and EDT (13:30 UTC)
+BIN_ORIGIN = pd.Timedelta(minutes=30)
+
+# How each bar column is aggregated into a longer bar
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+# Accuracy of indicators computed from float32 prices (select_bars with compact), against
+# the same indicators from float64 prices. Indicators still compute in float64; the
+# error is float32 rounding of the inputs (about 6e-8 of the price). Relative error,
+# except RSI in RSI points; measured at about half these bounds on 30 years of daily bars.
+# Crossover signals can differ on bars where the two lines are closer than this.
+FLOAT32_TOLERANCE = {
+    "sma": 1e-7, "ema": 1e-7, "macd": 1e-7, "bollinger_bands": 1e-7,  # relative to the price
+    "atr": 1e-5,  # ranges are differences of prices, so lose more relative precision
+    "rsi": 1e-3,
+}
+
+
+def base_timeframe(timeframe):
+    """The timeframe a request is loaded as, before any resampling"""
+    if timeframe in RESAMPLED_TIMEFRAMES:
+        return RESAMPLED_TIMEFRAMES[timeframe][0]
+    return timeframe
+
+
+def compact_bars(df):
+    """OHLCV bars as float32 prices and int32 volume
+
+    adj_* columns identical to their raw column (intraday bars are never
+    adjusted) are dropped along with any other vendor columns, which with the
+    narrower dtypes cuts an intraday frame to about a fifth of its size.
+    Volume stays int64 if a bar's volume does not fit in int32.
+    """
+    columns = {}
+    for column in df.columns:
+        field = column[4:] if column.startswith('adj_') else column
+        if field not in AGGREGATIONS:
+            continue
+        values = df[column].to_numpy()
+        if field != column and field in df.columns and np.array_equal(values, df[field].to_numpy(), equal_nan=True):
+            continue
+        if field == 'volume':
+            values = np.nan_to_num(values.astype(np.float64)).round()
+            dtype = np.int32 if len(values) == 0 or values.max() <= np.iinfo(np.int32).max else np.int64
+            columns[column] = values.astype(dtype)
+        else:
+            columns[column] = values.astype(np.float32)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def select_bars(df, columns=None, adjusted=False, compact=False):
+    """Reduce a bar frame to what the strategies read
+
+    With adjusted, the adj_* prices (where present) replace the raw ones
+    under the plain open/high/low/close/volume names, so the choice is made
+    once here rather than by each strategy. columns keeps only those fields
+    (after the adjusted choice); compact narrows them to float32 prices and
+    int32 volume, within FLOAT32_TOLERANCE for the indicators.
+    """
+    if adjusted:
+        df = df.rename(columns={f'adj_{f}': f for f in AGGREGATIONS if f'adj_{f}' in df.columns})
+        df = df.loc[:, ~df.columns.duplicated(keep='last')]
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    if compact:
+        df = compact_bars(df)
+    return df
+
+
+class IndexPool:
+    """Hands out one DatetimeIndex per distinct calendar
+
+    Frames built on the same dates then share a single int64 date array
+    instead of each holding a copy, and frames sharing an index object are
+    recognised as one calendar without comparing dates. Safe to use from the
+    fetch threads.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def share(self, df):
+        """df with its index replaced by the pooled index of the same dates"""
+        key = data_fingerprint(df, [])
+        with self._lock:
+            index = self._indexes.setdefault(key, df.index)
+        if index is df.index:
+            return df
+        df = df.copy(deep=False)
+        df.index = index
+        return df
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+def day_starts(index):
+    """Row positions where each UTC day of a sorted index begins"""
+    days = index.as_unit('ns').asi8 // pd.Timedelta(days=1).value
+    return np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1]))) if len(days) else np.array([], dtype=int)
+
+
+def iter_day_chunks(df, days=1):
+    """Yield consecutive slices of df covering `days` trading days each
+
+    Slices are views of df, so a long intraday history can be processed
+    (or written) a few sessions at a time without copying it.
+    """
+    starts = day_starts(df.index)
+    bounds = list(starts[::days]) + [len(df)]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        yield df.iloc[lo:hi]
+
+
+def _bin_length(timeframe):
+    if timeframe == "daily":
+        return pd.Timedelta(days=1)
+    if timeframe == "hourly":
+        return pd.Timedelta(hours=1)
+    return RESAMPLED_TIMEFRAMES[timeframe][1]
+
+
+def _bins(index, timeframe):
+    """(bin number of each bar, bin origin in ns); daily bins are UTC days"""
+    origin = 0 if timeframe == "daily" else BIN_ORIGIN.value
+    nanos = index.as_unit('ns').asi8
+    return (nanos - origin) // _bin_length(timeframe).value, origin
+
+
+def resample_bars(df, timeframe):
+    """Aggregate intraday bars into longer bars ("5min", "15min", "30min", "hourly" or "daily")
+
+    Only bins holding at least one bar are returned, so there are no empty
+    overnight or weekend bars. Works on sorted positions with ufunc.reduceat,
+    which keeps it linear in the number of bars and well below pandas
+    resample() time and memory on multi-million row frames. Columns keep
+    their dtypes; columns other than OHLCV (and adj_*) are dropped.
+    """
+    if timeframe not in ("daily", "hourly") and timeframe not in RESAMPLED_TIMEFRAMES:
+        raise ValueError(f"Cannot resample to {timeframe}")
+    if df.empty:
+        return df.iloc[:0]
+
+    codes, origin = _bins(df.index, timeframe)
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    ends = np.concatenate((starts[1:], [len(codes)])) - 1
+
+    columns = {}
+    for column in df.columns:
+        how = AGGREGATIONS.get(column[4:] if column.startswith('adj_') else column)
+        if how is None:
+            continue
+        values = df[column].to_numpy()
+        if how == 'first':
+            columns[column] = values[starts]
+        elif how == 'last':
+            columns[column] = values[ends]
+        elif how == 'max':
+            columns[column] = np.maximum.reduceat(values, starts)
+        elif how == 'min':
+            columns[column] = np.minimum.reduceat(values, starts)
+        else:
+            # Summed volume can outgrow a compact int32 column
+            columns[column] = np.add.reduceat(values.astype(np.int64) if values.dtype.kind == 'i' else values, starts)
+
+    # Each bar is labelled with the start of its bin
+    labels = codes[starts] * _bin_length(timeframe).value + origin
+    index = pd.DatetimeIndex(pd.to_datetime(labels, unit='ns', utc=True), name='date').as_unit(df.index.unit)
+    if df.index.tz is None:
+        index = index.tz_localize(None)
+    return pd.DataFrame(columns, index=index)
+
+
+def write_bars(df, path, days_per_row_group=20):
+    """Write bars to Parquet with each row group holding whole trading days
+
+    Readers filtering on a date range (read_bars) then skip the row groups
+    outside it instead of decoding the whole history.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.iloc[:0])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter_day_chunks(df, days_per_row_group):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema))
+
+
+def read_bars(path, start=None, end=None, columns=None):
+    """Read Parquet bars, decoding only the row groups and columns needed
+
+    start and end are UTC timestamps (end exclusive); columns defaults to all.
+    """
+    import pyarrow.parquet as pq
+
+    filters = []
+    if start is not None:
+        filters.append(('date', '>=', start))
+    if end is not None:
+        filters.append(('date', '<', end))
+    if columns is not None and 'date' not in columns:
+        columns = ['date'] + list(columns)
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    df = table.to_pandas()
+    if 'date' in df.columns:
+        df = df.set_index('date')
+    return df
+
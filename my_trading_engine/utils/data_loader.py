@@ -1,32 +1,93 @@
 import os
+import random
+import sys
+import time
+from collections import deque
+from functools import lru_cache
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import requests
-from tiingo import TiingoClient
-from dotenv import load_dotenv
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import API_CONFIG
+from config import API_CONFIG, CACHE_CONFIG, SYNTHETIC_DATA_CONFIG, INTRADAY_CONFIG, BAR_DATA_CONFIG
+from utils.bar_cache import BarCache
+from utils.bars import INTRADAY_TIMEFRAMES, IndexPool, base_timeframe, compact_bars, resample_bars, select_bars
+from utils.data_sources import LocalFileSource, SyntheticSource, STANDARD_COLUMNS
+from utils.rate_limiter import TokenBucket
+from utils.metrics import METRICS
+
+# HTTP status codes worth retrying
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Tiingo resampleFreq of each timeframe; intraday frequencies are served by the IEX endpoint
+TIINGO_FREQUENCIES = {"daily": "daily", "hourly": "1hour", "minute": "1min"}
 
-load_dotenv()  # Load environment variables from .env file if present
+# Sources that read local files or generate data, so never need the bar cache
+OFFLINE_SOURCES = ("local", "synthetic")
 
 class DataLoader:
-    def __init__(self, api_key=None, data_source=None):
-        self.api_key = api_key or os.getenv("TIINGO_API_KEY") or API_CONFIG.get("tiingo_api_key")
+    def __init__(self, api_key=None, data_source=None, use_cache=None, force_refresh=False,
+                 base_url=None, max_workers=None, rate_limiter=None, columns=None, adjusted=None, compact=None):
         self.data_source = data_source or API_CONFIG.get("data_source", "tiingo")
+        if api_key is None and self.data_source == "tiingo":
+            # Only the Tiingo source needs a key, so offline runs never read .env
+            _load_env()
+        self.api_key = api_key or os.getenv("TIINGO_API_KEY") or API_CONFIG.get("tiingo_api_key")
+        self.force_refresh = force_refresh
+        self.base_url = base_url or API_CONFIG.get("tiingo_base_url")
+        self.max_workers = max_workers or API_CONFIG.get("max_concurrency", 1)
+        self.max_retries = API_CONFIG.get("max_retries", 3)
+        self.retry_backoff = API_CONFIG.get("retry_backoff", 1.0)
+        self.errors = {}  # Per-symbol errors from the last get_multiple_symbols call
+        
+        # What the strategies get: columns (None for all), adjusted or raw prices, float32 or not
+        self.columns = columns
+        self.adjusted = BAR_DATA_CONFIG.get("adjusted", False) if adjusted is None else adjusted
+        self.compact = BAR_DATA_CONFIG.get("compact", False) if compact is None else compact
+        self.index_pool = IndexPool() if self.compact else None
+        
+        # Shared across worker threads so the vendor quota holds for the whole loader
+        if rate_limiter is None and API_CONFIG.get("requests_per_hour"):
+            rate_limiter = TokenBucket.per_hour(API_CONFIG["requests_per_hour"],
+                                                burst=API_CONFIG.get("rate_limit_burst"))
+        self.rate_limiter = rate_limiter
+        
+        # Local bar cache so repeated runs only fetch new bars
+        if use_cache is None:
+            use_cache = CACHE_CONFIG.get("enabled", False) and self.data_source not in OFFLINE_SOURCES
+        self.cache = BarCache(
+            cache_dir=CACHE_CONFIG.get("cache_dir", "../cache/bars"),
+            max_size_mb=CACHE_CONFIG.get("max_size_mb"),
+            max_age_days=CACHE_CONFIG.get("max_age_days"),
+            days_per_row_group=INTRADAY_CONFIG.get("days_per_row_group", 20)
+        ) if use_cache else None
         
         if self.data_source == "tiingo":
             self._init_tiingo()
+        elif self.data_source == "local":
+            self.source = LocalFileSource(API_CONFIG.get("local_data_dir", "../data/bars"))
+        elif self.data_source == "synthetic":
+            self.source = SyntheticSource(**SYNTHETIC_DATA_CONFIG)
     
     def _init_tiingo(self):
         if not self.api_key:
             raise ValueError("Tiingo API key is required. Set it in config.py or as an environment variable.")
-            
+        
+        # The Tiingo client (and requests) are only imported by loaders that use them
+        from tiingo import TiingoClient
         self.client = TiingoClient({"api_key": self.api_key})
+        if self.base_url:
+            # Point the client at a mirror or a local stand-in server
+            self.client._base_url = self.base_url.rstrip("/")
     
-    def get_historical_data(self, symbol, start_date=None, end_date=None, timeframe="daily"):
-        """Get historical price data for a symbol"""
+    def get_historical_data(self, symbol, start_date=None, end_date=None, timeframe="daily",
+                            force_refresh=None, raise_errors=False):
+        """Get historical price data for a symbol, served from the local cache when possible
+        
+        timeframe is "daily", "hourly", "minute", or one of "5min", "15min" and
+        "30min", which are resampled from minute bars after loading (only the
+        minute bars are cached). Errors are printed and an empty DataFrame
+        returned unless raise_errors is set.
+        """
         if not end_date:
             end_date = datetime.now().strftime("%Y-%m-%d")
         
@@ -34,65 +95,236 @@ class DataLoader:
             # Default to 1 year of data
             start_date = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
         
+        if force_refresh is None:
+            force_refresh = self.force_refresh
+        
+        base = base_timeframe(timeframe)
+        try:
+            if self.cache is None:
+                df = self._fetch(symbol, start_date, end_date, base)
+            else:
+                df = self.cache.get(
+                    self.data_source, base, symbol, start_date, end_date,
+                    fetch=lambda start, end: self._fetch(symbol, start, end, base),
+                    force_refresh=force_refresh
+                )
+            if base != timeframe:
+                df = resample_bars(df, timeframe)
+            return self._select(df)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error fetching data for {symbol}: {str(e)}")
+            return pd.DataFrame()
+    
+    def _select(self, df):
+        """Apply the column, adjusted and compact options (the cache keeps full bars)"""
+        if self.columns is None and not self.adjusted and not self.compact:
+            return df
+        df = select_bars(df, self.columns, self.adjusted, self.compact)
+        return self.index_pool.share(df) if self.index_pool is not None and len(df) else df
+    
+    def _fetch(self, symbol, start_date, end_date, timeframe):
+        """Fetch data from the configured data source, bypassing the cache"""
         if self.data_source == "tiingo":
-            return self._get_tiingo_data(symbol, start_date, end_date, timeframe)
+            df = self._get_tiingo_data(symbol, start_date, end_date, timeframe)
+        elif self.data_source in OFFLINE_SOURCES:
+            df = self.source.get_bars(symbol, start_date, end_date, timeframe)
         else:
             raise NotImplementedError(f"Data source {self.data_source} not implemented")
+        
+        # Intraday histories run to millions of bars, so keep them compact from the start
+        if timeframe in INTRADAY_TIMEFRAMES and INTRADAY_CONFIG.get("compact", True):
+            df = compact_bars(df)
+        return df
+    
+    def _with_retry(self, request, *args):
+        """Run a rate-limited request, retrying transient errors with exponential backoff"""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                return request(*args)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient(e):
+                    raise
+                METRICS.count("fetch_retries")
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.retry_backoff * (2 ** attempt) * (1 + random.random() * 0.1)
+                time.sleep(delay)
+                attempt += 1
     
     def _get_tiingo_data(self, symbol, start_date, end_date, timeframe):
-        """Get data from Tiingo API"""
-        try:
-            if timeframe == "daily":
-                data = self.client.get_ticker_price(
-                    ticker=symbol,
-                    fmt='json',
-                    startDate=start_date,
-                    endDate=end_date,
-                    frequency='daily'
-                )
-            else:
-                # For intraday data (requires premium Tiingo subscription)
-                raise NotImplementedError(f"Timeframe {timeframe} not implemented for Tiingo")
-                
-            # Convert to DataFrame
-            df = pd.DataFrame(data)
-            
-            # Rename columns to standardized format
-            df = df.rename(columns={
-                'date': 'date',
-                'open': 'open',
-                'high': 'high',
-                'low': 'low',
-                'close': 'close',
-                'volume': 'volume',
-                'adjOpen': 'adj_open',
-                'adjHigh': 'adj_high',
-                'adjLow': 'adj_low',
-                'adjClose': 'adj_close',
-                'adjVolume': 'adj_volume'
-            })
-            
-            # Set date as index
-            df['date'] = pd.to_datetime(df['date'])
-            df.set_index('date', inplace=True)
+        """Get data from Tiingo API
+        
+        Intraday bars come from the IEX endpoint, which caps the bars per
+        response, so the range is requested in windows of request_days.
+        """
+        if timeframe not in TIINGO_FREQUENCIES:
+            raise NotImplementedError(f"Timeframe {timeframe} not implemented for Tiingo")
+        
+        if timeframe == "daily":
+            data = self._with_retry(self._get_tiingo_prices, symbol, start_date, end_date, timeframe)
+        else:
+            days = INTRADAY_CONFIG["request_days"][timeframe]
+            data = []
+            for window_start, window_end in _date_windows(start_date, end_date, days):
+                data.extend(self._with_retry(self._get_tiingo_prices, symbol, window_start, window_end, timeframe))
+        
+        # No bars in the requested range
+        if not data:
+            return pd.DataFrame()
             
-            return df
+        # Convert to DataFrame
+        df = pd.DataFrame(data)
+        
+        # Rename columns to standardized format
+        df = df.rename(columns=STANDARD_COLUMNS)
             
-        except Exception as e:
-            print(f"Error fetching data for {symbol}: {str(e)}")
-            return pd.DataFrame()
+        # Set date as index
+        df['date'] = pd.to_datetime(df['date'])
+        df.set_index('date', inplace=True)
+        
+        return df
     
-    def get_multiple_symbols(self, symbols, start_date=None, end_date=None, timeframe="daily"):
-        """Get historical data for multiple symbols"""
-        data = {}
-        for symbol in symbols:
-            symbol_data = self.get_historical_data(
-                symbol=symbol if isinstance(symbol, str) else symbol["symbol"],
+    def _get_tiingo_prices(self, symbol, start_date, end_date, timeframe):
+        """One price request; the IEX endpoint only returns volume when asked"""
+        return self.client.get_ticker_price(
+            ticker=symbol,
+            fmt='json',
+            startDate=start_date,
+            endDate=end_date,
+            columns=None if timeframe == "daily" else "open,high,low,close,volume",
+            frequency=TIINGO_FREQUENCIES[timeframe]
+        )
+    
+    def _fetch_symbol(self, symbol, start_date, end_date, timeframe):
+        """Fetch one symbol, returning (df, None) or (None, error message)"""
+        start = time.perf_counter()
+        try:
+            df = self.get_historical_data(
+                symbol=symbol,
                 start_date=start_date,
                 end_date=end_date,
-                timeframe=timeframe
+                timeframe=timeframe,
+                raise_errors=True
             )
-            if not symbol_data.empty:
-                data[symbol if isinstance(symbol, str) else symbol["symbol"]] = symbol_data
+            METRICS.count("bars_fetched", len(df))
+            return df, None
+        except Exception as e:
+            METRICS.count("fetch_errors")
+            return None, f"{type(e).__name__}: {e}"
+        finally:
+            elapsed = time.perf_counter() - start
+            METRICS.add_time("fetch", elapsed)
+            METRICS.observe("fetch_seconds", elapsed)
+            METRICS.record("fetch_seconds", symbol, elapsed)
+    
+    def iter_symbols(self, symbols, start_date=None, end_date=None, timeframe="daily", max_workers=None, window=None):
+        """Yield (symbol, df) pairs in input order as their bars arrive
+        
+        Symbols are fetched concurrently on up to max_workers threads, with at
+        most window fetches in flight or waiting to be consumed, so memory is
+        bounded by the window rather than the universe. Failures are recorded
+        per symbol in self.errors and, like empty results, are not yielded.
+        """
+        symbols = [s if isinstance(s, str) else s["symbol"] for s in symbols]
+        max_workers = max_workers or self.max_workers
+        window = max(window or len(symbols), max_workers)
+        self.errors = {}
+        
+        def results():
+            if max_workers > 1 and len(symbols) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pending = deque()
+                    for symbol in symbols:
+                        pending.append((symbol, executor.submit(self._fetch_symbol, symbol, start_date, end_date, timeframe)))
+                        # Consume in input order once the window is full
+                        if len(pending) >= window:
+                            head, future = pending.popleft()
+                            yield head, future.result()
+                    while pending:
+                        head, future = pending.popleft()
+                        yield head, future.result()
+            else:
+                for symbol in symbols:
+                    yield symbol, self._fetch_symbol(symbol, start_date, end_date, timeframe)
+        
+        for symbol, (symbol_data, error) in results():
+            if error is not None:
+                self.errors[symbol] = error
+            elif not symbol_data.empty:
+                yield symbol, symbol_data
         
-        return data
\ No newline at end of file
+        # Keep the cache within its size/age limits
+        if self.cache is not None:
+            self.cache.evict()
+    
+    def get_multiple_symbols(self, symbols, start_date=None, end_date=None, timeframe="daily", max_workers=None):
+        """Get historical data for multiple symbols
+        
+        Symbols are fetched concurrently on up to max_workers threads. Failures
+        are recorded per symbol in self.errors and left out of the result.
+        """
+        return dict(self.iter_symbols(symbols, start_date, end_date, timeframe, max_workers))
+
+
+@lru_cache(maxsize=None)
+def _load_env():
+    """Load environment variables from a .env file if present, once per process
+
+    A .env that cannot be read or parsed (e.g. saved as UTF-16) is reported
+    and skipped, leaving the key to the environment or config.py.
+    """
+    from dotenv import load_dotenv
+    try:
+        load_dotenv()
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not load .env: {e}")
+
+
+def _unwrap(error):
+    """The requests error wrapped in a tiingo RestClientError, else error itself
+
+    Looked up in sys.modules: if tiingo was never imported, no error can be one of its own.
+    """
+    restclient = sys.modules.get("tiingo.restclient")
+    if restclient is not None and isinstance(error, restclient.RestClientError) and error.args:
+        return error.args[0]
+    return error
+
+
+def _http_status(error):
+    """Extract the HTTP status code from a (wrapped) requests error, if any"""
+    response = getattr(_unwrap(error), "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _date_windows(start_date, end_date, days):
+    """Split [start_date, end_date] into consecutive ranges of at most days calendar days"""
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    windows = []
+    while start <= end:
+        window_end = min(start + pd.Timedelta(days=days - 1), end)
+        windows.append((start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")))
+        start = window_end + pd.Timedelta(days=1)
+    return windows
+
+def _is_transient(error):
+    """Whether a failed request is worth retrying"""
+    requests = sys.modules.get("requests")
+    if requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return _http_status(error) in TRANSIENT_STATUS_CODES
+
+
+def _retry_after(error):
+    """Seconds requested by a Retry-After header, if the server sent one"""
+    response = getattr(_unwrap(error), "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,239 @@
+import os
+import zlib
+import pandas as pd
+import numpy as np
+from utils.bars import resample_bars, read_bars
+
+# Vendor column names mapped to the standardized format used throughout the engine
+STANDARD_COLUMNS = {
+    'date': 'date',
+    'open': 'open',
+    'high': 'high',
+    'low': 'low',
+    'close': 'close',
+    'volume': 'volume',
+    'adjOpen': 'adj_open',
+    'adjHigh': 'adj_high',
+    'adjLow': 'adj_low',
+    'adjClose': 'adj_close',
+    'adjVolume': 'adj_volume'
+}
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Bars per regular US session and their UTC start times
+SESSION_OPEN_UTC = pd.Timedelta(hours=14, minutes=30)
+BARS_PER_DAY = {"hourly": 7, "minute": 390}
+BAR_LENGTH = {"hourly": pd.Timedelta(hours=1), "minute": pd.Timedelta(minutes=1)}
+
+
+def standardize_bars(df):
+    """Rename columns to the standard format and index by a UTC date index"""
+    df = df.rename(columns=STANDARD_COLUMNS)
+    df = df.rename(columns={c: c.lower() for c in df.columns if c.lower() in PRICE_COLUMNS + ['date']})
+
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], utc=True)
+        df = df.set_index('date')
+    else:
+        df.index = pd.to_datetime(df.index, utc=True)
+        df.index.name = 'date'
+
+    # Sources without adjustments use raw prices as adjusted prices
+    for column in PRICE_COLUMNS:
+        if column in df.columns and f'adj_{column}' not in df.columns:
+            df[f'adj_{column}'] = df[column]
+
+    return df.sort_index()
+
+
+class LocalFileSource:
+    """Read OHLCV bars from a directory of Parquet, CSV or Arrow files.
+
+    Files are looked up as ``<data_dir>/<timeframe>/<SYMBOL>.<ext>`` and, for
+    daily bars, ``<data_dir>/<SYMBOL>.<ext>``. A timeframe without a file is
+    resampled from a finer one, so minute files alone serve hourly and daily
+    requests. Parquet files are read by date range, skipping row groups
+    outside it.
+    """
+
+    EXTENSIONS = ('.parquet', '.arrow', '.feather', '.csv')
+
+    # Finer timeframes to resample from, nearest first
+    FINER_TIMEFRAMES = {"daily": ("hourly", "minute"), "hourly": ("minute",)}
+
+    def __init__(self, data_dir="../data/bars"):
+        self.data_dir = data_dir
+
+    def _find_file(self, symbol, timeframe):
+        directories = [os.path.join(self.data_dir, timeframe)]
+        if timeframe == "daily":
+            directories.append(self.data_dir)
+        for directory in directories:
+            for name in (symbol, symbol.upper()):
+                for ext in self.EXTENSIONS:
+                    path = os.path.join(directory, name + ext)
+                    if os.path.exists(path):
+                        return path
+        raise FileNotFoundError(f"No {timeframe} bar file for {symbol} in {self.data_dir}")
+
+    def _read(self, path, start=None, end=None):
+        if path.endswith('.parquet'):
+            try:
+                return read_bars(path, start, end)
+            except (ValueError, NotImplementedError):
+                # No comparable UTC "date" column to filter on
+                return pd.read_parquet(path)
+        if path.endswith(('.arrow', '.feather')):
+            return pd.read_feather(path)
+        return pd.read_csv(path)
+
+    def get_bars(self, symbol, start_date, end_date, timeframe="daily"):
+        """Get standardized bars for [start_date, end_date]"""
+        try:
+            path = self._find_file(symbol, timeframe)
+        except FileNotFoundError:
+            for finer in self.FINER_TIMEFRAMES.get(timeframe, ()):
+                try:
+                    self._find_file(symbol, finer)
+                except FileNotFoundError:
+                    continue
+                return resample_bars(self.get_bars(symbol, start_date, end_date, finer), timeframe)
+            raise
+        start, end = _date_bounds(start_date, end_date)
+        df = standardize_bars(self._read(path, start, end))
+        return _slice_dates(df, start_date, end_date)
+
+
+class SyntheticSource:
+    """Deterministic synthetic OHLCV generator.
+
+    Each symbol follows its own geometric random walk seeded from ``seed`` and
+    the symbol name, so a symbol's bars do not depend on which other symbols
+    are requested. Intraday bars are Brownian bridges between each day's open
+    and close, so they agree with the daily series.
+    """
+
+    def __init__(self, seed=42, start_date="2000-01-01", years=25):
+        self.seed = seed
+        self.start_date = start_date
+        self.years = years
+        self._dates = None
+
+    def _calendar(self):
+        """Business days of the whole history, built once per source"""
+        if self._dates is None:
+            # A naive range localized afterwards is much faster than a tz-aware bdate_range
+            start = pd.Timestamp(self.start_date)
+            dates = pd.bdate_range(start, start + pd.DateOffset(years=self.years), inclusive='left', name='date')
+            self._dates = dates.tz_localize('UTC')
+        return self._dates
+
+    def _rng(self, symbol, *extra):
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.upper().encode()), *extra])
+
+    def _daily_bars(self, symbol):
+        """Generate the full daily history of a symbol"""
+        dates = self._calendar()
+        n = len(dates)
+        rng = self._rng(symbol)
+
+        # Per-symbol drift and volatility
+        mu = rng.normal(0.07, 0.10) / 252
+        sigma = rng.uniform(0.15, 0.45) / np.sqrt(252)
+        start_price = rng.uniform(20, 300)
+
+        log_close = np.log(start_price) + np.cumsum(rng.normal(mu - 0.5 * sigma ** 2, sigma, n))
+        close = np.exp(log_close)
+        prev_close = np.concatenate(([start_price], close[:-1]))
+        open_ = prev_close * np.exp(rng.normal(0, sigma * 0.25, n))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, sigma * 0.5, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, sigma * 0.5, n)))
+        volume = np.round(rng.lognormal(np.log(1e6), 0.5, n))
+
+        df = pd.DataFrame({
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume,
+        }, index=dates)
+        for column in PRICE_COLUMNS:
+            df[f'adj_{column}'] = df[column]
+        df['divCash'] = 0.0
+        df['splitFactor'] = 1.0
+        return df
+
+    def _intraday_bars(self, daily, symbol, timeframe):
+        """Bridge each day's open to its close with intraday bars"""
+        steps = BARS_PER_DAY[timeframe]
+        if daily.empty:
+            return daily.iloc[:0][PRICE_COLUMNS]
+
+        days = len(daily)
+        paths = np.empty((days, steps + 1))
+        fraction = np.arange(steps + 1) / steps
+        for i, day in enumerate(daily.index):
+            rng = self._rng(symbol, day.toordinal(), steps)
+            walk = np.concatenate(([0.0], np.cumsum(rng.normal(0, 1, steps))))
+            paths[i] = walk - fraction * walk[-1]
+
+        log_open = np.log(daily['open'].to_numpy())[:, None]
+        log_close = np.log(daily['close'].to_numpy())[:, None]
+        day_vol = np.log(daily['high'].to_numpy() / daily['low'].to_numpy())[:, None]
+        paths = np.exp(log_open + fraction * (log_close - log_open) + paths * day_vol / (2 * np.sqrt(steps)))
+
+        open_ = paths[:, :-1].ravel()
+        close = paths[:, 1:].ravel()
+        wick = np.abs(np.diff(np.log(paths), axis=1)).ravel() * 0.5
+        volume = np.repeat(daily['volume'].to_numpy() / steps, steps)
+
+        offsets = pd.to_timedelta(SESSION_OPEN_UTC + np.arange(steps) * BAR_LENGTH[timeframe]).to_numpy()
+        index = pd.DatetimeIndex(
+            (daily.index.tz_localize(None).to_numpy()[:, None] + offsets[None, :]).ravel(), name='date'
+        ).tz_localize('UTC')
+
+        df = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * (1 + wick),
+            'low': np.minimum(open_, close) * (1 - wick),
+            'close': close,
+            'volume': np.round(volume),
+        }, index=index)
+        for column in PRICE_COLUMNS:
+            df[f'adj_{column}'] = df[column]
+        return df
+
+    def get_bars(self, symbol, start_date, end_date, timeframe="daily"):
+        """Get standardized bars for [start_date, end_date]"""
+        daily = _slice_dates(self._daily_bars(symbol), start_date, end_date)
+        if timeframe == "daily":
+            return daily
+        if timeframe not in BARS_PER_DAY:
+            raise ValueError(f"Unsupported timeframe {timeframe}")
+        return self._intraday_bars(daily, symbol, timeframe)
+
+    def generate_universe(self, n_symbols, start_date=None, end_date=None, timeframe="daily", prefix="SYN"):
+        """Generate bars for n synthetic symbols named SYN0000, SYN0001, ..."""
+        start_date = start_date or self.start_date
+        end_date = end_date or (pd.Timestamp(self.start_date) + pd.DateOffset(years=self.years)).strftime("%Y-%m-%d")
+        return {
+            f"{prefix}{i:04d}": self.get_bars(f"{prefix}{i:04d}", start_date, end_date, timeframe)
+            for i in range(n_symbols)
+        }
+
+
+def _slice_dates(df, start_date, end_date):
+    """Select bars from start_date through the end of end_date"""
+    start, end = _date_bounds(start_date, end_date)
+    index = df.index
+    lo = index.searchsorted(start) if start is not None else 0
+    hi = index.searchsorted(end) if end is not None else len(index)
+    return df.iloc[lo:hi]
+
+
+def _date_bounds(start_date, end_date):
+    """UTC [start, end) timestamps covering start_date through the end of end_date"""
+    start = pd.Timestamp(start_date, tz='UTC') if start_date else None
+    end = pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1) if end_date else None
+    return start, end
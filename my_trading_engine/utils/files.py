@@ -0,0 +1,27 @@
+import os
+import threading
+
+
+def write_atomic(path, write):
+    """Write a file through a temporary file in the same directory, then os.replace it
+
+    write(tmp_path) produces the content. Readers never see a partial file,
+    and a failed write leaves any previous file in place.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_text_atomic(path, text):
+    """write_atomic for a string"""
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+    write_atomic(path, write)
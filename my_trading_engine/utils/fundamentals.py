@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+import pandas as pd
+import numpy as np
+from config import FUNDAMENTALS_CONFIG
+
+FUNDAMENTAL_FIELDS = ('pe_ratio', 'pb_ratio', 'ps_ratio', 'dividend_yield', 'eps', 'book_value_per_share')
+
+# File holding every symbol's reports, with a symbol column
+BULK_FILE = "fundamentals"
+EXTENSIONS = ('.parquet', '.csv')
+
+# Placeholder ratios of the "mock" source, in effect for all dates
+MOCK_FUNDAMENTALS = {
+    'AAPL': {'pe_ratio': 28.5, 'pb_ratio': 35.2},
+    'XLF': {'pe_ratio': 15.2, 'pb_ratio': 1.8},
+    'SPY': {'pe_ratio': 22.1, 'pb_ratio': 4.2},
+}
+MOCK_DEFAULT = {'pe_ratio': 25.0, 'pb_ratio': 3.0}
+
+
+class FundamentalsStore:
+    """Point-in-time fundamentals (P/E, P/B, ...) per symbol
+
+    Reports are dated by when they became known: an ``available_date``
+    column if the files have one, else ``date``. Joining them to bars gives
+    each bar the latest report on or before it, so a backtest never sees a
+    ratio before it was published.
+
+    The "local" source reads ``<data_dir>/fundamentals.parquet`` (or .csv)
+    with a symbol column, or one ``<data_dir>/<SYMBOL>.parquet`` (or .csv)
+    per symbol; the "mock" source serves fixed placeholder ratios. Loaded
+    reports are kept in a cache shared by every store in the process and
+    reloaded after ttl_seconds.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, source=None, data_dir=None, ttl_seconds=None):
+        self.source = source or FUNDAMENTALS_CONFIG.get("source", "mock")
+        self.data_dir = data_dir or FUNDAMENTALS_CONFIG.get("data_dir", "../data/fundamentals")
+        self.ttl_seconds = FUNDAMENTALS_CONFIG.get("ttl_seconds") if ttl_seconds is None else ttl_seconds
+        if self.source not in ("local", "mock"):
+            raise ValueError(f"Unknown fundamentals source {self.source}")
+
+    def _key(self, symbol):
+        return self.source, os.path.abspath(self.data_dir), symbol.upper()
+
+    def _fresh(self, loaded_at, now):
+        return self.ttl_seconds is None or now - loaded_at < self.ttl_seconds
+
+    def load(self, symbols):
+        """Load the reports of many symbols at once, reading each file at most once
+
+        Returns {symbol: (report dates as int64 ns, {field: float64 array})};
+        symbols without reports get empty arrays.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        now = time.time()
+        reports, missing = {}, []
+        with self._lock:
+            for symbol in symbols:
+                entry = self._cache.get(self._key(symbol))
+                if entry is not None and self._fresh(entry[0], now):
+                    reports[symbol] = entry[1]
+                else:
+                    missing.append(symbol)
+
+        if missing:
+            loaded = self._read(missing)
+            with self._lock:
+                for symbol in missing:
+                    reports[symbol] = loaded.get(symbol.upper()) or _empty()
+                    self._cache[self._key(symbol)] = (now, reports[symbol])
+        return reports
+
+    def _read(self, symbols):
+        """{SYMBOL: (dates, fields)} for the symbols that have reports"""
+        if self.source == "mock":
+            return {s.upper(): _mock(s) for s in symbols}
+
+        bulk = _find_file(self.data_dir, BULK_FILE)
+        if bulk is not None:
+            frame = _read_file(bulk, symbols)
+        else:
+            frames = []
+            for symbol in symbols:
+                path = _find_file(self.data_dir, symbol.upper()) or _find_file(self.data_dir, symbol)
+                if path is not None:
+                    frames.append(_read_file(path).assign(symbol=symbol))
+            frame = pd.concat(frames, ignore_index=True) if frames else None
+
+        if frame is None or frame.empty:
+            return {}
+        return _split(frame)
+
+    def clear(self):
+        """Drop every cached report (all stores share the cache)"""
+        with self._lock:
+            self._cache.clear()
+
+    def join(self, index, symbol, fields=('pe_ratio', 'pb_ratio')):
+        """As-of join: {field: value of the latest report on or before each date of index}
+
+        Dates before the first report are NaN.
+        """
+        dates, values = self.load([symbol])[symbol]
+        rows = _asof_rows(dates, index)
+        return {field: _take(values.get(field), rows) for field in fields}
+
+    def join_panel(self, panel, fields=('pe_ratio', 'pb_ratio')):
+        """The as-of join for every symbol of a Panel, as dates x symbols arrays"""
+        reports = self.load(panel.symbols)
+        out = {field: np.full(panel.shape, np.nan) for field in fields}
+        for j, symbol in enumerate(panel.symbols):
+            dates, values = reports[symbol]
+            rows = _asof_rows(dates, panel.dates)
+            for field in fields:
+                out[field][:, j] = _take(values.get(field), rows)
+        return out
+
+    def latest(self, symbol, as_of=None, fields=('pe_ratio', 'pb_ratio')):
+        """{field: value} of the latest report on or before as_of (default: now)"""
+        as_of = pd.DatetimeIndex([pd.Timestamp(as_of or pd.Timestamp.now(tz='UTC'))])
+        return {field: values[0] for field, values in self.join(as_of, symbol, fields).items()}
+
+
+def _empty():
+    return np.array([], dtype=np.int64), {}
+
+
+def _mock(symbol):
+    ratios = MOCK_FUNDAMENTALS.get(symbol.upper(), MOCK_DEFAULT)
+    # A single report dated at the epoch applies to every bar
+    return np.zeros(1, dtype=np.int64), {field: np.array([value]) for field, value in ratios.items()}
+
+
+def _find_file(directory, name):
+    for ext in EXTENSIONS:
+        path = os.path.join(directory, name + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _read_file(path, symbols=None):
+    """Read a report file, only the requested symbols' rows from a bulk Parquet file"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        filters = None
+        if symbols is not None:
+            filters = [('symbol', 'in', list(symbols) + [s.upper() for s in symbols])]
+        return pq.read_table(path, filters=filters).to_pandas()
+    frame = pd.read_csv(path)
+    if symbols is not None:
+        frame = frame[frame['symbol'].str.upper().isin([s.upper() for s in symbols])]
+    return frame
+
+
+def _split(frame):
+    """Per-symbol report dates (int64 ns) and float64 field arrays, sorted by date"""
+    date_column = 'available_date' if 'available_date' in frame.columns else 'date'
+    dates = pd.to_datetime(frame[date_column], utc=True).dt.as_unit('ns').astype(np.int64).to_numpy()
+    symbols = frame['symbol'].astype(str).str.upper().to_numpy()
+    fields = [f for f in frame.columns if f in FUNDAMENTAL_FIELDS]
+    values = {f: frame[f].to_numpy(dtype=np.float64) for f in fields}
+
+    # One sort by (symbol, date), then each symbol is a contiguous run
+    order = np.lexsort((dates, symbols))
+    symbols, dates = symbols[order], dates[order]
+    values = {f: v[order] for f, v in values.items()}
+    starts = np.flatnonzero(np.concatenate(([True], symbols[1:] != symbols[:-1])))
+    ends = np.concatenate((starts[1:], [len(symbols)]))
+    return {
+        symbols[lo]: (dates[lo:hi], {f: v[lo:hi] for f, v in values.items()})
+        for lo, hi in zip(starts, ends)
+    }
+
+
+def _asof_rows(dates, index):
+    """Row of the latest report on or before each date of index, -1 before the first"""
+    return np.searchsorted(dates, pd.DatetimeIndex(index).as_unit('ns').asi8, side='right') - 1
+
+
+def _take(values, rows):
+    if values is None or len(values) == 0:
+        return np.full(len(rows), np.nan)
+    out = values[np.maximum(rows, 0)]
+    out[rows < 0] = np.nan
+    return out
+
+
+# Process-wide store used by strategies that are not given one
+FUNDAMENTALS = FundamentalsStore()
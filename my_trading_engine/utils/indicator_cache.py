@@ -0,0 +1,106 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+from config import CACHE_CONFIG
+
+class IndicatorCache:
+    """Memoizing store for computed indicator series.
+
+    Entries are keyed by (data fingerprint, indicator name, parameters), so the
+    same indicator over the same bars is computed once no matter how many
+    strategies ask for it or how many copies of the frame they hold. The store
+    is bounded by total array size and evicts least recently used entries.
+    """
+
+    def __init__(self, max_mb=256):
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb is not None else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self._bytes += _nbytes(value)
+                self._evict()
+        return value
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        # Always keep the most recent entry, even if it alone exceeds the bound
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, value = self._entries.popitem(last=False)
+            self._bytes -= _nbytes(value)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+def _nbytes(value):
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return getattr(value, "nbytes", 0)
+
+
+def data_fingerprint(df, columns):
+    """Fingerprint the index and the given columns of a frame
+
+    Two frames holding the same bars get the same fingerprint even if they
+    are different objects, so copies made by strategies still share entries.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(df)).encode())
+    digest.update(_buffer(df.index))
+    for column in columns:
+        digest.update(column.encode())
+        digest.update(_buffer(df[column]))
+    return digest.hexdigest()
+
+
+def _buffer(values):
+    """Contiguous array view for hashing"""
+    if isinstance(values, pd.DatetimeIndex):
+        values = values.asi8
+    array = np.ascontiguousarray(np.asarray(values))
+    if array.dtype == object:
+        return str(array.tolist()).encode()
+    return array.view(np.uint8) if array.size else b""
+
+
+# Process-wide cache shared by Indicators and every strategy
+INDICATOR_CACHE = IndicatorCache(max_mb=CACHE_CONFIG.get("indicator_cache_mb", 256))
@@ -1,88 +1,192 @@
+import threading
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
+from utils.indicator_cache import INDICATOR_CACHE, data_fingerprint
 
 class Indicators:
+    """Technical indicators computed on NumPy arrays.
+
+    compute_* methods return only the new columns, or write them into an
+    existing frame passed as out. add_* methods return the input columns plus
+    the new ones without copying the input data.
+    """
+
+    # Shared store consulted before computing anything; set to None to disable caching
+    cache = INDICATOR_CACHE
+
+    # Per-thread stores opened by scope()
+    _scopes = threading.local()
+
+    @staticmethod
+    @contextmanager
+    def scope():
+        """Share every series computed in the block between its callers
+
+        Used while evaluating several strategies over the same bars, so each
+        indicator is computed once even when the shared cache is disabled or
+        would evict it part way through. Entries are dropped on exit.
+        """
+        outer = getattr(Indicators._scopes, "entries", None)
+        Indicators._scopes.entries = {} if outer is None else outer
+        try:
+            yield
+        finally:
+            Indicators._scopes.entries = outer
+
+    @staticmethod
+    def cached(df, columns, name, params, compute):
+        """Compute a series derived from df[columns] once per distinct data and parameters
+
+        compute() must return a NumPy array (or a tuple of arrays). Cached arrays
+        are shared between callers and therefore made read-only.
+        """
+        cache = Indicators.cache
+        scoped = getattr(Indicators._scopes, "entries", None)
+        if cache is None and scoped is None:
+            return compute()
+        key = (data_fingerprint(df, columns), name, params)
+        if scoped is not None and key in scoped:
+            return scoped[key]
+        if cache is None:
+            value = _read_only(compute())
+        else:
+            value = cache.get_or_compute(key, lambda: _read_only(compute()))
+        if scoped is not None:
+            scoped[key] = value
+        return value
+
+    @staticmethod
+    def compute_sma(df, period=50, column='close', out=None):
+        """Simple Moving Average"""
+        sma = Indicators.cached(
+            df, [column], 'SMA', (period,),
+            lambda: _rolling_mean(_values(df, column), period)
+        )
+        return _emit(df, {f'SMA_{period}': sma}, out)
+
+    @staticmethod
+    def compute_ema(df, period=20, column='close', out=None):
+        """Exponential Moving Average"""
+        ema = Indicators.cached(
+            df, [column], 'EMA', (period,),
+            lambda: _ema(_values(df, column), period)
+        )
+        return _emit(df, {f'EMA_{period}': ema}, out)
+
+    @staticmethod
+    def compute_macd(df, fast=12, slow=26, signal=9, column='close', out=None):
+        """MACD (Moving Average Convergence Divergence) line, signal line and histogram"""
+        def compute():
+            values = _values(df, column)
+            macd = _ema(values, fast) - _ema(values, slow)
+            macd_signal = _ema(macd, signal)
+            return macd, macd_signal, macd - macd_signal
+
+        macd, macd_signal, macd_hist = Indicators.cached(df, [column], 'MACD', (fast, slow, signal), compute)
+        return _emit(df, {'MACD': macd, 'MACD_signal': macd_signal, 'MACD_hist': macd_hist}, out)
+
+    @staticmethod
+    def compute_rsi(df, period=14, column='close', out=None):
+        """Relative Strength Index"""
+        def compute():
+            delta = np.diff(_values(df, column), prepend=np.nan)
+
+            # Gains and losses; the first bar (no change) counts as zero for both
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+
+            # Average gain and loss, then RS (Relative Strength)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = _rolling_mean(gain, period) / _rolling_mean(loss, period)
+                return 100 - (100 / (1 + rs))
+
+        rsi = Indicators.cached(df, [column], 'RSI', (period,), compute)
+        return _emit(df, {'RSI': rsi}, out)
+
+    @staticmethod
+    def compute_bollinger_bands(df, period=20, std_dev=2, column='close', out=None):
+        """Bollinger Bands"""
+        def compute():
+            rolling = pd.Series(_values(df, column), copy=False).rolling(window=period)
+            middle = rolling.mean().to_numpy()
+            std = rolling.std().to_numpy()
+            return middle, middle + (std * std_dev), middle - (std * std_dev)
+
+        middle, upper, lower = Indicators.cached(df, [column], 'BB', (period, std_dev), compute)
+        return _emit(df, {'BB_middle': middle, 'BB_upper': upper, 'BB_lower': lower}, out)
+
+    @staticmethod
+    def compute_atr(df, period=14, out=None):
+        """Average True Range"""
+        def compute():
+            high, low, close = _values(df, 'high'), _values(df, 'low'), _values(df, 'close')
+            prev_close = np.empty_like(close)
+            prev_close[0] = np.nan
+            prev_close[1:] = close[:-1]
+
+            # True range, ignoring the missing previous close on the first bar
+            tr = np.fmax(np.abs(high - low), np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            return _rolling_mean(tr, period)
+
+        atr = Indicators.cached(df, ['high', 'low', 'close'], 'ATR', (period,), compute)
+        return _emit(df, {'ATR': atr}, out)
+
     @staticmethod
     def add_sma(df, period=50, column='close'):
         """Add Simple Moving Average"""
-        df = df.copy()
-        df[f'SMA_{period}'] = df[column].rolling(window=period).mean()
-        return df
-    
+        return Indicators.compute_sma(df, period, column, out=df.copy(deep=False))
+
     @staticmethod
     def add_ema(df, period=20, column='close'):
         """Add Exponential Moving Average"""
-        df = df.copy()
-        df[f'EMA_{period}'] = df[column].ewm(span=period, adjust=False).mean()
-        return df
-    
+        return Indicators.compute_ema(df, period, column, out=df.copy(deep=False))
+
     @staticmethod
     def add_macd(df, fast=12, slow=26, signal=9, column='close'):
         """Add MACD (Moving Average Convergence Divergence)"""
-        df = df.copy()
-        # Calculate MACD line
-        df['EMA_fast'] = df[column].ewm(span=fast, adjust=False).mean()
-        df['EMA_slow'] = df[column].ewm(span=slow, adjust=False).mean()
-        df['MACD'] = df['EMA_fast'] - df['EMA_slow']
-        
-        # Calculate Signal line
-        df['MACD_signal'] = df['MACD'].ewm(span=signal, adjust=False).mean()
-        
-        # Calculate Histogram
-        df['MACD_hist'] = df['MACD'] - df['MACD_signal']
-        
-        # Clean up
-        df.drop(['EMA_fast', 'EMA_slow'], axis=1, inplace=True)
-        
-        return df
-    
+        return Indicators.compute_macd(df, fast, slow, signal, column, out=df.copy(deep=False))
+
     @staticmethod
     def add_rsi(df, period=14, column='close'):
         """Add Relative Strength Index"""
-        df = df.copy()
-        delta = df[column].diff()
-        
-        # Make two series: one for gains and one for losses
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        
-        # Calculate average gain and loss
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-        
-        # Calculate RS (Relative Strength)
-        rs = avg_gain / avg_loss
-        
-        # Calculate RSI
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        return df
-    
+        return Indicators.compute_rsi(df, period, column, out=df.copy(deep=False))
+
     @staticmethod
     def add_bollinger_bands(df, period=20, std_dev=2, column='close'):
         """Add Bollinger Bands"""
-        df = df.copy()
-        df['BB_middle'] = df[column].rolling(window=period).mean()
-        df['BB_std'] = df[column].rolling(window=period).std()
-        df['BB_upper'] = df['BB_middle'] + (df['BB_std'] * std_dev)
-        df['BB_lower'] = df['BB_middle'] - (df['BB_std'] * std_dev)
-        
-        # Clean up
-        df.drop(['BB_std'], axis=1, inplace=True)
-        
-        return df
-    
+        return Indicators.compute_bollinger_bands(df, period, std_dev, column, out=df.copy(deep=False))
+
     @staticmethod
     def add_atr(df, period=14):
         """Add Average True Range"""
-        df = df.copy()
-        df['tr0'] = abs(df['high'] - df['low'])
-        df['tr1'] = abs(df['high'] - df['close'].shift())
-        df['tr2'] = abs(df['low'] - df['close'].shift())
-        df['tr'] = df[['tr0', 'tr1', 'tr2']].max(axis=1)
-        df['ATR'] = df['tr'].rolling(window=period).mean()
-        
-        # Clean up
-        df.drop(['tr0', 'tr1', 'tr2', 'tr'], axis=1, inplace=True)
-        
-        return df
\ No newline at end of file
+        return Indicators.compute_atr(df, period, out=df.copy(deep=False))
+
+
+def _values(df, column):
+    """Column as a float64 array, without copying when it already is one"""
+    return df[column].to_numpy(dtype=np.float64)
+
+
+def _rolling_mean(values, period):
+    return pd.Series(values, copy=False).rolling(window=period).mean().to_numpy()
+
+
+def _ema(values, period):
+    return pd.Series(values, copy=False).ewm(span=period, adjust=False).mean().to_numpy()
+
+
+def _emit(df, columns, out):
+    """Write new columns into out, or return them as a frame aligned with df"""
+    if out is None:
+        return pd.DataFrame(columns, index=df.index)
+    for name, values in columns.items():
+        out[name] = values
+    return out
+
+
+def _read_only(value):
+    if isinstance(value, tuple):
+        return tuple(_read_only(v) for v in value)
+    value.flags.writeable = False
+    return value
@@ -1,39 +1,292 @@
+import hashlib
 import json
 import os
+from urllib.parse import quote
 import pandas as pd
+import numpy as np
 from datetime import datetime
+from config import EXPORT_FORMATS
+from utils.files import write_atomic, write_text_atomic
 
-def export_portfolio(portfolio_data, output_path="../outputs/portfolio.json"):
-    """Export portfolio data to JSON file"""
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # Convert any non-serializable objects to strings
-    serializable_data = {}
-    for symbol, data in portfolio_data.items():
-        serializable_data[symbol] = {}
-        for key, value in data.items():
-            if isinstance(value, (pd.DataFrame, pd.Series)):
-                serializable_data[symbol][key] = value.to_dict()
-            elif isinstance(value, datetime):
-                serializable_data[symbol][key] = value.isoformat()
-            elif isinstance(value, (int, float, str, bool, list, dict)) or value is None:
-                serializable_data[symbol][key] = value
-            else:
-                serializable_data[symbol][key] = str(value)
-    
-    # Write to file
-    with open(output_path, 'w') as f:
-        json.dump(serializable_data, f, indent=2)
-    
-    return output_path
-
-def load_portfolio(input_path="../outputs/portfolio.json"):
-    """Load portfolio data from JSON file"""
+# Where each export format is written by default
+DEFAULT_PATHS = {
+    "json": "../outputs/portfolio.json",
+    "sharded": "../outputs/portfolio",
+    "parquet": "../outputs/portfolio.parquet",
+}
+
+MANIFEST_FILE = "manifest.json"
+
+def _serializable(data):
+    """Convert any non-serializable values of a symbol's entry"""
+    serializable = {}
+    for key, value in data.items():
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            serializable[key] = value.to_dict()
+        elif isinstance(value, datetime):
+            serializable[key] = value.isoformat()
+        elif isinstance(value, (int, float, str, bool, list, dict)) or value is None:
+            serializable[key] = value
+        else:
+            serializable[key] = str(value)
+    return serializable
+
+class PortfolioWriter:
+    """Write portfolio entries to the JSON file one symbol at a time
+
+    Produces the same file as export_portfolio without holding the whole
+    portfolio. Entries go to a temporary file that replaces output_path on
+    close, so readers never see a partial portfolio.
+    """
+
+    def __init__(self, output_path=DEFAULT_PATHS["json"]):
+        self.output_path = output_path
+        self.count = 0
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self._tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_path, 'w')
+
+    def write(self, symbol, data):
+        # An indented one-entry object, minus its braces, is exactly that entry's lines in the full dump
+        text = json.dumps({symbol: _serializable(data)}, indent=2)[2:-2]
+        self._file.write(("{\n" if self.count == 0 else ",\n") + text)
+        self.count += 1
+
+    def close(self):
+        self._file.write("\n}" if self.count else "{}")
+        self._file.close()
+        os.replace(self._tmp_path, self.output_path)
+        return self.output_path
+
+    def abort(self):
+        """Discard what was written, leaving any previous export in place"""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class ShardedPortfolioWriter(PortfolioWriter):
+    """Write one compact JSON file per symbol plus a manifest
+
+    The manifest records each shard's content hash, so a symbol whose entry
+    is unchanged since the last export is not rewritten. With partial, the
+    entries written update an existing export and other symbols are kept;
+    otherwise symbols missing from this export are removed.
+    """
+
+    def __init__(self, output_path=DEFAULT_PATHS["sharded"], partial=False):
+        self.output_path = output_path
+        self.partial = partial
+        self.count = 0
+        self.written = 0
+        os.makedirs(output_path, exist_ok=True)
+        self._previous = _read_manifest(output_path).get("symbols", {})
+        self._symbols = dict(self._previous) if partial else {}
+
+    def write(self, symbol, data):
+        text = json.dumps(_serializable(data), separators=(",", ":"))
+        digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        file_name = _shard_name(symbol)
+
+        previous = self._previous.get(symbol)
+        path = os.path.join(self.output_path, file_name)
+        if previous is None or previous["hash"] != digest or not os.path.exists(path):
+            write_text_atomic(path, text)
+            self.written += 1
+
+        self._symbols[symbol] = {"file": file_name, "hash": digest}
+        self.count += 1
+
+    def close(self):
+        # Shards of symbols that left the portfolio, or that an older export named differently
+        current = {entry["file"] for entry in self._symbols.values()}
+        for entry in self._previous.values():
+            if entry["file"] not in current:
+                path = os.path.join(self.output_path, entry["file"])
+                if os.path.exists(path):
+                    os.remove(path)
+
+        manifest = {
+            "format": "sharded",
+            "updated": datetime.now().isoformat(),
+            "symbols": self._symbols,
+        }
+        manifest_path = os.path.join(self.output_path, MANIFEST_FILE)
+        write_text_atomic(manifest_path, json.dumps(manifest, indent=2))
+        return self.output_path
+
+    def abort(self):
+        """Leave the previous manifest in place; rewritten shards already hold newer entries"""
+        pass
+
+class ParquetPortfolioWriter(PortfolioWriter):
+    """Write the portfolio as a Parquet table with one row per symbol
+
+    Nested fields are flattened into dotted columns (returns.1d,
+    sharpe_ratios.90d, ...) so single columns can be read without the rest.
+    With partial, the rows written replace those symbols in an existing file.
+    """
+
+    def __init__(self, output_path=DEFAULT_PATHS["parquet"], partial=False):
+        self.output_path = output_path
+        self.partial = partial
+        self.count = 0
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self._rows = {}
+
+    def write(self, symbol, data):
+        row = _flatten(_serializable(data))
+        # The export key, which portfolio entries also hold as their "symbol" field
+        row["symbol"] = symbol
+        self._rows[symbol] = row
+        self.count += 1
+
+    def close(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = self._rows
+        if self.partial and os.path.exists(self.output_path):
+            existing = {row["symbol"]: row for row in pq.read_table(self.output_path).to_pylist()}
+            existing.update(rows)
+            rows = existing
+
+        # Columns from every row: from_pylist would take them from the first row only and
+        # drop fields (e.g. new latest_indicators.*) the other rows add
+        rows = [_plain(row) for row in rows.values()]
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        table = pa.Table.from_pydict({name: [row.get(name) for row in rows] for name in names})
+        write_atomic(self.output_path, lambda p: pq.write_table(table, p))
+        return self.output_path
+
+    def abort(self):
+        self._rows = {}
+
+def portfolio_writer(output_path=None, format="json", partial=False):
+    """Open a writer for one of EXPORT_FORMATS
+
+    partial only applies to the sharded and parquet formats, which can update
+    part of an existing export; a JSON export is always rewritten whole.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {format}")
+    output_path = output_path or DEFAULT_PATHS[format]
+    if format == "sharded":
+        return ShardedPortfolioWriter(output_path, partial=partial)
+    if format == "parquet":
+        return ParquetPortfolioWriter(output_path, partial=partial)
+    return PortfolioWriter(output_path)
+
+def export_portfolio(portfolio_data, output_path=None, format="json", partial=False):
+    """Export portfolio data to JSON file, per-symbol shards or Parquet"""
+    with portfolio_writer(output_path, format, partial) as writer:
+        for symbol, data in portfolio_data.items():
+            writer.write(symbol, data)
+
+    return writer.output_path
+
+def load_portfolio(input_path=DEFAULT_PATHS["json"], symbol=None, columns=None):
+    """Load portfolio data from a JSON file, sharded directory or Parquet file
+
+    symbol (a name or list of names) and columns (top-level field names)
+    restrict what is returned. Sharded and Parquet exports read only the
+    requested shards or columns; a single JSON file is always parsed whole.
+    """
     if not os.path.exists(input_path):
         return {}
-    
-    with open(input_path, 'r') as f:
-        data = json.load(f)
-    
-    return data
\ No newline at end of file
+
+    symbols = [symbol] if isinstance(symbol, str) else symbol
+
+    if os.path.isdir(input_path):
+        data = _load_sharded(input_path, symbols)
+    elif input_path.endswith(".parquet"):
+        data = _load_parquet(input_path, symbols, columns)
+    else:
+        with open(input_path, 'r') as f:
+            data = json.load(f)
+        if symbols is not None:
+            data = {s: data[s] for s in symbols if s in data}
+
+    if columns is not None:
+        data = {s: {key: value for key, value in entry.items() if key in columns} for s, entry in data.items()}
+
+    return data
+
+def _shard_name(symbol):
+    """Percent-encoded file name, so distinct symbols (BRK/B, BRK_B) never share a shard"""
+    return quote(symbol, safe="") + ".json"
+
+def _read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _load_sharded(directory, symbols):
+    manifest = _read_manifest(directory).get("symbols", {})
+    data = {}
+    for symbol in (symbols if symbols is not None else manifest):
+        entry = manifest.get(symbol)
+        if entry is None:
+            continue
+        with open(os.path.join(directory, entry["file"]), 'r') as f:
+            data[symbol] = json.load(f)
+    return data
+
+def _load_parquet(path, symbols, columns):
+    import pyarrow.parquet as pq
+
+    names = pq.read_schema(path).names
+    if columns is not None:
+        # A nested field such as "returns" selects all of its dotted columns
+        names = [name for name in names if name == "symbol" or name.split(".", 1)[0] in columns]
+    filters = [("symbol", "in", list(symbols))] if symbols is not None else None
+    rows = pq.read_table(path, columns=names, filters=filters).to_pylist()
+
+    data = {}
+    for row in rows:
+        data[row["symbol"]] = _unflatten(row)
+    if symbols is not None:
+        data = {s: data[s] for s in symbols if s in data}
+    return data
+
+def _flatten(data, prefix=""):
+    """{"returns": {"1d": x}} -> {"returns.1d": x}"""
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def _unflatten(row):
+    data = {}
+    for name, value in row.items():
+        *parents, key = name.split(".")
+        node = data
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return data
+
+def _plain(value):
+    """NumPy scalars (and lists/dicts of them) as Python values for Arrow"""
+    if isinstance(value, dict):
+        return {key: _plain(v) for key, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,192 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from utils.files import write_text_atomic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX = "trading_engine"
+
+class RunMetrics:
+    """Timers, counters, latency histograms and memory high-water marks for a run.
+
+    Safe to update from the fetch threads. Worker processes collect into
+    their own instance and send to_dict() back to be merged, so a run
+    report covers the work done in every process.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.histograms = {}
+        self.samples = {}
+        self.peak_rss_mb = None
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name):
+        """Time the enclosed block under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds, count=1):
+        with self._lock:
+            timer = self.timers.setdefault(name, {"count": 0, "seconds": 0.0, "max": 0.0})
+            timer["count"] += count
+            timer["seconds"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        """Add a value to a histogram (one count per bucket, Prometheus-style upper bounds)"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {
+                    "buckets": list(buckets), "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0
+                }
+            histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def record(self, name, key, value):
+        """Keep an individual measurement, e.g. the fetch latency of each symbol"""
+        with self._lock:
+            self.samples.setdefault(name, {})[key] = value
+
+    def sample_memory(self):
+        """Update the peak resident memory of this process and its finished workers"""
+        if resource is None:
+            return self.peak_rss_mb
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / scale
+        self.peak_rss_mb = max(self.peak_rss_mb or 0.0, peak)
+        return self.peak_rss_mb
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "timers": {name: dict(timer) for name, timer in self.timers.items()},
+                "counters": dict(self.counters),
+                "histograms": {name: {**h, "counts": list(h["counts"])} for name, h in self.histograms.items()},
+                "samples": {name: dict(values) for name, values in self.samples.items()},
+                "peak_rss_mb": self.peak_rss_mb,
+            }
+
+    def merge(self, other):
+        """Add the metrics of another instance (or its to_dict()) into this one"""
+        if isinstance(other, RunMetrics):
+            other = other.to_dict()
+        for name, timer in other["timers"].items():
+            with self._lock:
+                mine = self.timers.setdefault(name, {"count": 0, "seconds": 0.0, "max": 0.0})
+                mine["count"] += timer["count"]
+                mine["seconds"] += timer["seconds"]
+                mine["max"] = max(mine["max"], timer["max"])
+        for name, value in other["counters"].items():
+            self.count(name, value)
+        with self._lock:
+            for name, histogram in other["histograms"].items():
+                mine = self.histograms.get(name)
+                if mine is None:
+                    self.histograms[name] = {**histogram, "counts": list(histogram["counts"])}
+                    continue
+                mine["counts"] = [a + b for a, b in zip(mine["counts"], histogram["counts"])]
+                mine["sum"] += histogram["sum"]
+                mine["count"] += histogram["count"]
+            for name, values in other["samples"].items():
+                self.samples.setdefault(name, {}).update(values)
+            if other.get("peak_rss_mb") is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb or 0.0, other["peak_rss_mb"])
+
+    def reset(self):
+        with self._lock:
+            self.timers, self.counters, self.histograms, self.samples = {}, {}, {}, {}
+            self.peak_rss_mb = None
+            self.started = time.time()
+
+    def report(self):
+        """Machine-readable summary of the run"""
+        self.sample_memory()
+        report = self.to_dict()
+        report["started"] = datetime.fromtimestamp(self.started).isoformat()
+        report["finished"] = datetime.now().isoformat()
+        report["wall_seconds"] = time.time() - self.started
+        return report
+
+    def write_report(self, path):
+        """Write report() as JSON"""
+        report = self.report()
+        write_text_atomic(path, json.dumps(report, indent=2, default=str))
+        return path
+
+    def write_prometheus(self, path, prefix=PROMETHEUS_PREFIX):
+        """Write the metrics in the Prometheus text format for the node exporter textfile collector
+
+        Per-symbol samples are left out to keep label cardinality bounded;
+        their distribution is in the histograms.
+        """
+        self.sample_memory()
+        data = self.to_dict()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each stage of the last run",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [f'{prefix}_stage_seconds{{stage="{_escape(name)}"}} {timer["seconds"]:.6f}'
+                  for name, timer in sorted(data["timers"].items())]
+        lines += [f"# HELP {prefix}_stage_calls Calls of each timed stage in the last run",
+                  f"# TYPE {prefix}_stage_calls gauge"]
+        lines += [f'{prefix}_stage_calls{{stage="{_escape(name)}"}} {timer["count"]}'
+                  for name, timer in sorted(data["timers"].items())]
+        for name, value in sorted(data["counters"].items()):
+            metric = f"{prefix}_{_metric_name(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        for name, histogram in sorted(data["histograms"].items()):
+            metric = f"{prefix}_{_metric_name(name)}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"] + ["+Inf"], histogram["counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines += [f"{metric}_sum {histogram['sum']:.6f}", f"{metric}_count {histogram['count']}"]
+        if data["peak_rss_mb"] is not None:
+            lines += [f"# TYPE {prefix}_peak_rss_bytes gauge",
+                      f"{prefix}_peak_rss_bytes {int(data['peak_rss_mb'] * 1024 * 1024)}"]
+        lines += [f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+                  f"{prefix}_last_run_timestamp_seconds {time.time():.0f}",
+                  f"# TYPE {prefix}_last_run_duration_seconds gauge",
+                  f"{prefix}_last_run_duration_seconds {time.time() - self.started:.3f}"]
+        # The textfile collector may read at any time, so never expose a partial file
+        write_text_atomic(path, "\n".join(lines) + "\n")
+        return path
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide metrics for the current run
+METRICS = RunMetrics()
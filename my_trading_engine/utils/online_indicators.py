@@ -0,0 +1,454 @@
+import math
+from collections import deque
+import pandas as pd
+import numpy as np
+
+class _RollingWindow:
+    """Fixed-size window with running sums of the values' offsets from a shift
+
+    The shift is a value of the window, reset on each rebuild, so the
+    variance keeps its precision when the price is large next to its spread.
+    The sums are rebuilt from the window once per full pass so floating-point
+    drift stays bounded while updates remain O(1) amortized. NaNs are counted
+    rather than summed: as with pandas rolling, a window holding one is NaN
+    until it has left.
+    """
+
+    def __init__(self, size, values=()):
+        self.size = size
+        self.values = deque((float(v) for v in values), maxlen=size)
+        self._rebuild()
+
+    def _rebuild(self):
+        valid = [v for v in self.values if not math.isnan(v)]
+        self.shift = valid[-1] if valid else 0.0
+        self.total = math.fsum(v - self.shift for v in valid)
+        self.total_sq = math.fsum((v - self.shift) ** 2 for v in valid)
+        self.nans = len(self.values) - len(valid)
+        # Length of the run of equal values ending the window; a window of one value has zero spread
+        self._same = 0
+        for v in reversed(self.values):
+            if v != self.values[-1]:
+                break
+            self._same += 1
+        self._updates = 0
+
+    def push(self, x):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old - self.shift
+                self.total_sq -= (old - self.shift) ** 2
+        self._same = self._same + 1 if self.values and x == self.values[-1] else 1
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            if self.nans == min(len(self.values), self.size - 1):
+                # No other values left in the window: start the sums over from this one
+                self.shift, self.total, self.total_sq = x, 0.0, 0.0
+            self.total += x - self.shift
+            self.total_sq += (x - self.shift) ** 2
+        self.values.append(x)
+        self._updates += 1
+        if self._updates >= self.size:
+            self._rebuild()
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        if not self.full or self.nans:
+            return np.nan
+        return self.shift + self.total / self.size
+
+    def std(self):
+        """Sample standard deviation (ddof=1), as pandas rolling std"""
+        if not self.full or self.nans or self.size < 2:
+            return np.nan
+        if self._same >= self.size:
+            return 0.0
+        var = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class OnlineSMA:
+    """Simple moving average updated one bar at a time; matches Indicators.add_sma"""
+
+    def __init__(self, period=50):
+        self.period = period
+        self.window = _RollingWindow(period)
+        self.value = np.nan
+
+    @property
+    def name(self):
+        return f'SMA_{self.period}'
+
+    def update(self, x):
+        self.window.push(float(x))
+        self.value = self.window.mean()
+        return self.value
+
+    def seed(self, df, column='close'):
+        """Initialize from the tail of a historical frame"""
+        self.window = _RollingWindow(self.period, df[column].to_numpy(dtype=float)[-self.period:])
+        self.value = self.window.mean()
+        return self
+
+    def values(self):
+        return {self.name: self.value}
+
+    def snapshot(self):
+        return {"period": self.period, "window": list(self.window.values)}
+
+    @classmethod
+    def restore(cls, state):
+        ind = cls(state["period"])
+        ind.window = _RollingWindow(ind.period, state["window"])
+        ind.value = ind.window.mean()
+        return ind
+
+
+class OnlineEMA:
+    """Exponential moving average (adjust=False); matches Indicators.add_ema
+
+    Missing prices hold the average, and the next price is weighed against
+    the average decayed over the gap, as pandas ewm does with ignore_na=False.
+    """
+
+    def __init__(self, period=20):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = np.nan
+        self.gap = 0  # Missing prices since the last one seen
+
+    @property
+    def name(self):
+        return f'EMA_{self.period}'
+
+    def update(self, x):
+        x = float(x)
+        if math.isnan(x):
+            if not math.isnan(self.value):
+                self.gap += 1
+        elif math.isnan(self.value):
+            self.value = x
+        else:
+            old_weight = (1 - self.alpha) ** (self.gap + 1)
+            if self.alpha == 0.5:
+                # pandas ewm (span=3) gives the new price all the weight the average lost over the gap
+                self.value = old_weight * self.value + (1 - old_weight) * x
+            else:
+                self.value = (old_weight * self.value + self.alpha * x) / (old_weight + self.alpha)
+            self.gap = 0
+        return self.value
+
+    def _seed(self, prices):
+        """Set the state from the ewm of a price Series, returning the ewm"""
+        ema = prices.ewm(span=self.period, adjust=False).mean()
+        self.value = float(ema.iloc[-1]) if len(prices) else np.nan
+        self.gap = _trailing_nans(prices) if not math.isnan(self.value) else 0
+        return ema
+
+    def seed(self, df, column='close'):
+        self._seed(df[column])
+        return self
+
+    def values(self):
+        return {self.name: self.value}
+
+    def snapshot(self):
+        return {"period": self.period, "value": self.value, "gap": self.gap}
+
+    @classmethod
+    def restore(cls, state):
+        ind = cls(state["period"])
+        ind.value = state["value"]
+        ind.gap = state.get("gap", 0)
+        return ind
+
+
+class OnlineMACD:
+    """MACD line, signal and histogram from recursive EMAs; matches Indicators.add_macd"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = OnlineEMA(fast)
+        self.slow = OnlineEMA(slow)
+        self.signal = OnlineEMA(signal)
+        self.macd = np.nan
+
+    def update(self, x):
+        self.macd = self.fast.update(x) - self.slow.update(x)
+        self.signal.update(self.macd)
+        return self.macd
+
+    def seed(self, df, column='close'):
+        if len(df):
+            macd = self.fast._seed(df[column]) - self.slow._seed(df[column])
+            self.signal._seed(macd)
+            self.macd = float(macd.iloc[-1])
+        return self
+
+    def values(self):
+        return {
+            'MACD': self.macd,
+            'MACD_signal': self.signal.value,
+            'MACD_hist': self.macd - self.signal.value,
+        }
+
+    def snapshot(self):
+        return {
+            "fast": self.fast.snapshot(),
+            "slow": self.slow.snapshot(),
+            "signal": self.signal.snapshot(),
+            "macd": self.macd,
+        }
+
+    @classmethod
+    def restore(cls, state):
+        ind = cls()
+        ind.fast = OnlineEMA.restore(state["fast"])
+        ind.slow = OnlineEMA.restore(state["slow"])
+        ind.signal = OnlineEMA.restore(state["signal"])
+        ind.macd = state["macd"]
+        return ind
+
+
+class OnlineRSI:
+    """Relative Strength Index updated one bar at a time
+
+    smoothing="sma" averages gains and losses over a rolling window, matching
+    Indicators.add_rsi. smoothing="wilder" uses Wilder's recursive average
+    after the first full window.
+    """
+
+    def __init__(self, period=14, smoothing="sma"):
+        if smoothing not in ("sma", "wilder"):
+            raise ValueError(f"Unknown RSI smoothing {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.gains = _RollingWindow(period)
+        self.losses = _RollingWindow(period)
+        self.avg_gain = np.nan
+        self.avg_loss = np.nan
+        self.prev_close = np.nan
+        self.value = np.nan
+
+    def update(self, close):
+        close = float(close)
+        # The first bar has no change and counts as zero gain and zero loss
+        delta = 0.0 if math.isnan(self.prev_close) else close - self.prev_close
+        self.prev_close = close
+        # A change from or to a missing close counts as zero, as in Indicators.add_rsi
+        gain, loss = (delta if delta > 0 else 0.0), (-delta if delta < 0 else 0.0)
+
+        if self.smoothing == "wilder" and not math.isnan(self.avg_gain):
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        else:
+            self.gains.push(gain)
+            self.losses.push(loss)
+            self.avg_gain = self.gains.mean()
+            self.avg_loss = self.losses.mean()
+
+        self.value = self._rsi()
+        return self.value
+
+    def _rsi(self):
+        if math.isnan(self.avg_gain):
+            return np.nan
+        if self.avg_loss == 0:
+            # Same result as 100 - 100 / (1 + inf), or NaN when both are zero
+            return np.nan if self.avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+    def seed(self, df, column='close'):
+        closes = df[column].to_numpy(dtype=float)
+        if self.smoothing == "wilder":
+            for close in closes:
+                self.update(close)
+            return self
+        tail = np.diff(closes, prepend=np.nan)[-self.period:]
+        self.gains = _RollingWindow(self.period, np.where(tail > 0, tail, 0.0))
+        self.losses = _RollingWindow(self.period, np.where(tail < 0, -tail, 0.0))
+        self.avg_gain = self.gains.mean()
+        self.avg_loss = self.losses.mean()
+        self.prev_close = float(closes[-1]) if len(closes) else np.nan
+        self.value = self._rsi()
+        return self
+
+    def values(self):
+        return {'RSI': self.value}
+
+    def snapshot(self):
+        return {
+            "period": self.period,
+            "smoothing": self.smoothing,
+            "gains": list(self.gains.values),
+            "losses": list(self.losses.values),
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+            "prev_close": self.prev_close,
+        }
+
+    @classmethod
+    def restore(cls, state):
+        ind = cls(state["period"], state["smoothing"])
+        ind.gains = _RollingWindow(ind.period, state["gains"])
+        ind.losses = _RollingWindow(ind.period, state["losses"])
+        ind.avg_gain = state["avg_gain"]
+        ind.avg_loss = state["avg_loss"]
+        ind.prev_close = state["prev_close"]
+        ind.value = ind._rsi()
+        return ind
+
+
+class OnlineBollinger:
+    """Bollinger Bands from a running mean and variance; matches Indicators.add_bollinger_bands"""
+
+    def __init__(self, period=20, std_dev=2):
+        self.period = period
+        self.std_dev = std_dev
+        self.window = _RollingWindow(period)
+
+    def update(self, x):
+        self.window.push(float(x))
+        return self.values()
+
+    def seed(self, df, column='close'):
+        self.window = _RollingWindow(self.period, df[column].to_numpy(dtype=float)[-self.period:])
+        return self
+
+    def values(self):
+        middle = self.window.mean()
+        std = self.window.std()
+        return {
+            'BB_middle': middle,
+            'BB_upper': middle + std * self.std_dev,
+            'BB_lower': middle - std * self.std_dev,
+        }
+
+    def snapshot(self):
+        return {"period": self.period, "std_dev": self.std_dev, "window": list(self.window.values)}
+
+    @classmethod
+    def restore(cls, state):
+        ind = cls(state["period"], state["std_dev"])
+        ind.window = _RollingWindow(ind.period, state["window"])
+        return ind
+
+
+class OnlineATR:
+    """Average True Range keeping the previous close as state; matches Indicators.add_atr"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.window = _RollingWindow(period)
+        self.prev_close = np.nan
+        self.value = np.nan
+
+    def update(self, high, low, close):
+        high, low, close = float(high), float(low), float(close)
+        # Largest of the ranges that are not missing, as np.fmax in Indicators.add_atr
+        ranges = [r for r in (abs(high - low), abs(high - self.prev_close), abs(low - self.prev_close))
+                  if not math.isnan(r)]
+        tr = max(ranges) if ranges else np.nan
+        self.prev_close = close
+        self.window.push(tr)
+        self.value = self.window.mean()
+        return self.value
+
+    def seed(self, df):
+        high = df['high'].to_numpy(dtype=float)[-self.period - 1:]
+        low = df['low'].to_numpy(dtype=float)[-self.period - 1:]
+        close = df['close'].to_numpy(dtype=float)[-self.period - 1:]
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        tr = np.fmax(np.abs(high - low), np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        # The oldest bar only provides the previous close unless it is the first bar of the frame
+        if len(df) > self.period:
+            tr = tr[1:]
+        self.window = _RollingWindow(self.period, tr)
+        self.prev_close = float(close[-1]) if len(close) else np.nan
+        self.value = self.window.mean()
+        return self
+
+    def values(self):
+        return {'ATR': self.value}
+
+    def snapshot(self):
+        return {"period": self.period, "window": list(self.window.values), "prev_close": self.prev_close}
+
+    @classmethod
+    def restore(cls, state):
+        ind = cls(state["period"])
+        ind.window = _RollingWindow(ind.period, state["window"])
+        ind.prev_close = state["prev_close"]
+        ind.value = ind.window.mean()
+        return ind
+
+
+def _trailing_nans(values):
+    """Number of NaNs at the end of a Series"""
+    present = np.flatnonzero(values.notna().to_numpy())
+    return len(values) - int(present[-1]) - 1 if len(present) else len(values)
+
+
+# Indicators that read the whole bar rather than a single price column
+_BAR_INDICATORS = (OnlineATR,)
+
+_INDICATOR_TYPES = {
+    cls.__name__: cls
+    for cls in (OnlineSMA, OnlineEMA, OnlineMACD, OnlineRSI, OnlineBollinger, OnlineATR)
+}
+
+
+class OnlineIndicatorSet:
+    """A group of online indicators for one symbol, fed one bar at a time
+
+    update() returns the latest values under the same column names the batch
+    Indicators methods use (SMA_20, MACD, RSI, BB_upper, ATR, ...).
+    """
+
+    def __init__(self, indicators, column='close'):
+        self.indicators = list(indicators)
+        self.column = column
+
+    def update(self, bar):
+        """Ingest one bar (a dict or Series with open/high/low/close)"""
+        for ind in self.indicators:
+            if isinstance(ind, _BAR_INDICATORS):
+                ind.update(bar['high'], bar['low'], bar['close'])
+            else:
+                ind.update(bar[self.column])
+        return self.values()
+
+    def seed(self, df):
+        """Initialize every indicator from a historical frame"""
+        for ind in self.indicators:
+            if isinstance(ind, _BAR_INDICATORS):
+                ind.seed(df)
+            else:
+                ind.seed(df, column=self.column)
+        return self
+
+    def values(self):
+        values = {}
+        for ind in self.indicators:
+            values.update(ind.values())
+        return values
+
+    def snapshot(self):
+        """JSON-serializable state of every indicator"""
+        return {
+            "column": self.column,
+            "indicators": [{"type": type(ind).__name__, "state": ind.snapshot()} for ind in self.indicators],
+        }
+
+    @classmethod
+    def restore(cls, state):
+        return cls(
+            [_INDICATOR_TYPES[item["type"]].restore(item["state"]) for item in state["indicators"]],
+            column=state["column"],
+        )
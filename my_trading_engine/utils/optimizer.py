@@ -0,0 +1,181 @@
+import itertools
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from utils.backtest import backtest_metrics
+
+METRICS = ["total_return", "max_drawdown", "sharpe", "trades", "win_rate"]
+
+# Columns the strategies read; only these are shipped to worker processes
+SWEEP_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def parameter_grid(space):
+    """Every combination of a {name: [values]} space"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def _draw(spec, u):
+    """Map uniform draws in [0, 1) onto a parameter spec
+
+    A list is a set of choices; a (low, high) tuple is a range, integer-valued
+    when both ends are ints.
+    """
+    if isinstance(spec, tuple) and len(spec) == 2:
+        low, high = spec
+        if isinstance(low, int) and isinstance(high, int):
+            return [int(v) for v in np.floor(low + u * (high - low + 1))]
+        return [float(v) for v in low + u * (high - low)]
+    choices = list(spec)
+    return [choices[int(i)] for i in np.floor(u * len(choices))]
+
+
+def random_sample(space, n, seed=None):
+    """n random points of a parameter space"""
+    rng = np.random.default_rng(seed)
+    columns = {name: _draw(spec, rng.random(n)) for name, spec in space.items()}
+    return [{name: columns[name][i] for name in space} for i in range(n)]
+
+
+def latin_hypercube(space, n, seed=None):
+    """n points of a parameter space with one draw per stratum of every parameter"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, spec in space.items():
+        u = (rng.permutation(n) + rng.random(n)) / n
+        columns[name] = _draw(spec, u)
+    return [{name: columns[name][i] for name in space} for i in range(n)]
+
+
+def _split(params):
+    """Split {"entry.x": .., "exit.y": ..} into (entry_params, exit_params)"""
+    entry, exit_ = {}, {}
+    for name, value in params.items():
+        prefix, _, key = name.partition('.')
+        if prefix == 'entry':
+            entry[key] = value
+        elif prefix == 'exit':
+            exit_[key] = value
+        else:
+            raise ValueError(f"Parameter {name} must start with 'entry.' or 'exit.'")
+    return entry, exit_
+
+
+def _key(params):
+    return tuple(sorted(params.items()))
+
+
+def _combinations(space, method="grid", n_samples=100, seed=None, constraint=None):
+    """Sample a space into (entry_sets, exit_sets, pairs)
+
+    Parameter sets are deduplicated so each is generated once per symbol;
+    pairs are (entry set, exit set) positions of the distinct combinations.
+    """
+    if method == "grid":
+        points = parameter_grid(space)
+    elif method == "random":
+        points = random_sample(space, n_samples, seed)
+    elif method == "lhs":
+        points = latin_hypercube(space, n_samples, seed)
+    else:
+        raise ValueError(f"Unknown sampling method {method}")
+
+    entry_index, exit_index, pairs, seen = {}, {}, [], set()
+    for point in points:
+        entry_params, exit_params = _split(point)
+        if constraint is not None and not constraint(entry_params, exit_params):
+            continue
+        i = entry_index.setdefault(_key(entry_params), len(entry_index))
+        k = exit_index.setdefault(_key(exit_params), len(exit_index))
+        if (i, k) not in seen:
+            seen.add((i, k))
+            pairs.append((i, k))
+    entry_sets = [dict(key) for key in entry_index]
+    exit_sets = [dict(key) for key in exit_index]
+    return entry_sets, exit_sets, pairs
+
+
+def _signal_arrays(frame, columns):
+    return tuple(frame[c].to_numpy() for c in columns)
+
+
+def _evaluate_chunk(entry_cls, exit_cls, entry_sets, exit_sets, pairs, frames):
+    """Evaluate every combination on a chunk of symbols
+
+    Entry and exit signals are generated once per distinct parameter set and
+    symbol, then combined; indicators shared between sets (the same SMA window
+    or ATR period) come from the indicator cache.
+    """
+    results = np.full((len(pairs), len(frames), len(METRICS)), np.nan)
+    for s, df in enumerate(frames):
+        open_prices = df['open'].to_numpy(dtype=float)
+        entries = [_signal_arrays(entry_cls(**p).generate_signal(df), ('entry_long', 'entry_short'))
+                   for p in entry_sets]
+        exits = [_signal_arrays(exit_cls(**p).generate_signal(df), ('exit_long', 'exit_short'))
+                 for p in exit_sets]
+        for c, (i, k) in enumerate(pairs):
+            metrics = backtest_metrics(open_prices, *entries[i], *exits[k])
+            results[c, s] = [metrics[m] for m in METRICS]
+    return results
+
+
+def run_sweep(entry_cls, exit_cls, data, space, method="grid", n_samples=100, seed=None,
+              constraint=None, metric="sharpe", workers=None, chunk_size=None, output_path=None):
+    """Evaluate entry/exit parameter combinations across a universe and rank them
+
+    space maps "entry.<param>" / "exit.<param>" names to a list of values (or,
+    for random and "lhs" sampling, a (low, high) range). constraint is an
+    optional predicate on (entry_params, exit_params), e.g. fast < slow.
+    Symbols are split into chunks evaluated on a process pool; every chunk
+    evaluates all combinations so signals are shared between them.
+
+    Returns the ranked results table, one row per combination, and writes it
+    as CSV when output_path is given.
+    """
+    entry_sets, exit_sets, pairs = _combinations(space, method, n_samples, seed, constraint)
+
+    symbols = [symbol for symbol, df in data.items() if not df.empty]
+    frames = [data[symbol][[c for c in SWEEP_COLUMNS if c in data[symbol].columns]] for symbol in symbols]
+
+    workers = workers or 1
+    chunk_size = chunk_size or max(1, -(-len(frames) // (workers * 4)))
+    chunks = [frames[i:i + chunk_size] for i in range(0, len(frames), chunk_size)]
+
+    args = (entry_cls, exit_cls, entry_sets, exit_sets, pairs)
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_evaluate_chunk, *zip(*[args + (chunk,) for chunk in chunks])))
+    else:
+        outputs = [_evaluate_chunk(*args, chunk) for chunk in chunks]
+
+    # combinations x symbols x metrics
+    results = np.concatenate(outputs, axis=1) if outputs else np.empty((len(pairs), 0, len(METRICS)))
+
+    rows = []
+    with warnings.catch_warnings():
+        # Combinations with no valid symbol give NaN rather than a warning
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for c, (i, k) in enumerate(pairs):
+            row = {f"entry.{name}": value for name, value in entry_sets[i].items()}
+            row.update({f"exit.{name}": value for name, value in exit_sets[k].items()})
+            for m, name in enumerate(METRICS):
+                row[name] = np.nanmean(results[c, :, m]) if results.shape[1] else np.nan
+            row["median_total_return"] = np.nanmedian(results[c, :, 0]) if results.shape[1] else np.nan
+            row["symbols"] = len(symbols)
+            rows.append(row)
+
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        # Higher is better for every metric (drawdowns are negative)
+        table = table.sort_values(metric, ascending=False, na_position='last').reset_index(drop=True)
+        table.insert(0, "rank", np.arange(1, len(table) + 1))
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        table.to_csv(output_path, index=False)
+
+    return table
+
@@ -0,0 +1,153 @@
+import pandas as pd
+import numpy as np
+
+class Panel:
+    """OHLCV bars for a whole universe as dates x symbols arrays.
+
+    Every field is a 2-D array with one row per date of the common calendar
+    and one column per symbol. Bars a symbol does not have (before listing,
+    after delisting, halts) are NaN; mask marks the bars that exist.
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, dates, symbols, fields):
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = list(symbols)
+        self.fields = dict(fields)
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_frames(cls, data, fields=FIELDS, dtype=np.float64):
+        """Align a {symbol: DataFrame} dict on the union of their dates"""
+        symbols = [symbol for symbol, df in data.items() if not df.empty]
+        if symbols:
+            # Union of all calendars in one pass rather than pairwise unions
+            first = data[symbols[0]].index
+            dates = first.append([data[symbol].index for symbol in symbols[1:]]).unique().sort_values()
+        else:
+            dates = pd.DatetimeIndex([])
+
+        arrays = {field: np.full((len(dates), len(symbols)), np.nan, dtype=dtype) for field in fields}
+        for j, symbol in enumerate(symbols):
+            df = data[symbol]
+            rows = dates.get_indexer(df.index)
+            for field in fields:
+                if field in df.columns:
+                    arrays[field][rows, j] = df[field].to_numpy()
+
+        return cls(dates, symbols, arrays)
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def __contains__(self, field):
+        return field in self.fields
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    @property
+    def mask(self):
+        """True where a symbol has a bar on a date"""
+        return ~np.isnan(self.fields['close'])
+
+    def column(self, symbol):
+        return self._columns[symbol]
+
+    def frame(self, field):
+        """One field as a dates x symbols DataFrame"""
+        return pd.DataFrame(self.fields[field], index=self.dates, columns=self.symbols)
+
+    def to_frame(self, symbol, extra=None):
+        """Bars for one symbol as a regular per-symbol DataFrame
+
+        extra is an optional {name: 2-D array} dict (e.g. panel signals) whose
+        column for the symbol is included.
+        """
+        j = self._columns[symbol]
+        columns = {field: values[:, j] for field, values in self.fields.items()}
+        if extra:
+            columns.update({name: values[:, j] for name, values in extra.items()})
+        df = pd.DataFrame(columns, index=self.dates)
+        return df[self.mask[:, j]]
+
+
+class PanelIndicators:
+    """Indicators over a Panel (or any dates x symbols array), all symbols in one pass
+
+    Values match the per-symbol Indicators for symbols that trade on every
+    date of the calendar between their first and last bar. A missing bar in
+    the middle of a series makes the rolling windows (SMA, RSI, Bollinger
+    bands, ATR) containing it NaN. EMA and MACD do not go NaN: the missing
+    date repeats the previous value, and later values decay the earlier
+    average over the gap as well, so they differ from the per-symbol values
+    until the gap has decayed out.
+    """
+
+    @staticmethod
+    def sma(values, period=50):
+        return pd.DataFrame(values, copy=False).rolling(window=period).mean().to_numpy()
+
+    @staticmethod
+    def ema(values, period=20):
+        return pd.DataFrame(values, copy=False).ewm(span=period, adjust=False).mean().to_numpy()
+
+    @staticmethod
+    def macd(values, fast=12, slow=26, signal=9):
+        """MACD line, signal line and histogram"""
+        macd = PanelIndicators.ema(values, fast) - PanelIndicators.ema(values, slow)
+        macd_signal = PanelIndicators.ema(macd, signal)
+        return macd, macd_signal, macd - macd_signal
+
+    @staticmethod
+    def rsi(values, period=14):
+        delta = np.diff(values, axis=0, prepend=np.nan)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = PanelIndicators.sma(gain, period) / PanelIndicators.sma(loss, period)
+            return 100 - (100 / (1 + rs))
+
+    @staticmethod
+    def bollinger_bands(values, period=20, std_dev=2):
+        """Middle, upper and lower bands"""
+        rolling = pd.DataFrame(values, copy=False).rolling(window=period)
+        middle = rolling.mean().to_numpy()
+        std = rolling.std().to_numpy()
+        return middle, middle + (std * std_dev), middle - (std * std_dev)
+
+    @staticmethod
+    def atr(panel, period=14):
+        high, low, close = panel['high'], panel['low'], panel['close']
+        prev_close = shift(close)
+        tr = np.fmax(np.abs(high - low), np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        # Keep dates without a bar empty rather than treating them as zero range
+        tr[np.isnan(close)] = np.nan
+        return PanelIndicators.sma(tr, period)
+
+    @staticmethod
+    def cummax(values):
+        """Running maximum per symbol, ignoring missing bars"""
+        return np.fmax.accumulate(values, axis=0)
+
+    @staticmethod
+    def cummin(values):
+        """Running minimum per symbol, ignoring missing bars"""
+        return np.fmin.accumulate(values, axis=0)
+
+
+def shift(values, periods=1):
+    """Shift a dates x symbols array down by periods rows, filling with NaN"""
+    out = np.full(values.shape, np.nan)
+    out[periods:] = values[:-periods]
+    return out
+
+
+def diff(values):
+    """Change from the previous date, zero on the first row (like .diff().fillna(0))"""
+    values = np.asarray(values, dtype=float)
+    change = np.zeros(values.shape)
+    change[1:] = values[1:] - values[:-1]
+    return np.nan_to_num(change, nan=0.0)
@@ -0,0 +1,176 @@
+import pandas as pd
+import numpy as np
+from config import STRATEGY_CONFIG
+
+TRADING_DAYS = 252
+
+# Why a position was closed, as stored in the trade log
+EXIT_REASONS = {0: "signal", 1: "stop_loss", 2: "take_profit", 3: "open"}
+
+
+def simulate_portfolio(panel, entry, exit, score=None, initial_capital=100000.0, max_positions=None,
+                       allocation=None, stop_loss=None, take_profit=None, commission=0.0):
+    """Simulate a long-only portfolio over a whole universe
+
+    entry and exit are dates x symbols boolean arrays (e.g. from
+    StrategyGraph.evaluate_panel). Signals on a date fill at the next date's
+    open, exits before entries so freed cash and slots can be reused. New
+    positions are sized at allocation of the portfolio's last close value,
+    limited by cash and max_positions; when there are more candidates than
+    slots, those with the highest score (a dates x symbols array, read on the
+    signal date) win, ties going to panel order. Stops and take-profits are
+    checked on each bar's range: a gap through the level fills at the open,
+    otherwise at the level, and a bar reaching both counts as a stop. None
+    takes the value from STRATEGY_CONFIG; 0 disables a stop or target.
+
+    The calendar is walked once with the state held as arrays over symbols,
+    so the cost is dates x (a few vector operations on the universe).
+    Returns {"equity", "cash", "exposure", "positions"} (Series by date),
+    "trades" (a DataFrame) and "metrics".
+    """
+    max_positions = STRATEGY_CONFIG["max_positions"] if max_positions is None else max_positions
+    allocation = STRATEGY_CONFIG["default_allocation"] if allocation is None else allocation
+    stop_loss = STRATEGY_CONFIG["default_stop_loss"] if stop_loss is None else stop_loss
+    take_profit = STRATEGY_CONFIG["default_take_profit"] if take_profit is None else take_profit
+
+    open_, high, low, close = panel['open'], panel['high'], panel['low'], panel['close']
+    entry = np.asarray(entry, dtype=bool)
+    exit = np.asarray(exit, dtype=bool)
+    if score is not None:
+        score = np.asarray(score, dtype=np.float64)
+    n_dates, n_symbols = panel.shape
+    order = np.arange(n_symbols)
+
+    shares = np.zeros(n_symbols)
+    entry_price = np.full(n_symbols, np.nan)
+    entry_date = np.full(n_symbols, -1)
+    held = np.zeros(n_symbols, dtype=bool)
+    last_close = np.full(n_symbols, np.nan)
+    cash = float(initial_capital)
+
+    equity = np.empty(n_dates)
+    cash_series = np.empty(n_dates)
+    exposure = np.empty(n_dates)
+    positions = np.empty(n_dates, dtype=np.int64)
+    trades = []  # (symbol, entry date, exit date, entry price, exit price, shares, reason)
+    value = cash
+
+    def close_positions(symbols, prices, t, reason):
+        nonlocal cash
+        proceeds = shares[symbols] * prices
+        cash += proceeds.sum() - commission * proceeds.sum()
+        for j, price in zip(symbols, prices):
+            trades.append((j, entry_date[j], t, entry_price[j], price, shares[j], reason))
+        held[symbols] = False
+        shares[symbols] = 0.0
+
+    for t in range(n_dates):
+        tradable = ~np.isnan(open_[t])
+
+        if t > 0:
+            # Exit signals from the previous date fill at this open
+            leaving = np.flatnonzero(held & exit[t - 1] & tradable)
+            if len(leaving):
+                close_positions(leaving, open_[t, leaving], t, 0)
+
+            # Entries from the previous date, best scores first
+            slots = max_positions - int(held.sum())
+            candidates = np.flatnonzero(entry[t - 1] & ~held & tradable)
+            if slots > 0 and len(candidates) and cash > 0:
+                if score is not None:
+                    ranks = np.lexsort((order[candidates], -np.nan_to_num(score[t - 1, candidates], nan=-np.inf)))
+                    candidates = candidates[ranks]
+                target = allocation * value
+                affordable = int(cash // (target * (1 + commission))) if target > 0 else 0
+                chosen = candidates[:min(slots, affordable)]
+                if len(chosen):
+                    prices = open_[t, chosen]
+                    shares[chosen] = target / prices
+                    entry_price[chosen] = prices
+                    entry_date[chosen] = t
+                    held[chosen] = True
+                    cash -= len(chosen) * target * (1 + commission)
+
+            # Stops and targets on this bar's range, for positions open during it
+            if stop_loss or take_profit:
+                open_now = np.flatnonzero(held & tradable)
+                if len(open_now):
+                    o, h, l = open_[t, open_now], high[t, open_now], low[t, open_now]
+                    stop = entry_price[open_now] * (1 - stop_loss) if stop_loss else np.full(len(open_now), -np.inf)
+                    target_price = entry_price[open_now] * (1 + take_profit) if take_profit else np.full(len(open_now), np.inf)
+                    stopped = l <= stop
+                    taken = ~stopped & (h >= target_price)
+                    if stopped.any():
+                        close_positions(open_now[stopped], np.where(o <= stop, o, stop)[stopped], t, 1)
+                    if taken.any():
+                        close_positions(open_now[taken], np.where(o >= target_price, o, target_price)[taken], t, 2)
+
+        # Mark to market at the close, holding the last price through missing bars
+        last_close = np.where(np.isnan(close[t]), last_close, close[t])
+        invested = float(np.nansum(shares[held] * last_close[held]))
+        value = cash + invested
+        equity[t] = value
+        cash_series[t] = cash
+        exposure[t] = invested / value if value > 0 else 0.0
+        positions[t] = int(held.sum())
+
+    # Positions still open are valued at the last close
+    for j in np.flatnonzero(held):
+        trades.append((j, entry_date[j], -1, entry_price[j], last_close[j], shares[j], 3))
+
+    index = panel.dates
+    equity = pd.Series(equity, index=index, name="equity")
+    return {
+        "equity": equity,
+        "cash": pd.Series(cash_series, index=index, name="cash"),
+        "exposure": pd.Series(exposure, index=index, name="exposure"),
+        "positions": pd.Series(positions, index=index, name="positions"),
+        "trades": _trade_log(trades, panel),
+        "metrics": portfolio_metrics(equity, exposure, initial_capital),
+    }
+
+
+def momentum_score(panel, lookback=20):
+    """Trailing lookback-bar return of each symbol, for ranking entry candidates"""
+    close = panel['close']
+    score = np.full(close.shape, np.nan)
+    score[lookback:] = close[lookback:] / close[:-lookback] - 1
+    return score
+
+
+def _trade_log(trades, panel):
+    columns = ['symbol', 'entry_date', 'exit_date', 'entry_price', 'exit_price', 'shares', 'return', 'exit_reason']
+    if not trades:
+        return pd.DataFrame(columns=columns)
+    symbol, entered, exited, entry_price, exit_price, shares, reason = (np.array(v) for v in zip(*trades))
+    dates = panel.dates
+    return pd.DataFrame({
+        'symbol': np.array(panel.symbols, dtype=object)[symbol],
+        'entry_date': dates[entered],
+        'exit_date': dates[np.maximum(exited, 0)].where(exited >= 0, pd.NaT),
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'shares': shares,
+        'return': exit_price / entry_price - 1,
+        'exit_reason': [EXIT_REASONS[r] for r in reason],
+    }).sort_values(['entry_date', 'symbol'], kind='stable').reset_index(drop=True)
+
+
+def portfolio_metrics(equity, exposure=None, initial_capital=None, periods_per_year=TRADING_DAYS):
+    """Total return, annualized return and volatility, Sharpe, max drawdown and average exposure"""
+    values = np.asarray(equity, dtype=float)
+    if len(values) == 0:
+        return {}
+    start = initial_capital if initial_capital is not None else values[0]
+    returns = np.diff(values, prepend=start) / np.concatenate(([start], values[:-1]))
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    years = len(values) / periods_per_year
+    total_return = values[-1] / start - 1
+    return {
+        "total_return": total_return,
+        "annual_return": (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else np.nan,
+        "volatility": std * np.sqrt(periods_per_year),
+        "sharpe": returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan,
+        "max_drawdown": (values / np.maximum.accumulate(values) - 1).min(),
+        "average_exposure": float(np.mean(exposure)) if exposure is not None else None,
+    }
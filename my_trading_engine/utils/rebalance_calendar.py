@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+
+FREQUENCIES = ('weekly', 'monthly', 'quarterly', 'yearly')
+
+
+def _days(index):
+    """Calendar day (datetime64[D]) of each bar"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy().astype('datetime64[D]')
+
+
+def period_keys(days, freq):
+    """Integer key of the week, month, quarter or year each day falls in"""
+    days = np.asarray(days, dtype='datetime64[D]')
+    if freq == 'weekly':
+        # The epoch was a Thursday; shift so weeks run Monday to Sunday
+        return (days.astype(np.int64) + 3) // 7
+    months = days.astype('datetime64[M]').astype(np.int64)
+    if freq == 'monthly':
+        return months
+    if freq == 'quarterly':
+        return months // 3
+    if freq == 'yearly':
+        return months // 12
+    raise ValueError(f"Unknown rebalance frequency {freq}")
+
+
+def parse_dates(dates):
+    """Sorted unique calendar days (datetime64[D]) from strings, Timestamps or dates"""
+    if dates is None:
+        return None
+    parsed = pd.DatetimeIndex([pd.Timestamp(d) for d in dates])
+    if parsed.tz is not None:
+        parsed = parsed.tz_localize(None)
+    return np.unique(parsed.to_numpy().astype('datetime64[D]'))
+
+
+def rebalance_days(index, freq='monthly', specific_dates=None):
+    """Boolean array marking the rebalance bars of an index
+
+    With specific_dates, the bars falling on one of those calendar days.
+    Otherwise the last bar of each period actually present in the index, so
+    a month ending on a holiday or weekend rebalances on its last trading
+    day. The final bar only counts once its period is over, i.e. when the
+    next business day starts a new period.
+    """
+    days = _days(index)
+    if specific_dates is not None:
+        return np.isin(days, specific_dates)
+
+    marks = np.zeros(len(days), dtype=bool)
+    if not len(days):
+        return marks
+    keys = period_keys(days, freq)
+    marks[:-1] = keys[1:] != keys[:-1]
+
+    last = pd.Timestamp(days[-1])
+    next_day = np.array([(last + pd.offsets.BDay(1)).to_datetime64()], dtype='datetime64[D]')
+    marks[-1] = period_keys(next_day, freq)[0] != keys[-1]
+    return marks
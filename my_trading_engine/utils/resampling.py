@@ -0,0 +1,183 @@
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.stats import TRADING_DAYS, SHARPE_PERIODS
+
+METHODS = ("stationary", "block", "iid")
+STATISTICS = ("sharpe", "total_return", "max_drawdown")
+
+# Resamples are generated and reduced this many cells (resamples x bars) at a
+# time, which bounds memory at a few times 8 MB whatever n_resamples is
+MAX_BATCH_CELLS = 1_000_000
+
+
+def stationary_indices(n, n_resamples, mean_block, rng):
+    """Stationary bootstrap (Politis-Romano) positions, n_resamples x n
+
+    Blocks start at random positions and have geometric lengths with mean
+    mean_block, wrapping around the end of the series.
+    """
+    new_block = rng.random((n_resamples, n)) < 1.0 / mean_block
+    new_block[:, 0] = True
+    starts = rng.integers(0, n, size=(n_resamples, n))
+    steps = np.arange(n)
+    # Position where each bar's block began, carried forward along every row
+    began = np.maximum.accumulate(np.where(new_block, steps, 0), axis=1)
+    return (np.take_along_axis(starts, began, axis=1) + steps - began) % n
+
+
+def block_indices(n, n_resamples, block, rng):
+    """Circular moving-block bootstrap positions, n_resamples x n, blocks of fixed length"""
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n, size=(n_resamples, n_blocks))
+    return ((starts[:, :, None] + np.arange(block)).reshape(n_resamples, -1)[:, :n]) % n
+
+
+def resample_indices(n, n_resamples, method="stationary", block=20, rng=None):
+    if method == "stationary":
+        return stationary_indices(n, n_resamples, block, rng)
+    if method == "block":
+        return block_indices(n, n_resamples, block, rng)
+    if method == "iid":
+        return rng.integers(0, n, size=(n_resamples, n))
+    raise ValueError(f"Unknown resampling method {method}")
+
+
+def path_statistics(returns, risk_free_rate=0.03, periods_per_year=TRADING_DAYS):
+    """Sharpe, total return and max drawdown of each row of a resamples x bars return array"""
+    daily_rf = (1 + risk_free_rate) ** (1 / periods_per_year) - 1
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    std = returns.std(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, (returns.mean(axis=1) - daily_rf) / std * np.sqrt(periods_per_year), np.nan)
+    return {
+        "sharpe": sharpe,
+        "total_return": equity[:, -1] - 1,
+        "max_drawdown": np.minimum((equity / peak - 1).min(axis=1), 0.0),
+    }
+
+
+def _intervals(estimates, samples, confidence):
+    """Percentile intervals of each statistic's resampled distribution"""
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    with warnings.catch_warnings():
+        # All-NaN statistics (flat series) give NaN bounds
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for name, values in samples.items():
+            lower, upper = np.nanpercentile(values, [tail, 100 - tail])
+            intervals[name] = {"estimate": estimates[name][0], "lower": lower, "upper": upper,
+                               "std": np.nanstd(values, ddof=1)}
+    return intervals
+
+
+def bootstrap_returns(returns, method="stationary", n_resamples=2000, block=20, confidence=0.95,
+                      seed=None, risk_free_rate=0.03):
+    """Confidence intervals for Sharpe, total return and max drawdown of a return series
+
+    Resamples the bar returns with a stationary (geometric block lengths of
+    mean block), fixed-length circular block or "iid" bootstrap, keeping the
+    autocorrelation and volatility clustering within blocks. All resamples
+    are drawn as one resamples x bars array (in batches of MAX_BATCH_CELLS)
+    from a generator seeded by seed, so the same seed gives the same
+    intervals. NaN returns are dropped first.
+
+    Returns {statistic: {"estimate", "lower", "upper", "std"}}, the estimate
+    being the statistic of the original series.
+    """
+    rng = np.random.default_rng(seed)
+    returns = np.asarray(returns, dtype=np.float64)
+    returns = returns[~np.isnan(returns)]
+    if len(returns) < 2:
+        return {name: {"estimate": np.nan, "lower": np.nan, "upper": np.nan, "std": np.nan} for name in STATISTICS}
+
+    samples = {name: [] for name in STATISTICS}
+    batch = max(1, MAX_BATCH_CELLS // len(returns))
+    for done in range(0, n_resamples, batch):
+        rows = resample_indices(len(returns), min(batch, n_resamples - done), method, block, rng)
+        for name, values in path_statistics(returns[rows], risk_free_rate).items():
+            samples[name].append(values)
+
+    samples = {name: np.concatenate(values) for name, values in samples.items()}
+    return _intervals(path_statistics(returns[None, :], risk_free_rate), samples, confidence)
+
+
+def reshuffle_trades(trade_returns, n_resamples=2000, replace=False, confidence=0.95, seed=None,
+                     risk_free_rate=0.0):
+    """Monte Carlo trade reshuffling: intervals from random orderings of a trade list
+
+    Without replace, every resample is a permutation of the same trades, so
+    total return and per-trade Sharpe are fixed and the interval that matters
+    is the max drawdown's: how deep the drawdown could have been had the same
+    trades come in another order. With replace, trades are drawn with
+    replacement and every statistic varies. Sharpe here is per trade
+    annualized as if one trade were one bar; compare it between runs rather
+    than with bar Sharpe ratios.
+    """
+    rng = np.random.default_rng(seed)
+    trade_returns = np.asarray(trade_returns, dtype=np.float64)
+    trade_returns = trade_returns[~np.isnan(trade_returns)]
+    if len(trade_returns) < 2:
+        return {name: {"estimate": np.nan, "lower": np.nan, "upper": np.nan, "std": np.nan} for name in STATISTICS}
+
+    samples = {name: [] for name in STATISTICS}
+    n = len(trade_returns)
+    batch = max(1, MAX_BATCH_CELLS // n)
+    for done in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - done)
+        if replace:
+            rows = rng.integers(0, n, size=(size, n))
+        else:
+            # One random permutation per row
+            rows = np.argsort(rng.random((size, n)), axis=1)
+        for name, values in path_statistics(trade_returns[rows], risk_free_rate).items():
+            samples[name].append(values)
+
+    samples = {name: np.concatenate(values) for name, values in samples.items()}
+    return _intervals(path_statistics(trade_returns[None, :], risk_free_rate), samples, confidence)
+
+
+def bootstrap_stats(df, periods=SHARPE_PERIODS, column='close', **kwargs):
+    """Bootstrap intervals over the last p bars of a frame's returns, for each period
+
+    The interval counterpart of compute_sharpe's point estimates: returns
+    {"90d": {statistic: {...}}, ...}; kwargs go to bootstrap_returns.
+    """
+    close = df[column].to_numpy(dtype=np.float64)
+    returns = close[1:] / close[:-1] - 1
+    return {f"{p}d": bootstrap_returns(returns[-p:], **kwargs) for p in periods}
+
+
+def _bootstrap_chunk(closes, seeds, periods, kwargs):
+    results = []
+    for close, seed in zip(closes, seeds):
+        returns = close[1:] / close[:-1] - 1
+        results.append({f"{p}d": bootstrap_returns(returns[-p:], seed=seed, **kwargs) for p in periods})
+    return results
+
+
+def bootstrap_universe(data, periods=SHARPE_PERIODS, column='close', seed=None, workers=None,
+                       chunk_size=None, **kwargs):
+    """bootstrap_stats for every symbol of a {symbol: DataFrame} dict
+
+    Each symbol gets its own generator spawned from seed, so results do not
+    depend on how symbols are split between workers. Chunks of symbols run
+    on a process pool when workers > 1.
+    """
+    symbols = [symbol for symbol, df in data.items() if not df.empty]
+    closes = [data[symbol][column].to_numpy(dtype=np.float64) for symbol in symbols]
+    seeds = np.random.SeedSequence(seed).spawn(len(symbols))
+
+    workers = workers or 1
+    chunk_size = chunk_size or max(1, -(-len(symbols) // (workers * 4)))
+    chunks = [(closes[i:i + chunk_size], seeds[i:i + chunk_size]) for i in range(0, len(symbols), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_bootstrap_chunk, *zip(*chunks), [periods] * len(chunks),
+                                        [kwargs] * len(chunks)))
+    else:
+        outputs = [_bootstrap_chunk(c, s, periods, kwargs) for c, s in chunks]
+
+    return dict(zip(symbols, [result for output in outputs for result in output]))
@@ -1,56 +1,161 @@
+import warnings
 import pandas as pd
 import numpy as np
+from utils.indicator_cache import data_fingerprint
+
+TRADING_DAYS = 252
+SHARPE_PERIODS = (90, 180, 360)
+SPARK_BARS = 30
 
-def compute_returns(df):
-    df = df.copy()
-    df['returns'] = df['close'].pct_change()
-    df['cum_returns'] = (1 + df['returns']).cumprod()
 
-    now = df.index[-1]
-    lookup = {
+def horizon_dates(now):
+    """Start date of each return horizon, ending at now"""
+    return {
         "1d": now - pd.Timedelta(days=1),
         "1w": now - pd.Timedelta(days=7),
         "1m": now - pd.DateOffset(months=1),
         "3m": now - pd.DateOffset(months=3),
-        "ytd": pd.Timestamp(f"{now.year}-01-01")
+        # Same timezone as now, so tz-aware indexes can be searched
+        "ytd": pd.Timestamp(year=now.year, month=1, day=1, tz=now.tz)
     }
 
-    result = {}
-    for label, ts in lookup.items():
-        past = df[df.index <= ts]
-        if not past.empty:
-            base = past.iloc[-1]["cum_returns"]
-            result[label] = df.iloc[-1]["cum_returns"] / base - 1
-        else:
-            result[label] = None
 
-    return result
+def _pct_change(close):
+    """Bar returns of a bars x symbols array, NaN on the first bar (like pct_change)"""
+    # full_like keeps the memory layout of close
+    returns = np.full_like(close, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return returns
 
 
-def compute_sharpe(df, periods=[90, 180, 360], risk_free_rate=0.03):
-    df = df.copy()
-    df['daily_return'] = df['close'].pct_change()
-    # Annualized risk-free rate to daily
-    daily_rf = (1 + risk_free_rate) ** (1/252) - 1
-    
-    sharpes = {}
+def _cum_returns(returns):
+    """Growth of 1 since the first bar, NaN on the first bar (like (1 + returns).cumprod())"""
+    cum = np.full_like(returns, np.nan)
+    cum[1:] = np.cumprod(1 + returns[1:], axis=0)
+    return cum
+
+
+def _horizon_returns(index, cum):
+    """{label: array of returns per symbol, or None when the history is too short}"""
+    dates = horizon_dates(index[-1])
+    # Last bar on or before each horizon date
+    rows = index.searchsorted(list(dates.values()), side='right') - 1
+    return {label: (cum[-1] / cum[row] - 1 if row >= 0 else None) for label, row in zip(dates, rows)}
+
+
+def _window_stats(returns, periods, risk_free_rate):
+    """Sharpe, Sortino and annualized volatility over the last p bars, per symbol"""
+    daily_rf = (1 + risk_free_rate) ** (1 / TRADING_DAYS) - 1
+    annualize = np.sqrt(TRADING_DAYS)
+    stats = {"sharpe": {}, "sortino": {}, "volatility": {}}
     for p in periods:
-        subset = df.tail(p)
-        if len(subset) < 2:
-            sharpes[f"{p}d"] = None
+        window = returns[-p:]
+        if len(window) < 2:
+            for values in stats.values():
+                values[f"{p}d"] = None
             continue
-        mean = subset['daily_return'].mean() - daily_rf
-        std = subset['daily_return'].std()
-        sharpes[f"{p}d"] = (mean / std) * np.sqrt(252) if std > 0 else None
-    return sharpes
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            # Symbols with no returns in the window give NaN (and None below)
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            excess = np.nanmean(window, axis=0) - daily_rf
+            std = np.nanstd(window, axis=0, ddof=1)
+            downside = np.sqrt(np.nanmean(np.minimum(window - daily_rf, 0) ** 2, axis=0))
+            stats["sharpe"][f"{p}d"] = np.where(std > 0, excess / std * annualize, np.nan)
+            stats["sortino"][f"{p}d"] = np.where(downside > 0, excess / downside * annualize, np.nan)
+            stats["volatility"][f"{p}d"] = std * annualize
+    return stats
+
+
+def _spark(close, position_size, bars=SPARK_BARS):
+    """PnL path of a position over the last bars, per symbol (bars x symbols)"""
+    close = close[-bars:]
+    returns = np.zeros(close.shape)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return position_size * (np.cumprod(1 + returns, axis=0) - 1)
+
+
+def _max_drawdown(close):
+    return (close / np.maximum.accumulate(close, axis=0) - 1).min(axis=0)
+
+
+def _block_stats(index, close, position_size, periods, risk_free_rate):
+    """All metrics for symbols sharing one index, close being a bars x symbols array"""
+    returns = _pct_change(close)
+    horizons = _horizon_returns(index, _cum_returns(returns))
+    windows = _window_stats(returns, periods, risk_free_rate)
+    spark = _spark(close, position_size)
+    total_return = close[-1] / close[0] - 1
+    max_drawdown = _max_drawdown(close)
+
+    results = []
+    for j in range(close.shape[1]):
+        results.append({
+            "returns": {label: (None if value is None else value[j]) for label, value in horizons.items()},
+            "sharpe_ratios": _column(windows["sharpe"], j),
+            "sortino_ratios": _column(windows["sortino"], j),
+            "volatility": _column(windows["volatility"], j),
+            "max_drawdown": max_drawdown[j],
+            "total_return": total_return[j],
+            "pnl_spark_chart": spark[:, j].tolist(),
+        })
+    return results
+
+
+def _column(values, j):
+    """One symbol's value from each window; missing ones become None"""
+    column = {}
+    for label, value in values.items():
+        column[label] = None if value is None or np.isnan(value[j]) else value[j]
+    return column
+
+
+def compute_universe_stats(data, position_size=0.0, periods=SHARPE_PERIODS, risk_free_rate=0.03, column='close'):
+    """Every statistic for every symbol of a {symbol: DataFrame} dict in one batch
+
+    Symbols with the same index are stacked into one bars x symbols array, so
+    returns, horizon lookups and rolling windows are computed once per
+    calendar rather than once per symbol and metric. Returns
+    {symbol: {"returns", "sharpe_ratios", "sortino_ratios", "volatility",
+    "max_drawdown", "total_return", "pnl_spark_chart"}}; empty frames are
+    skipped.
+    """
+    groups = {}
+    for symbol, df in data.items():
+        if not df.empty:
+            groups.setdefault(data_fingerprint(df, []), []).append(symbol)
+
+    results = {}
+    for symbols in groups.values():
+        index = data[symbols[0]].index
+        # Column-major so each symbol's bars are contiguous, as in a single Series
+        close = np.asfortranarray(np.column_stack([data[s][column].to_numpy(dtype=np.float64) for s in symbols]))
+        for symbol, stats in zip(symbols, _block_stats(index, close, position_size, periods, risk_free_rate)):
+            results[symbol] = stats
+
+    # Input order
+    return {symbol: results[symbol] for symbol in data if symbol in results}
+
+
+def compute_stats(df, position_size=0.0, periods=SHARPE_PERIODS, risk_free_rate=0.03, column='close'):
+    """Every statistic for a single symbol (see compute_universe_stats)"""
+    return compute_universe_stats({None: df}, position_size, periods, risk_free_rate, column)[None]
+
+
+def _single(df, column='close'):
+    return np.asfortranarray(df[column].to_numpy(dtype=np.float64)[:, None])
+
+
+def compute_returns(df):
+    horizons = _horizon_returns(df.index, _cum_returns(_pct_change(_single(df))))
+    return {label: (None if value is None else value[0]) for label, value in horizons.items()}
+
+
+def compute_sharpe(df, periods=[90, 180, 360], risk_free_rate=0.03):
+    return _column(_window_stats(_pct_change(_single(df)), periods, risk_free_rate)["sharpe"], 0)
 
 
 def compute_pnl_spark(df, position_size):
-    df = df.tail(30).copy()
-    df['returns'] = df['close'].pct_change().fillna(0)
-    df['cum_return'] = (1 + df['returns']).cumprod()
-    df['pnl'] = position_size * (df['cum_return'] - 1)
-    return df['pnl'].tolist()
+    return _spark(_single(df), position_size)[:, 0].tolist()
 
 
 def compute_total_return(df):
@@ -59,11 +164,4 @@ def compute_total_return(df):
 
 def compute_drawdown(df, column='close'):
     """Calculate maximum drawdown"""
-    df = df.copy()
-    # Calculate the cumulative maximum
-    df['cum_max'] = df[column].cummax()
-    # Calculate drawdown in percentage terms
-    df['drawdown'] = (df[column] / df['cum_max']) - 1
-    # Get the maximum drawdown
-    max_drawdown = df['drawdown'].min()
-    return max_drawdown
\ No newline at end of file
+    return _max_drawdown(_single(df, column))[0]
@@ -0,0 +1,237 @@
+import inspect
+from contextlib import nullcontext
+import numpy as np
+from utils.indicators import Indicators
+
+# Indicator names strategies declare in indicators(), and the function computing each
+INDICATORS = {
+    'sma': Indicators.compute_sma,
+    'ema': Indicators.compute_ema,
+    'macd': Indicators.compute_macd,
+    'rsi': Indicators.compute_rsi,
+    'bollinger_bands': Indicators.compute_bollinger_bands,
+    'atr': Indicators.compute_atr,
+}
+
+
+class Rule:
+    """A leaf of a strategy graph: one strategy's signal column
+
+    column defaults to entry_<side> under the graph's entry and exit_<side>
+    under its exit. kwargs are passed on to generate_signal (e.g. an
+    entry_price for ExitDrawdownLimit).
+    """
+
+    def __init__(self, strategy, column=None, label=None, side="long", **kwargs):
+        self.strategy = strategy
+        self.column = column
+        self.label = label or type(strategy).__name__
+        self.side = side
+        self.kwargs = kwargs
+        parameters = inspect.signature(strategy.generate_signal).parameters
+        self._takes_symbol = 'symbol' in parameters
+        self._key = None
+
+    def key(self):
+        """Identity of the strategy run: same class, parameters and arguments run once"""
+        if self._key is None:
+            init = inspect.signature(type(self.strategy).__init__).parameters
+            params = tuple((name, repr(getattr(self.strategy, name, None))) for name in init if name != 'self')
+            self._key = (type(self.strategy).__name__, params, repr(sorted(self.kwargs.items())))
+        return self._key
+
+    def rules(self):
+        return [self]
+
+    def signal_column(self, role):
+        return self.column or f"{role}_{self.side}"
+
+    def timer_name(self):
+        """Metrics timer the strategy's runs are recorded under"""
+        return f"generate_signal.{type(self.strategy).__name__}"
+
+    def _timer(self, metrics):
+        return metrics.timer(self.timer_name()) if metrics is not None else nullcontext()
+
+    def generate(self, df, symbol=None, metrics=None):
+        """generate_signal output, timed in metrics (a RunMetrics) when given"""
+        with self._timer(metrics):
+            if self._takes_symbol:
+                return self.strategy.generate_signal(df, symbol, **self.kwargs)
+            return self.strategy.generate_signal(df, **self.kwargs)
+
+    def generate_panel(self, panel, metrics=None):
+        """Panel signals, falling back to one symbol at a time for strategies without a panel mode"""
+        if hasattr(self.strategy, 'generate_panel_signal') and not self.kwargs:
+            with self._timer(metrics):
+                return self.strategy.generate_panel_signal(panel)
+        signals = {}
+        mask = panel.mask
+        for j, symbol in enumerate(panel.symbols):
+            df = self.generate(panel.to_frame(symbol), symbol, metrics)
+            for name in df.columns:
+                if df[name].dtype.kind not in 'bif':
+                    continue
+                if name not in signals:
+                    signals[name] = np.zeros(panel.shape, dtype=df[name].dtype) if df[name].dtype.kind in 'bi' \
+                        else np.full(panel.shape, np.nan)
+                signals[name][mask[:, j], j] = df[name].to_numpy()
+        return signals
+
+    def evaluate(self, signals, role):
+        return np.asarray(signals[self.key()][self.signal_column(role)]).astype(bool)
+
+
+class _Combination:
+    def __init__(self, *nodes):
+        self.nodes = [node if hasattr(node, 'rules') else Rule(node) for node in nodes]
+
+    def rules(self):
+        return [rule for node in self.nodes for rule in node.rules()]
+
+    def _votes(self, signals, role):
+        return [node.evaluate(signals, role) for node in self.nodes]
+
+
+class All(_Combination):
+    """True where every rule is (AND)"""
+
+    def evaluate(self, signals, role):
+        return np.logical_and.reduce(self._votes(signals, role))
+
+
+class Any(_Combination):
+    """True where at least one rule is (OR)"""
+
+    def evaluate(self, signals, role):
+        return np.logical_or.reduce(self._votes(signals, role))
+
+
+class Vote(_Combination):
+    """True where at least min_votes rules are (a majority by default)"""
+
+    def __init__(self, *nodes, min_votes=None):
+        super().__init__(*nodes)
+        self.min_votes = min_votes if min_votes is not None else len(self.nodes) // 2 + 1
+
+    def evaluate(self, signals, role):
+        return np.sum(self._votes(signals, role), axis=0) >= self.min_votes
+
+
+class StrategyGraph:
+    """Entry and exit rules evaluated together over shared work
+
+    entry and exit are strategies, Rules or All/Any/Vote combinations of
+    them. Evaluating the graph computes the union of the indicators its
+    strategies declare once, then runs each distinct strategy (class and
+    parameters) once, however many rules refer to it; its signals serve
+    every rule and the latest-signal lookups. Adding a rule therefore only
+    adds the indicators and strategy run nothing else in the graph shares.
+    """
+
+    def __init__(self, entry, exit):
+        self.entry = entry if hasattr(entry, 'rules') else Rule(entry)
+        self.exit = exit if hasattr(exit, 'rules') else Rule(exit)
+
+        # Rules of different strategy runs get distinct labels (MACD settings A vs B)
+        owners = {}
+        for rule in self.rules():
+            label, n = rule.label, 1
+            while owners.setdefault(rule.label, rule.key()) != rule.key():
+                n += 1
+                rule.label = f"{label}_{n}"
+
+        self._strategies = {}
+        for rule in self.rules():
+            self._strategies.setdefault(rule.key(), rule)
+
+        self._indicators = {}
+        for rule in self._strategies.values():
+            declare = getattr(rule.strategy, 'indicators', None)
+            for name, params in (declare() if declare is not None else []):
+                self._indicators.setdefault((name, tuple(sorted(params.items()))), (name, params))
+
+    def rules(self):
+        return self.entry.rules() + self.exit.rules()
+
+    def strategies(self):
+        """{key: Rule} with one Rule per distinct strategy run, in graph order"""
+        return dict(self._strategies)
+
+    def indicators(self):
+        """Distinct (name, parameters) indicators declared by the strategies"""
+        return list(self._indicators.values())
+
+    def required_columns(self):
+        """Bar columns any of the strategies reads"""
+        columns = []
+        for rule in self._strategies.values():
+            columns += [c for c in getattr(rule.strategy, 'required_columns', []) if c not in columns]
+        return columns
+
+    def prefetch(self, symbols):
+        """Have strategies load their per-symbol data (e.g. fundamentals) for many symbols at once"""
+        for rule in self._strategies.values():
+            prefetch = getattr(rule.strategy, 'prefetch', None)
+            if prefetch is not None:
+                prefetch(symbols)
+
+    def evaluate(self, df, symbol=None, metrics=None):
+        """Signals for one symbol's bars
+
+        Returns {"entry", "exit"}: boolean arrays per bar, "frame": the bars
+        with every declared indicator added (two indicators writing the same
+        column, such as ATRs of different periods, leave the last one),
+        "indicators": the names of those columns and "signals":
+        {rule label: generate_signal output}. With metrics (a RunMetrics),
+        each distinct strategy's run is timed under generate_signal.<class>.
+        """
+        with Indicators.scope():
+            frame = df.copy(deep=False)
+            columns = []
+            for name, params in self._indicators.values():
+                for column, values in INDICATORS[name](frame, **params).items():
+                    frame[column] = values.to_numpy()
+                    if column not in columns:
+                        columns.append(column)
+
+            signals = {key: rule.generate(frame, symbol, metrics) for key, rule in self._strategies.items()}
+
+        return {
+            "entry": self.entry.evaluate(signals, "entry"),
+            "exit": self.exit.evaluate(signals, "exit"),
+            "frame": frame,
+            "indicators": columns,
+            "signals": self._by_label(signals),
+        }
+
+    def evaluate_panel(self, panel, metrics=None):
+        """Signals for every symbol of a Panel, as dates x symbols arrays
+
+        Strategies with a generate_panel_signal run once over the panel;
+        others run per symbol. Dates a symbol has no bar on are False.
+        Strategy runs are timed in metrics as in evaluate().
+        """
+        signals = {key: rule.generate_panel(panel, metrics) for key, rule in self._strategies.items()}
+        mask = panel.mask
+        return {
+            "entry": self.entry.evaluate(signals, "entry") & mask,
+            "exit": self.exit.evaluate(signals, "exit") & mask,
+            "signals": self._by_label(signals),
+        }
+
+    def latest(self, result):
+        """Latest entry/exit decision and the latest value of each rule"""
+        rules = {}
+        for role, node in (("entry", self.entry), ("exit", self.exit)):
+            for rule in node.rules():
+                values = result["signals"][rule.label][rule.signal_column(role)]
+                rules[rule.label] = bool(np.asarray(values)[-1])
+        return {
+            "entry_signal": bool(result["entry"][-1]),
+            "exit_signal": bool(result["exit"][-1]),
+            "rules": rules,
+        }
+
+    def _by_label(self, signals):
+        return {rule.label: signals[rule.key()] for rule in self.rules()}
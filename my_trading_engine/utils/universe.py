@@ -0,0 +1,160 @@
+import os
+import re
+from functools import lru_cache
+from config import SYMBOLS, UNIVERSE_CONFIG
+
+# Separators between the tags of one symbol in a CSV/Parquet tags column
+TAG_SEPARATOR = re.compile(r"[;|]")
+
+
+class Universe:
+    """The tradable symbols and their metadata, indexed by symbol and by tag
+
+    Entries are {"symbol", "tags", ...} dicts. Symbol lookups go through a
+    dict and each tag keeps the set of symbols carrying it, so annotating a
+    symbol costs the same in a 10,000-name universe as in a 3-name one, and a
+    tag query only touches the symbols of the tags it names. Symbols are
+    matched case-insensitively; results keep the universe's order.
+    """
+
+    def __init__(self, entries=()):
+        self._entries = {}  # SYMBOL -> entry, in universe order
+        self._positions = {}  # SYMBOL -> position, for ordering query results
+        self._tags = {}  # tag -> set of SYMBOLs
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def from_config(cls, symbols=SYMBOLS):
+        """The universe of config.SYMBOLS (dicts with symbol and tags, or plain symbols)"""
+        return cls(symbols)
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a CSV or Parquet file with a symbol column and optionally a tags column
+
+        Tags are a list column (Parquet) or a string with tags separated by
+        ";" or "|". Any other columns are kept as metadata.
+        """
+        import pandas as pd
+
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path, dtype={'symbol': str, 'tags': str}, keep_default_na=False)
+        if 'symbol' not in frame.columns:
+            raise ValueError(f"Universe file {path} has no symbol column")
+        return cls(frame.to_dict('records'))
+
+    @classmethod
+    def load(cls, path=None):
+        """The universe from path, UNIVERSE_CONFIG["path"], or else config.SYMBOLS"""
+        path = path or UNIVERSE_CONFIG.get("path")
+        if path:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Universe file {path} not found")
+            return cls.from_file(path)
+        return cls.from_config()
+
+    def add(self, entry):
+        """Add (or replace) a symbol, given as a symbol string or an entry dict"""
+        entry = dict(entry) if isinstance(entry, dict) else {"symbol": entry}
+        entry["symbol"] = str(entry["symbol"]).strip()
+        entry["tags"] = _tag_list(entry.get("tags"))
+        key = entry["symbol"].upper()
+        if key in self._entries:
+            self._untag(key)
+        else:
+            self._positions[key] = len(self._positions)
+        self._entries[key] = entry
+        for tag in entry["tags"]:
+            self._tags.setdefault(tag, set()).add(key)
+
+    def _untag(self, key):
+        for tag in self._entries[key]["tags"]:
+            self._tags[tag].discard(key)
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.symbols())
+
+    def symbols(self):
+        return [entry["symbol"] for entry in self._entries.values()]
+
+    def tags(self):
+        """Every tag in use, sorted"""
+        return sorted(self._tags)
+
+    def info(self, symbol):
+        """Metadata of a symbol; symbols outside the universe get empty tags"""
+        entry = self._entries.get(symbol.upper())
+        return entry if entry is not None else {"symbol": symbol, "tags": []}
+
+    def tagged(self, tag):
+        """Set of symbols (upper case) carrying tag"""
+        return self._tags.get(tag, set())
+
+    def query(self, expression):
+        """Symbols matching a tag expression, in universe order
+
+        Comma-separated terms must all match (AND); a term may list
+        alternatives separated by "|" (OR), and a "-" prefix excludes the
+        symbols of a tag (NOT). "retirement_core,large_cap" is the symbols with
+        both tags, "index|sector,-financials" those tagged index or sector
+        but not financials. Terms that only exclude start from every symbol.
+        """
+        include, exclude = [], set()
+        for term in (t.strip() for t in expression.split(',')):
+            if not term:
+                continue
+            if term.startswith('-'):
+                exclude |= self.tagged(term[1:].strip())
+            else:
+                include.append(set().union(*(self.tagged(t.strip()) for t in term.split('|'))))
+
+        if include:
+            # Intersect starting from the smallest set
+            include.sort(key=len)
+            keys = include[0].intersection(*include[1:])
+        else:
+            keys = set(self._entries)
+        return self._ordered(keys - exclude)
+
+    def select(self, symbols=None, tags=None):
+        """Symbols to run: the given symbols (or the whole universe), narrowed by a tag expression"""
+        if tags is None:
+            return list(symbols) if symbols is not None else self.symbols()
+        matches = self.query(tags)
+        if symbols is None:
+            return matches
+        keys = {symbol.upper() for symbol in matches}
+        return [symbol for symbol in symbols if symbol.upper() in keys]
+
+    def subset(self, symbols):
+        """A universe of just these symbols' entries (those it has)"""
+        return Universe(self._entries[s.upper()] for s in symbols if s.upper() in self._entries)
+
+    def _ordered(self, keys):
+        return [self._entries[key]["symbol"] for key in sorted(keys, key=self._positions.__getitem__)]
+
+
+def _tag_list(tags):
+    """Tags as a list of strings from a list, a separated string, or nothing"""
+    if tags is None or isinstance(tags, float):  # missing (NaN) in a file
+        return []
+    if isinstance(tags, str):
+        tags = TAG_SEPARATOR.split(tags)
+    return [str(tag).strip() for tag in tags if str(tag).strip()]
+
+
+@lru_cache(maxsize=None)
+def default_universe():
+    """Universe.load() of the configured universe, loaded once per process"""
+    return Universe.load()
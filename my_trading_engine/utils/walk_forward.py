@@ -0,0 +1,157 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from utils.backtest import trade_bar_returns, returns_metrics
+from utils.optimizer import METRICS, SWEEP_COLUMNS, _combinations, _signal_arrays
+from utils.portfolio import portfolio_metrics
+
+
+def walk_forward_folds(dates, train_bars, test_bars=None, n_folds=None, anchored=False):
+    """Split a calendar into consecutive train/test folds
+
+    Each test window follows its train window and the test windows tile the
+    calendar after the first train window. Rolling train windows are
+    train_bars long; anchored ones all start at the first date. Give
+    test_bars, or n_folds to split the remaining dates evenly.
+
+    Returns [(train_start, train_end, test_start, test_end)] as positions in
+    dates, ends exclusive.
+    """
+    n = len(dates)
+    if test_bars is None:
+        if not n_folds:
+            raise ValueError("Either test_bars or n_folds is required")
+        test_bars = (n - train_bars) // n_folds
+    if test_bars <= 0 or train_bars <= 0 or train_bars + test_bars > n:
+        raise ValueError(f"Cannot fit {train_bars} train and {test_bars} test bars in {n} dates")
+
+    folds = []
+    test_start = train_bars
+    while test_start + test_bars <= n and (n_folds is None or len(folds) < n_folds):
+        train_start = 0 if anchored else test_start - train_bars
+        folds.append((train_start, test_start, test_start, test_start + test_bars))
+        test_start += test_bars
+    return folds
+
+
+def _walk_forward_chunk(entry_cls, exit_cls, entry_sets, exit_sets, pairs, frames, dates, folds):
+    """Train and test metrics of every combination in every fold, for a chunk of symbols
+
+    Signals are generated once per parameter set over each symbol's whole
+    history and sliced into the folds, so overlapping train windows share all
+    indicator and signal work, and test windows start with fully warmed-up
+    indicators. Metrics are summed over the chunk's symbols (with counts) and
+    test bar returns summed by date, so the result does not grow with symbols.
+    """
+    shape = (len(folds), len(pairs), len(METRICS))
+    train_sum, train_count = np.zeros(shape), np.zeros(shape)
+    test_sum, test_count = np.zeros(shape), np.zeros(shape)
+    returns_sum = np.zeros((len(pairs), len(dates)))
+    returns_count = np.zeros(len(dates))
+
+    for df in frames:
+        open_prices = df['open'].to_numpy(dtype=float)
+        entries = [_signal_arrays(entry_cls(**p).generate_signal(df), ('entry_long', 'entry_short'))
+                   for p in entry_sets]
+        exits = [_signal_arrays(exit_cls(**p).generate_signal(df), ('exit_long', 'exit_short'))
+                 for p in exit_sets]
+        positions = dates.get_indexer(df.index)
+
+        for f, (train_start, train_end, test_start, test_end) in enumerate(folds):
+            a, b, c = df.index.searchsorted(dates[[train_start, train_end, test_start]])
+            d = df.index.searchsorted(dates[test_end]) if test_end < len(dates) else len(df)
+            returns_count[positions[c:d]] += 1
+            for p, (i, k) in enumerate(pairs):
+                signals = entries[i] + exits[k]
+                if b - a > 1:
+                    metrics = returns_metrics(*trade_bar_returns(open_prices[a:b], *(s[a:b] for s in signals)))
+                    values = np.array([metrics[m] for m in METRICS], dtype=float)
+                    train_sum[f, p] += np.nan_to_num(values)
+                    train_count[f, p] += ~np.isnan(values)
+                if d - c > 1:
+                    bar_returns, trade_returns = trade_bar_returns(open_prices[c:d], *(s[c:d] for s in signals))
+                    metrics = returns_metrics(bar_returns, trade_returns)
+                    values = np.array([metrics[m] for m in METRICS], dtype=float)
+                    test_sum[f, p] += np.nan_to_num(values)
+                    test_count[f, p] += ~np.isnan(values)
+                    returns_sum[p, positions[c:d]] += bar_returns
+
+    return train_sum, train_count, test_sum, test_count, returns_sum, returns_count
+
+
+def run_walk_forward(entry_cls, exit_cls, data, space, train_bars=756, test_bars=None, n_folds=None,
+                     anchored=False, method="grid", n_samples=100, seed=None, constraint=None,
+                     metric="sharpe", workers=None, chunk_size=None, initial_capital=10000, output_path=None):
+    """Walk-forward evaluation of an entry/exit pair's parameters
+
+    The union calendar of data is split by walk_forward_folds. In each fold
+    every combination of space (sampled as in run_sweep) is scored on the
+    train window by its mean metric across symbols, and the best one is
+    evaluated on the test window that follows. Symbols are split into chunks
+    on a process pool, each chunk covering every fold and combination.
+
+    The out-of-sample equity stitches the test windows together: on each
+    date, the bar return of that fold's chosen combination averaged over the
+    symbols trading, compounded from initial_capital. Returns {"folds": one
+    row per fold with its dates, chosen parameters, train metric and test
+    metrics, "equity": the out-of-sample equity Series, "metrics": its
+    summary}; the folds table is written as CSV when output_path is given.
+    """
+    entry_sets, exit_sets, pairs = _combinations(space, method, n_samples, seed, constraint)
+
+    symbols = [symbol for symbol, df in data.items() if not df.empty]
+    frames = [data[symbol][[c for c in SWEEP_COLUMNS if c in data[symbol].columns]] for symbol in symbols]
+    dates = frames[0].index.append([df.index for df in frames[1:]]).unique().sort_values() if frames \
+        else pd.DatetimeIndex([])
+    folds = walk_forward_folds(dates, train_bars, test_bars, n_folds, anchored)
+
+    workers = workers or 1
+    chunk_size = chunk_size or max(1, -(-len(frames) // (workers * 4)))
+    chunks = [frames[i:i + chunk_size] for i in range(0, len(frames), chunk_size)]
+
+    args = (entry_cls, exit_cls, entry_sets, exit_sets, pairs)
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_walk_forward_chunk, *zip(*[args + (chunk, dates, folds) for chunk in chunks])))
+    else:
+        outputs = [_walk_forward_chunk(*args, chunk, dates, folds) for chunk in chunks]
+    train_sum, train_count, test_sum, test_count, returns_sum, returns_count = (sum(parts) for parts in zip(*outputs))
+
+    rank = METRICS.index(metric)
+    rows, returns = [], []
+    with warnings.catch_warnings():
+        # Combinations no symbol traded give NaN rather than a warning
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        train = train_sum / train_count
+        test = test_sum / test_count
+
+    for f, (train_start, train_end, test_start, test_end) in enumerate(folds):
+        scores = np.nan_to_num(train[f, :, rank], nan=-np.inf)
+        best = int(np.argmax(scores))
+        i, k = pairs[best]
+        row = {
+            "fold": f + 1,
+            "train_start": dates[train_start], "train_end": dates[train_end - 1],
+            "test_start": dates[test_start], "test_end": dates[test_end - 1],
+        }
+        row.update({f"entry.{name}": value for name, value in entry_sets[i].items()})
+        row.update({f"exit.{name}": value for name, value in exit_sets[k].items()})
+        row[f"train_{metric}"] = train[f, best, rank]
+        row.update({f"test_{name}": test[f, best, m] for m, name in enumerate(METRICS)})
+        rows.append(row)
+
+        counts = returns_count[test_start:test_end]
+        returns.append(np.divide(returns_sum[best, test_start:test_end], counts,
+                                 out=np.zeros(len(counts)), where=counts > 0))
+
+    table = pd.DataFrame(rows)
+    index = dates[folds[0][2]:folds[-1][3]]
+    equity = pd.Series(initial_capital * np.cumprod(1 + np.concatenate(returns)), index=index, name="equity")
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        table.to_csv(output_path, index=False)
+
+    return {"folds": table, "equity": equity, "metrics": portfolio_metrics(equity, initial_capital=initial_capital)}